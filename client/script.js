@@ -20,18 +20,31 @@ document.addEventListener("DOMContentLoaded", () => {
                 const isProduction = window.APP_ENV.IS_PROD === 'true';
 
                 const API_BASE = isProduction ? "/api" : "http://localhost:55555";
-                const url = `${API_BASE}/response?pergunta=` + encodeURIComponent(pergunta);
+                const url = `${API_BASE}/response/stream?pergunta=` + encodeURIComponent(pergunta);
                 const resposta = await fetch(url);
             
             if (!resposta.ok) {
                 throw new Error(`Erro na rede: ${resposta.statusText}`);
             }
 
-            const dados = await resposta.json();
-            
-            removeTypingIndicator();
+            let messageElement = null;
+            let texto = "";
 
-            displayMessage(dados.resposta, 'ai');
+            await readEvents(resposta, (evento, dados) => {
+                if (evento === "error") {
+                    throw new Error(dados.erro);
+                }
+                texto = evento === "done" ? dados.resposta : texto + dados.delta;
+
+                if (!messageElement) {
+                    removeTypingIndicator();
+                    messageElement = displayMessage(texto, 'ai');
+                } else {
+                    updateMessage(messageElement, texto);
+                }
+            });
+
+            removeTypingIndicator();
 
         } catch (erro) {
             console.error("Erro ao buscar resposta:", erro);
@@ -40,6 +53,41 @@ document.addEventListener("DOMContentLoaded", () => {
         }
     }
 
+    // Lê a resposta como Server-Sent Events, chamando onEvent(evento, dados)
+    // para cada evento recebido.
+    async function readEvents(resposta, onEvent) {
+        const reader = resposta.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = "";
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) {
+                break;
+            }
+            buffer += decoder.decode(value, { stream: true });
+
+            let separator;
+            while ((separator = buffer.indexOf("\n\n")) !== -1) {
+                const bloco = buffer.slice(0, separator);
+                buffer = buffer.slice(separator + 2);
+
+                let evento = "message";
+                const dados = [];
+                for (const linha of bloco.split("\n")) {
+                    if (linha.startsWith("event:")) {
+                        evento = linha.slice(6).trim();
+                    } else if (linha.startsWith("data:")) {
+                        dados.push(linha.slice(5).trim());
+                    }
+                }
+                if (dados.length) {
+                    onEvent(evento, JSON.parse(dados.join("\n")));
+                }
+            }
+        }
+    }
+
     function displayMessage(text, sender) {
         const messageElement = document.createElement('div');
         messageElement.classList.add('message', `${sender}-message`);
@@ -52,6 +100,12 @@ document.addEventListener("DOMContentLoaded", () => {
         chatContainer.appendChild(messageElement);
 
         chatContainer.scrollTop = chatContainer.scrollHeight;
+        return messageElement;
+    }
+
+    function updateMessage(messageElement, text) {
+        messageElement.innerHTML = marked.parse(text);
+        chatContainer.scrollTop = chatContainer.scrollHeight;
     }
 
     function displayTypingIndicator() {
@@ -1,6 +1,13 @@
 from functools import lru_cache
+from pathlib import Path
+from typing import Literal
+from pydantic import field_validator
 from pydantic_settings import BaseSettings
 
+# Pasta do server: caminhos relativos de arquivos compartilhados entre
+# processos partem daqui, e não do diretório de onde cada um foi iniciado.
+SERVER_DIR = Path(__file__).resolve().parent.parent
+
 
 class Settings(BaseSettings):
     google_api_key: str
@@ -9,6 +16,128 @@ class Settings(BaseSettings):
     qdrant_url: str
     debug: bool = False
 
+    # Conexão com o Qdrant: gRPC (porta 6334) em vez de REST e tamanho do pool
+    # de conexões compartilhado por busca e ingestão (vazio = padrão do cliente)
+    qdrant_prefer_grpc: bool = False
+    qdrant_grpc_port: int = 6334
+    qdrant_pool_size: int | None = None
+    qdrant_timeout: int | None = None
+
+    # Chamadas ao Gemini: prazo por tentativa (vazio = sem prazo), novas
+    # tentativas com backoff exponencial e jitter para erros transitórios,
+    # hedge (duplicata após o p95 observado, só nas chamadas assíncronas) e
+    # circuit breaker (abre após N falhas seguidas; 0 desliga)
+    gemini_llm_timeout_seconds: float | None = 30
+    gemini_embed_timeout_seconds: float | None = 5
+    gemini_max_retries: int = 2
+    gemini_backoff_base_ms: float = 200
+    gemini_backoff_max_ms: float = 2000
+    gemini_llm_hedge_enabled: bool = False
+    gemini_embed_hedge_enabled: bool = False
+    gemini_hedge_min_delay_ms: float = 50
+    gemini_breaker_failures: int = 5
+    gemini_breaker_reset_seconds: float = 30
+
+    # Cota do Gemini compartilhada pelo processo: token bucket em requisições
+    # por minuto (0 = sem limite), com as perguntas ao vivo na frente do
+    # /response/batch e da ingestão; a ingestão deixa GEMINI_BULK_RESERVE
+    # requisições livres no balde para as perguntas
+    gemini_llm_rpm: float = 0
+    gemini_llm_burst: int = 5
+    gemini_embed_rpm: float = 0
+    gemini_embed_burst: int = 20
+    gemini_bulk_reserve: float = 2
+
+    # Embeddings
+    embedder_backend: Literal["gemini", "onnx"] = "gemini"
+    embedding_model_name: str = "models/text-embedding-004"
+    embedding_batch_size: int = 100
+    embedding_dimension: int | None = None
+
+    # Embedder local (EMBEDDER_BACKEND=onnx)
+    onnx_model_path: str | None = None
+    onnx_tokenizer_path: str | None = None
+    onnx_num_threads: int | None = None
+    onnx_max_length: int = 256
+
+    # Banco vetorial usado nas consultas: Qdrant ou índice mmap local
+    # (gerado com python -m app.services.vector_store.mmap_store)
+    vector_store_backend: Literal["qdrant", "mmap"] = "qdrant"
+    mmap_index_path: str | None = None
+    mmap_approximate: bool = False
+    mmap_nprobe: int = 8
+
+    # Document store local (SQLite + zstd/zlib) com o texto dos chunks; com ele
+    # o Qdrant guarda só vetores e campos de filtro
+    document_store_path: str | None = None
+
+    # Busca híbrida: BM25 (índice mantido pelo ingest) + vetorial, fundidas por RRF
+    hybrid_search_enabled: bool = False
+    lexical_index_path: str = "data/bm25.npz"
+    hybrid_candidates: int = 20
+    rrf_k: int = 60
+
+    # Reranking em dois estágios com cross-encoder ONNX local
+    # (requer: pip install onnxruntime tokenizers)
+    reranker_enabled: bool = False
+    reranker_model_path: str | None = None
+    reranker_tokenizer_path: str | None = None
+    reranker_candidates: int = 50
+    reranker_budget_ms: float = 150
+    reranker_batch_size: int = 16
+    reranker_max_length: int = 256
+    reranker_num_threads: int | None = None
+
+    # Empacotamento do contexto: deduplicação, MMR, junção de chunks vizinhos
+    # e orçamento de tokens do prompt
+    context_packing_enabled: bool = False
+    context_candidates: int = 12
+    context_token_budget: int = 1500
+    context_mmr_lambda: float = 0.7
+    context_dedup_threshold: float = 0.92
+
+    # POST /response/batch
+    batch_max_questions: int = 100
+    batch_llm_concurrency: int = 4
+
+    # Coalescência: perguntas iguais (normalizadas) em voo ao mesmo tempo
+    # compartilham uma única execução de embedding, busca e geração
+    request_coalescing_enabled: bool = True
+
+    # Cache de embeddings de consulta
+    embedding_cache_enabled: bool = True
+    embedding_cache_max_entries: int = 10000
+    embedding_cache_path: str | None = None
+
+    # Cache semântico de respostas
+    answer_cache_enabled: bool = True
+    answer_cache_threshold: float = 0.97
+    answer_cache_max_entries: int = 1000
+    answer_cache_ttl_seconds: float = 3600
+    answer_cache_max_bytes: int = 32 * 1024 * 1024
+    # Arquivo com a versão da coleção, atualizado pelo ingest; o cache de
+    # respostas de cada processo é invalidado quando ela muda (relativo à
+    # pasta do server, para que todos os processos usem o mesmo arquivo)
+    collection_stamp_path: str = "data/collection.stamp"
+
+    # Chunking (tokens aproximados; sobreposição entre chunks consecutivos)
+    chunk_max_tokens: int = 350
+    chunk_overlap_tokens: int = 40
+
+    # Ingestão
+    ingest_batch_size: int = 64
+    ingest_embed_workers: int = 4
+    ingest_upsert_workers: int = 2
+    ingest_queue_depth: int = 8
+    ingest_max_concurrent_jobs: int = 1
+
+    @field_validator("collection_stamp_path", "lexical_index_path")
+    @classmethod
+    def _anchor_to_server_dir(cls, value: str | None) -> str | None:
+        if value is None or Path(value).is_absolute():
+            return value
+        return str(SERVER_DIR / value)
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -1,45 +1,287 @@
+import os
 from functools import lru_cache
 from fastapi import Depends
 from app.config import get_settings
 from app.services.llm.gemini_llm import GeminiLLM
 from app.services.embedder.gemini_embedder import GeminiEmbedder
-from app.services.vector_store.qdrant import QdrantVectorStore
+from app.services.vector_store.qdrant import QdrantClients, QdrantVectorStore
+from app.services.vector_store.mmap_store import MmapVectorStore
 from app.services.rag import RAGService
+from app.services.single_flight import SingleFlight
+from app.services.answer_cache import SemanticAnswerCache
+from app.services.collection_stamp import CollectionStamp
+from app.services.context_packer import ContextPacker
+from app.services.ingest_jobs import IngestJob, IngestJobManager
 from app.services.llm.base import LLM
 from app.services.vector_store.base import VectorStore
 from app.services.embedder.base import Embedder
+from app.services.embedder.cache import EmbeddingCache
+from app.services.embedder.instrumented import InstrumentedEmbedder
+from app.services.document_store import DocumentStore
+from app.services.retrieval.bm25 import BM25Index
+from app.services.retrieval.hybrid import HybridVectorStore
+from app.services.retrieval.reranker import OnnxCrossEncoder, Reranker, RerankingVectorStore
+from app.services.resilience import CircuitBreaker, ResiliencePolicy
+from app.services.rate_limit import TokenBucketScheduler
 
 
+@lru_cache
+def get_llm_rate_limiter() -> TokenBucketScheduler:
+    settings = get_settings()
+    return TokenBucketScheduler(
+        "gemini_llm",
+        rate=settings.gemini_llm_rpm / 60,
+        burst=settings.gemini_llm_burst,
+        bulk_reserve=settings.gemini_bulk_reserve,
+    )
+
+@lru_cache
+def get_embedding_rate_limiter() -> TokenBucketScheduler:
+    settings = get_settings()
+    return TokenBucketScheduler(
+        "gemini_embedder",
+        rate=settings.gemini_embed_rpm / 60,
+        burst=settings.gemini_embed_burst,
+        bulk_reserve=settings.gemini_bulk_reserve,
+    )
+
+def gemini_policy(
+    name: str, timeout: float | None, hedge: bool, limiter: TokenBucketScheduler | None = None,
+) -> ResiliencePolicy:
+    settings = get_settings()
+    return ResiliencePolicy(
+        name,
+        timeout=timeout,
+        max_retries=settings.gemini_max_retries,
+        backoff_base=settings.gemini_backoff_base_ms / 1000,
+        backoff_max=settings.gemini_backoff_max_ms / 1000,
+        hedge=hedge,
+        hedge_min_delay=settings.gemini_hedge_min_delay_ms / 1000,
+        breaker=CircuitBreaker(
+            name,
+            failure_threshold=settings.gemini_breaker_failures,
+            reset_seconds=settings.gemini_breaker_reset_seconds,
+        ),
+        limiter=limiter,
+    )
+
 @lru_cache
 def get_llm() -> LLM:
     settings = get_settings()
     return GeminiLLM(
         api_key=settings.google_api_key,
-        model_name=settings.gemini_model_name
+        model_name=settings.gemini_model_name,
+        policy=gemini_policy(
+            "gemini_llm", settings.gemini_llm_timeout_seconds, settings.gemini_llm_hedge_enabled,
+            limiter=get_llm_rate_limiter(),
+        ),
     )
 
 @lru_cache
 def get_embedder() -> Embedder:
     settings = get_settings()
-    return GeminiEmbedder(
+    if settings.embedder_backend == "onnx":
+        if not settings.onnx_model_path:
+            raise ValueError("EMBEDDER_BACKEND=onnx requer ONNX_MODEL_PATH.")
+        # Import tardio: onnxruntime e tokenizers são dependências opcionais.
+        from app.services.embedder.onnx_embedder import OnnxEmbedder
+
+        return InstrumentedEmbedder(OnnxEmbedder(
+            model_path=settings.onnx_model_path,
+            tokenizer_path=settings.onnx_tokenizer_path,
+            max_batch_size=settings.embedding_batch_size,
+            num_threads=settings.onnx_num_threads,
+            max_length=settings.onnx_max_length,
+        ))
+
+    return InstrumentedEmbedder(GeminiEmbedder(
         api_key=settings.google_api_key,
-        model_name="models/text-embedding-004"
+        model_name=settings.embedding_model_name,
+        max_batch_size=settings.embedding_batch_size,
+        dimension=settings.embedding_dimension,
+        policy=gemini_policy(
+            "gemini_embedder", settings.gemini_embed_timeout_seconds, settings.gemini_embed_hedge_enabled,
+            limiter=get_embedding_rate_limiter(),
+        ),
+    ))
+
+@lru_cache
+def get_query_cache() -> EmbeddingCache | None:
+    settings = get_settings()
+    if not settings.embedding_cache_enabled:
+        return None
+    return EmbeddingCache(
+        max_entries=settings.embedding_cache_max_entries,
+        path=settings.embedding_cache_path,
+    )
+
+@lru_cache
+def get_qdrant_clients() -> QdrantClients:
+    settings = get_settings()
+    return QdrantClients(
+        url=settings.qdrant_url,
+        # QDRANT_API_KEY era a variável lida pelo script de ingestão.
+        api_key=settings.qdrant_key or os.getenv("QDRANT_API_KEY"),
+        prefer_grpc=settings.qdrant_prefer_grpc,
+        grpc_port=settings.qdrant_grpc_port,
+        pool_size=settings.qdrant_pool_size,
+        timeout=settings.qdrant_timeout,
+    )
+
+@lru_cache
+def get_document_store() -> DocumentStore | None:
+    settings = get_settings()
+    if not settings.document_store_path:
+        return None
+    return DocumentStore(settings.document_store_path)
+
+@lru_cache
+def get_lexical_index() -> BM25Index | None:
+    settings = get_settings()
+    if not settings.hybrid_search_enabled:
+        return None
+    return BM25Index.load(settings.lexical_index_path)
+
+@lru_cache
+def get_reranker() -> Reranker | None:
+    settings = get_settings()
+    if not settings.reranker_enabled:
+        return None
+    if not settings.reranker_model_path:
+        raise ValueError("RERANKER_ENABLED requer RERANKER_MODEL_PATH.")
+    return OnnxCrossEncoder(
+        model_path=settings.reranker_model_path,
+        tokenizer_path=settings.reranker_tokenizer_path,
+        max_batch_size=settings.reranker_batch_size,
+        num_threads=settings.reranker_num_threads,
+        max_length=settings.reranker_max_length,
     )
 
 @lru_cache
 def get_vector_store(
     embedder: Embedder = Depends(get_embedder),
+    query_cache: EmbeddingCache | None = Depends(get_query_cache),
 ) -> VectorStore:
     settings = get_settings()
-    return QdrantVectorStore(
-        url=settings.qdrant_url,
-        api_key=settings.qdrant_key,
-        embedder=embedder,
-        collection_name="ChiquinhoAI"
+    if settings.vector_store_backend == "mmap":
+        if not settings.mmap_index_path:
+            raise ValueError("VECTOR_STORE_BACKEND=mmap requer MMAP_INDEX_PATH.")
+        store = MmapVectorStore(
+            path=settings.mmap_index_path,
+            embedder=embedder,
+            query_cache=query_cache,
+            approximate=settings.mmap_approximate,
+            nprobe=settings.mmap_nprobe,
+            document_store=get_document_store(),
+            with_vectors=settings.context_packing_enabled,
+        )
+    else:
+        store = QdrantVectorStore(
+            url=settings.qdrant_url,
+            api_key=settings.qdrant_key,
+            embedder=embedder,
+            collection_name="ChiquinhoAI",
+            query_cache=query_cache,
+            document_store=get_document_store(),
+            clients=get_qdrant_clients(),
+            with_vectors=settings.context_packing_enabled,
+        )
+
+    lexical_index = get_lexical_index()
+    if lexical_index is not None:
+        store = HybridVectorStore(
+            dense=store,
+            lexical=lexical_index,
+            candidates=settings.hybrid_candidates,
+            rrf_k=settings.rrf_k,
+        )
+
+    reranker = get_reranker()
+    if reranker is not None:
+        store = RerankingVectorStore(
+            inner=store,
+            reranker=reranker,
+            candidates=settings.reranker_candidates,
+            budget_ms=settings.reranker_budget_ms,
+        )
+    return store
+
+@lru_cache
+def get_collection_stamp() -> CollectionStamp:
+    return CollectionStamp(get_settings().collection_stamp_path)
+
+@lru_cache
+def get_answer_cache() -> SemanticAnswerCache | None:
+    settings = get_settings()
+    if not settings.answer_cache_enabled:
+        return None
+    return SemanticAnswerCache(
+        threshold=settings.answer_cache_threshold,
+        max_entries=settings.answer_cache_max_entries,
+        ttl_seconds=settings.answer_cache_ttl_seconds,
+        max_bytes=settings.answer_cache_max_bytes,
+        stamp=get_collection_stamp(),
     )
 
+@lru_cache
+def get_context_packer() -> ContextPacker | None:
+    settings = get_settings()
+    if not settings.context_packing_enabled:
+        return None
+    return ContextPacker(
+        token_budget=settings.context_token_budget,
+        candidates=settings.context_candidates,
+        mmr_lambda=settings.context_mmr_lambda,
+        dedup_threshold=settings.context_dedup_threshold,
+    )
+
+@lru_cache
+def get_coalescer() -> SingleFlight | None:
+    if not get_settings().request_coalescing_enabled:
+        return None
+    return SingleFlight()
+
 def get_rag_service(
     llm: LLM = Depends(get_llm),
     vector_store: VectorStore = Depends(get_vector_store),
+    answer_cache: SemanticAnswerCache | None = Depends(get_answer_cache),
+    packer: ContextPacker | None = Depends(get_context_packer),
+    coalescer: SingleFlight | None = Depends(get_coalescer),
 ) -> RAGService:
-    return RAGService(llm=llm, vector_store=vector_store)
\ No newline at end of file
+    return RAGService(
+        llm=llm, vector_store=vector_store, answer_cache=answer_cache, packer=packer, coalescer=coalescer,
+    )
+
+
+@lru_cache
+def get_ingest_jobs() -> IngestJobManager:
+    # Import tardio: app.ingest importa este módulo.
+    from app.ingest import ingest
+
+    settings = get_settings()
+    embedder = get_embedder()
+    answer_cache = get_answer_cache()
+    lexical_index = get_lexical_index()
+    document_store = get_document_store()
+    clients = get_qdrant_clients()
+
+    def run(docs, stats):
+        return ingest(
+            docs,
+            embedder=embedder,
+            recreate=False,
+            stats=stats,
+            lexical_index=lexical_index,
+            document_store=document_store,
+            clients=clients,
+        )
+
+    def on_complete(job: IngestJob):
+        if answer_cache is not None and (job.stats.upserted or job.stats.deleted_stale):
+            answer_cache.invalidate()
+
+    return IngestJobManager(
+        runner=run,
+        max_concurrent_jobs=settings.ingest_max_concurrent_jobs,
+        on_complete=on_complete,
+    )
@@ -1,23 +1,44 @@
 import os
 import json
+import hashlib
 import logging
+import argparse
+import datetime
+import re
+import time
 import uuid
-from typing import List
+from typing import Iterable, Iterator, List
 
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams
 
 from app.config import get_settings
 from app.services.embedder.base import Embedder
-from app.dependencies import get_embedder
+from app.services.chunker import iter_chunks
+from app.services.corpus_loader import iter_documents
+from app.services.ingest_pipeline import IngestPipeline, IngestStats
+from app.services.metrics import INGEST_CHUNKS, INGEST_RUNS, INGEST_SECONDS
+from app.services.rate_limit import Priority, priority
+from app.services.retrieval.bm25 import BM25Index
+from app.services.vector_store.qdrant import PAYLOAD_INDEXES, QdrantClients
+from app.services.document_store import DocumentStore
+from app.dependencies import get_collection_stamp, get_document_store, get_embedder, get_qdrant_clients
 
 logger = logging.getLogger(__name__)
 
 COLLECTION_NAME = "ChiquinhoAI"
 MAX_CHARS = 3500
 
+MONTHS = {
+    "janeiro": 1, "fevereiro": 2, "março": 3, "marco": 3, "abril": 4, "maio": 5, "junho": 6,
+    "julho": 7, "agosto": 8, "setembro": 9, "outubro": 10, "novembro": 11, "dezembro": 12,
+}
+_PT_DATE = re.compile(r"(\d{1,2})º?\s+de\s+([a-zç]+)\s+de\s+(\d{4})", re.IGNORECASE)
+_NUMERIC_DATE = re.compile(r"(\d{1,2})/(\d{1,2})/(\d{4})")
+_ISO_DATE = re.compile(r"(\d{4})-(\d{2})-(\d{2})")
+
 
 def split_text(text: str, max_chars: int = MAX_CHARS) -> List[str]:
+    """Divisor antigo por número fixo de caracteres (mantido para o benchmark)."""
     text = text.strip()
     if len(text) <= max_chars:
         return [text]
@@ -32,31 +53,72 @@ def split_text(text: str, max_chars: int = MAX_CHARS) -> List[str]:
     return chunks
 
 
-def build_records_from_docs(docs: List[dict]) -> List[dict]:
-    records = []
+def parse_publication_date(text: str | None) -> str | None:
+    """
+    Converte a data de publicação do scraper ("29 de agosto de 2025",
+    "29/08/2025" ou ISO) para RFC 3339, usado no índice `published_at`.
+    """
+    if not text:
+        return None
+
+    if match := _PT_DATE.search(text):
+        day, month, year = int(match.group(1)), MONTHS.get(match.group(2).lower()), int(match.group(3))
+    elif match := _NUMERIC_DATE.search(text):
+        day, month, year = (int(g) for g in match.groups())
+    elif match := _ISO_DATE.search(text):
+        year, month, day = (int(g) for g in match.groups())
+    else:
+        return None
+
+    try:
+        return datetime.date(year, month, day).isoformat() + "T00:00:00Z"
+    except (TypeError, ValueError):
+        return None
+
+
+def content_hash(payload: dict) -> str:
+    """Hash do conteúdo indexado de um chunk (texto + metadados)."""
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def iter_records_from_docs(
+    docs: Iterable[dict],
+    max_tokens: int | None = None,
+    overlap_tokens: int | None = None,
+) -> Iterator[dict]:
+    settings = get_settings()
+    max_tokens = max_tokens or settings.chunk_max_tokens
+    overlap_tokens = settings.chunk_overlap_tokens if overlap_tokens is None else overlap_tokens
 
     for d in docs:
-        full_text = f"{d.get('title','')}\n\n{d.get('content_text','')}".strip()
-        chunks = split_text(full_text, MAX_CHARS)
+        full_text = f"{d.get('title') or ''}\n\n{d.get('content_text') or ''}".strip()
+        # Os chunks de um documento são materializados porque cada payload
+        # leva total_chunks (usado para remover chunks obsoletos).
+        chunks = list(iter_chunks(full_text, max_tokens, overlap_tokens))
 
         for idx, chunk in enumerate(chunks):
             payload = {
                 "title": d.get("title"),
                 "url": d.get("url"),
                 "publication_date": d.get("publication_date"),
+                "published_at": parse_publication_date(d.get("publication_date")),
                 "source": d.get("source"),
-                "excerpt": d.get("metadata", {}).get("excerpt"),
+                "excerpt": (d.get("metadata") or {}).get("excerpt"),
                 "content_text": chunk,
                 "chunk": idx,
                 "total_chunks": len(chunks)
             }
+            payload["content_hash"] = content_hash(payload)
 
-            records.append({
+            yield {
                 "text": chunk,
                 "payload": payload
-            })
+            }
 
-    return records
+
+def build_records_from_docs(docs: List[dict]) -> List[dict]:
+    return list(iter_records_from_docs(docs))
 
 
 def make_point_id(url: str, chunk_idx: int) -> str:
@@ -65,104 +127,162 @@ def make_point_id(url: str, chunk_idx: int) -> str:
     return str(uuid.uuid5(uuid.NAMESPACE_URL, raw))
 
 
-def ingest(
-    docs: List[dict],
-    embedder: Embedder,
-    batch_size: int = 64,
-    recreate: bool = False,
-):
-    settings = get_settings()
-    qdrant_api_key = os.getenv("QDRANT_API_KEY")
-    client = QdrantClient(url=settings.qdrant_url, api_key=qdrant_api_key)
-
-    records = build_records_from_docs(docs)
-    if not records:
-        logger.warning("Nenhum documento para ingerir.")
-        return
-
-    logger.info(f"Total após chunking: {len(records)} pedaços indexáveis.")
-
-    vectors = []
-    final_records = []
-
-    for rec in records:
-        try:
-            vec = embedder.embed_text(rec["text"])
-        except Exception as e:
-            logger.error(f"Erro ao gerar embedding: {e}")
-            continue
-
-        if not vec:
-            logger.error("Falha ao gerar embedding, pulando chunk.")
-            continue
+def record_point_id(record: dict) -> str:
+    payload = record["payload"]
+    return make_point_id(payload["url"], payload["chunk"])
 
-        vectors.append(vec)
-        final_records.append(rec)
 
-    if not vectors:
-        logger.error("Nenhum embedding foi gerado. Abortando ingest.")
+def backfill_lexical_index(
+    client: QdrantClient,
+    index: BM25Index,
+    collection_name: str = COLLECTION_NAME,
+    document_store: DocumentStore | None = None,
+):
+    """Indexa no BM25 todos os pontos já existentes na coleção."""
+    if not client.collection_exists(collection_name):
         return
 
-    vector_size = len(vectors[0])
-    collections = client.get_collections().collections
-    exists = any(c.name == COLLECTION_NAME for c in collections)
-
-    if recreate or not exists:
-        client.recreate_collection(
-            collection_name=COLLECTION_NAME,
-            vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE)
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection_name,
+            limit=512,
+            offset=offset,
+            with_payload=["content_text"],
+            with_vectors=False,
         )
-        logger.info(f"Coleção criada com dimensão={vector_size}")
-
-    points = []
-    for rec, vec in zip(final_records, vectors):
-        url = rec["payload"]["url"]
-        chunk_idx = rec["payload"]["chunk"]
+        texts = {str(p.id): (p.payload or {}).get("content_text") for p in points}
+        missing = [point_id for point_id, text in texts.items() if text is None]
+        if missing and document_store is not None:
+            for point_id, document in document_store.get_many(missing).items():
+                texts[point_id] = document.get("content_text")
+        index.add_many((point_id, text or "") for point_id, text in texts.items())
+        if offset is None:
+            break
+    logger.info(f"Índice lexical reconstruído a partir da coleção ({len(index)} chunks).")
+
+
+def record_ingest_metrics(stats: IngestStats, seconds: float):
+    INGEST_RUNS.inc()
+    INGEST_SECONDS.inc(seconds)
+    for result, count in (
+        ("upserted", stats.upserted),
+        ("unchanged", stats.skipped_unchanged),
+        ("failed_embedding", stats.failed_embeddings),
+        ("failed_upsert", stats.failed_upserts),
+        ("deleted_stale", stats.deleted_stale),
+    ):
+        INGEST_CHUNKS.inc(count, result=result)
 
-        point_id = make_point_id(url, chunk_idx)
 
-        point = {
-            "id": point_id,
-            "vector": vec,
-            "payload": rec["payload"]
+def ingest(
+    docs: Iterable[dict],
+    embedder: Embedder,
+    batch_size: int | None = None,
+    recreate: bool = False,
+    incremental: bool = True,
+    stats: IngestStats | None = None,
+    lexical_index: BM25Index | None = None,
+    document_store: DocumentStore | None = None,
+    clients: QdrantClients | None = None,
+) -> IngestStats:
+    settings = get_settings()
+    if clients is None:
+        clients = get_qdrant_clients()
+    client = clients.sync
+
+    if document_store is None:
+        document_store = get_document_store()
+
+    if lexical_index is None and settings.hybrid_search_enabled:
+        lexical_index = BM25Index.load(settings.lexical_index_path)
+
+    hooks = {}
+    if lexical_index is not None:
+        if recreate:
+            lexical_index.clear()
+        elif not len(lexical_index):
+            # Chunks inalterados são pulados pelo modo incremental; sem
+            # backfill eles nunca entrariam num índice novo.
+            backfill_lexical_index(client, lexical_index, document_store=document_store)
+        hooks = {
+            "on_upsert": lambda points: lexical_index.add_many(
+                (str(p.id), p.payload.get("content_text") or "") for p in points
+            ),
+            "on_delete": lexical_index.remove,
         }
 
-        points.append(point)
+    pipeline = IngestPipeline(
+        client=client,
+        embedder=embedder,
+        collection_name=COLLECTION_NAME,
+        point_id_fn=record_point_id,
+        batch_size=batch_size or settings.ingest_batch_size,
+        embed_workers=settings.ingest_embed_workers,
+        upsert_workers=settings.ingest_upsert_workers,
+        queue_depth=settings.ingest_queue_depth,
+        recreate=recreate,
+        incremental=incremental,
+        payload_indexes=PAYLOAD_INDEXES,
+        document_store=document_store,
+        collections=clients,
+        **hooks,
+    )
+    started = time.perf_counter()
+    # Na cota compartilhada do Gemini, a ingestão fica atrás das perguntas.
+    with priority(Priority.BULK):
+        stats = pipeline.run(iter_records_from_docs(docs), stats=stats)
+    record_ingest_metrics(stats, time.perf_counter() - started)
+
+    # Avisa os outros processos (caches de resposta) que a coleção mudou.
+    if recreate or stats.upserted or stats.deleted_stale:
+        get_collection_stamp().bump()
+
+    if lexical_index is not None and lexical_index.path:
+        lexical_index.save()
+
+    if not stats.total_chunks:
+        logger.warning("Nenhum documento para ingerir.")
+    elif not stats.embedded and not stats.skipped_unchanged:
+        logger.error("Nenhum embedding foi gerado. Ingest abortado.")
+    else:
+        logger.info(
+            f"INGEST FINALIZADO — {stats.upserted}/{stats.total_chunks} chunks inseridos, "
+            f"{stats.skipped_unchanged} inalterados, {stats.deleted_stale} obsoletos removidos "
+            f"({stats.failed_embeddings} falhas de embedding, {stats.failed_upserts} falhas de upsert)."
+        )
 
-        if len(points) >= batch_size:
-            client.upsert(collection_name=COLLECTION_NAME, points=points)
-            logger.info(f"Upsert batch ({len(points)}) OK")
-            points = []
+    return stats
 
-    if points:
-        client.upsert(collection_name=COLLECTION_NAME, points=points)
-        logger.info(f"Upsert final ({len(points)}) OK")
 
-    logger.info(f"INGEST FINALIZADO — {len(final_records)} chunks inseridos.")
+def main():
+    base = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "..", "webscraper"))
 
+    parser = argparse.ArgumentParser(description="Ingestão dos documentos coletados no Qdrant.")
+    parser.add_argument(
+        "paths",
+        nargs="*",
+        default=[os.path.join(base, "deg.json"), os.path.join(base, "unb_data.json")],
+        help="Arquivos .json ou .jsonl, opcionalmente comprimidos (.gz, .bz2, .xz, .zst).",
+    )
+    parser.add_argument(
+        "--recreate",
+        action="store_true",
+        help="Apaga e recria a coleção, reprocessando todos os chunks.",
+    )
+    args = parser.parse_args()
 
-def main():
     logging.basicConfig(level=logging.INFO)
 
-    embedder = get_embedder()
-
-    base = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "..", "webscraper"))
-    possible_files = [
-        os.path.join(base, "deg.json"),
-        os.path.join(base, "unb_data.json"),
-    ]
-
-    docs = []
-    for p in possible_files:
-        if os.path.exists(p):
-            with open(p, "r", encoding="utf-8") as f:
-                docs.extend(json.load(f))
-
-    if not docs:
+    if not any(os.path.exists(p) for p in args.paths):
         logger.error("Nenhum documento encontrado.")
         return
 
-    ingest(docs, embedder=embedder, recreate=True)
+    embedder = get_embedder()
+
+    # Os documentos são lidos em streaming e consumidos pelo pipeline conforme
+    # os lotes são embedados, sem carregar o corpus inteiro em memória.
+    ingest(iter_documents(args.paths), embedder=embedder, recreate=args.recreate)
 
 
 if __name__ == "__main__":
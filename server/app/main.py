@@ -1,18 +1,65 @@
 import os
+import json
+import asyncio
+import logging
 import uvicorn
-from fastapi import FastAPI, Depends
+from contextlib import asynccontextmanager
+from datetime import date
+from fastapi import FastAPI, Depends, HTTPException, Query, status
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, ConfigDict
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Dict, Any
 
 from app.services.rag import RAGService
-from app.dependencies import get_embedder, get_rag_service
-from app.ingest import ingest
+from app.dependencies import (
+    get_answer_cache,
+    get_coalescer,
+    get_context_packer,
+    get_embedder,
+    get_embedding_rate_limiter,
+    get_ingest_jobs,
+    get_llm_rate_limiter,
+    get_qdrant_clients,
+    get_query_cache,
+    get_rag_service,
+    get_vector_store,
+)
 from app.config import get_settings
-from app.services.embedder.base import Embedder
+from app.services.answer_cache import SemanticAnswerCache
+from app.services.context_packer import ContextPacker
+from app.services.ingest_jobs import IngestJobManager
+from app.services.metrics import REGISTRY
+from app.services.rate_limit import Priority, TokenBucketScheduler, priority
+from app.services.vector_store.base import SearchFilter
+
+logger = logging.getLogger(__name__)
 
 settings = get_settings()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Abre o pool de conexões e verifica a coleção antes do primeiro request;
+    # se o Qdrant ainda não estiver de pé, isso fica para a primeira consulta.
+    if settings.vector_store_backend == "qdrant":
+        try:
+            clients = get_qdrant_clients()
+            get_vector_store(embedder=get_embedder(), query_cache=get_query_cache())
+            await clients.awarmup()
+        except Exception as e:
+            logger.error(f"Não foi possível preparar a conexão com o Qdrant: {e}")
+
+    yield
+
+    # Jobs na fila são descartados; os que estão rodando terminam antes de
+    # as conexões com o Qdrant serem fechadas.
+    if get_ingest_jobs.cache_info().currsize:
+        await asyncio.to_thread(get_ingest_jobs().shutdown, wait=True, cancel_queued=True)
+    if get_qdrant_clients.cache_info().currsize:
+        await get_qdrant_clients().aclose()
+
+
 app = FastAPI(
     title="ChiquinhoAI API",
     version="1.0.0",
@@ -21,9 +68,14 @@ app = FastAPI(
 
 **Endpoints principais**:
 - `/response`: Gera uma resposta contextualizada usando RAG (Retriever-Augmented Generation)
-- `/ingest`: Insere novos documentos no vetor store (Qdrant)
+- `/response/stream`: Mesma resposta, enviada token a token via Server-Sent Events
+- `/response/batch`: Responde várias perguntas numa única requisição
+- `/ingest`: Enfileira a inserção de novos documentos no vetor store (Qdrant)
+- `/ingest/{job_id}`: Consulta o progresso de um job de ingestão
+- `/metrics`: Latência por etapa, tokens, caches e ingestão (formato Prometheus)
 """,
-    debug=settings.debug
+    debug=settings.debug,
+    lifespan=lifespan,
 )
 
 
@@ -71,28 +123,260 @@ class ResponseOutput(BaseModel):
     )
 
 
+def search_filters(
+    fonte: List[str] | None = Query(None, description="Restringe a busca a estas fontes (ex.: deg.unb.br)."),
+    data_inicio: date | None = Query(None, description="Só documentos publicados a partir desta data."),
+    data_fim: date | None = Query(None, description="Só documentos publicados até esta data."),
+) -> SearchFilter | None:
+    if data_inicio and data_fim and data_inicio > data_fim:
+        raise HTTPException(status_code=422, detail="data_inicio deve ser anterior a data_fim.")
+    filters = SearchFilter(sources=tuple(fonte or ()), date_from=data_inicio, date_to=data_fim)
+    return filters or None
+
+
 @app.get(
     "/response",
     response_model=ResponseOutput,
     summary="Gerar resposta contextualizada",
-    description="Recebe uma pergunta em linguagem natural e retorna uma resposta baseada nos documentos indexados.",
+    description=(
+        "Recebe uma pergunta em linguagem natural e retorna uma resposta baseada nos documentos indexados. "
+        "Os filtros opcionais `fonte`, `data_inicio` e `data_fim` restringem os documentos consultados."
+    ),
 )
-def get_response(pergunta: str, rag: RAGService = Depends(get_rag_service)):
-    resposta = rag.generate_answer(pergunta)
+async def get_response(
+    pergunta: str,
+    filters: SearchFilter | None = Depends(search_filters),
+    rag: RAGService = Depends(get_rag_service),
+):
+    resposta = await rag.agenerate_answer(pergunta, filters)
     return {"resposta": resposta}
 
 
+class BatchQuestionsInput(BaseModel):
+    perguntas: List[str] = Field(min_length=1)
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {"perguntas": ["O que é monitoria?", "Quando começa o semestre?"]}
+        }
+    )
+
+
+class BatchAnswerOutput(BaseModel):
+    pergunta: str
+    resposta: str | None
+    cache: bool
+    tempo_llm_ms: float
+    erro: str | None = None
+
+
+class BatchResponseOutput(BaseModel):
+    respostas: List[BatchAnswerOutput]
+    tempos_ms: Dict[str, float]
+
+
+@app.post(
+    "/response/batch",
+    response_model=BatchResponseOutput,
+    summary="Gerar respostas em lote",
+    description=(
+        "Responde várias perguntas numa requisição: os embeddings e a busca são feitos em lote e "
+        "as chamadas ao LLM rodam com concorrência limitada. Retorna a resposta e o tempo de LLM de "
+        "cada pergunta, além dos tempos de cada etapa do lote. Aceita os mesmos filtros de `/response`."
+    ),
+)
+async def batch_response(
+    body: BatchQuestionsInput,
+    filters: SearchFilter | None = Depends(search_filters),
+    rag: RAGService = Depends(get_rag_service),
+):
+    if len(body.perguntas) > settings.batch_max_questions:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Máximo de {settings.batch_max_questions} perguntas por lote.",
+        )
+
+    with priority(Priority.BATCH):
+        result = await rag.abatch_answers(body.perguntas, filters, concurrency=settings.batch_llm_concurrency)
+    return {
+        "respostas": [
+            {
+                "pergunta": a.query,
+                "resposta": a.answer,
+                "cache": a.cached,
+                "tempo_llm_ms": round(a.llm_ms, 1),
+                "erro": a.error,
+            }
+            for a in result.answers
+        ],
+        "tempos_ms": {stage: round(ms, 1) for stage, ms in result.timings_ms.items()},
+    }
+
+
+def sse_event(data: dict, event: str | None = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.get(
+    "/response/stream",
+    summary="Gerar resposta contextualizada em streaming",
+    description=(
+        "Igual a `/response`, mas envia a resposta em pedaços via Server-Sent Events. "
+        "Cada evento `message` traz `{\"delta\": ...}`; o evento `done` traz a resposta completa "
+        "e o evento `error` sinaliza falha no meio da geração."
+    ),
+    response_class=StreamingResponse,
+)
+async def stream_response(
+    pergunta: str,
+    filters: SearchFilter | None = Depends(search_filters),
+    rag: RAGService = Depends(get_rag_service),
+):
+    async def events():
+        parts = []
+        try:
+            async for chunk in rag.astream_answer(pergunta, filters):
+                parts.append(chunk)
+                yield sse_event({"delta": chunk})
+        except Exception as e:
+            logger.error(f"Erro durante o streaming da resposta: {e}")
+            yield sse_event({"erro": "Falha ao gerar a resposta."}, event="error")
+            return
+        yield sse_event({"resposta": "".join(parts)}, event="done")
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+class IngestJobAccepted(BaseModel):
+    job_id: str
+    status: str
+    count: int
+
+
 @app.post(
     "/ingest",
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=IngestJobAccepted,
     summary="Inserir documentos no Qdrant",
-    description="Realiza a ingestão de uma lista de documentos no vetor store (Qdrant), gerando embeddings e salvando os metadados.",
+    description=(
+        "Enfileira a ingestão de uma lista de documentos no vetor store (Qdrant). "
+        "A resposta traz o `job_id`, usado para acompanhar o progresso em `/ingest/{job_id}`."
+    ),
 )
 async def ingest_docs(
     docs: List[Document],
-    embedder: Embedder = Depends(get_embedder)  # injeta o embedder
+    jobs: IngestJobManager = Depends(get_ingest_jobs),
 ):
-    ingest([doc.model_dump() for doc in docs], embedder=embedder, recreate=False)
-    return {"status": "ok", "count": len(docs)}
+    job = jobs.submit([doc.model_dump() for doc in docs])
+    return {"job_id": job.id, "status": job.status.value, "count": len(docs)}
+
+
+@app.get(
+    "/ingest/{job_id}",
+    summary="Consultar job de ingestão",
+    description="Retorna o status, o progresso (chunks processados, inalterados e com falha) e os erros de um job de ingestão.",
+)
+def get_ingest_job(job_id: str, jobs: IngestJobManager = Depends(get_ingest_jobs)):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job de ingestão não encontrado.")
+    return job.to_dict()
+
+
+@app.get(
+    "/cache/stats",
+    summary="Estatísticas do cache de respostas",
+    description="Retorna acertos, falhas e ocupação do cache semântico de respostas.",
+)
+def cache_stats(answer_cache: SemanticAnswerCache | None = Depends(get_answer_cache)):
+    if answer_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **answer_cache.stats()}
+
+
+@app.get(
+    "/rate-limit/stats",
+    summary="Estatísticas do rate limit do Gemini",
+    description=(
+        "Retorna, para o LLM e para o embedder, os tokens disponíveis e, por prioridade "
+        "(interactive, batch, bulk), as chamadas na fila, liberadas, que esperaram e o tempo de espera."
+    ),
+)
+def rate_limit_stats(
+    llm_limiter: TokenBucketScheduler = Depends(get_llm_rate_limiter),
+    embedding_limiter: TokenBucketScheduler = Depends(get_embedding_rate_limiter),
+):
+    return {"llm": llm_limiter.stats(), "embedder": embedding_limiter.stats()}
+
+
+@app.get(
+    "/context/stats",
+    summary="Estatísticas do empacotamento de contexto",
+    description="Retorna candidatos, duplicatas removidas, chunks unidos e tokens economizados no prompt.",
+)
+def context_stats(packer: ContextPacker | None = Depends(get_context_packer)):
+    if packer is None:
+        return {"enabled": False}
+    return {"enabled": True, **packer.stats()}
+
+
+def component_stats():
+    """
+    Estatísticas dos caches, do empacotamento de contexto e da coalescência,
+    lidas só no momento da coleta. Componentes ainda não criados são ignorados.
+    """
+    answer_cache = get_answer_cache() if get_answer_cache.cache_info().currsize else None
+    if answer_cache is not None:
+        stats = answer_cache.stats()
+        yield "chiquinho_answer_cache_hits_total", "counter", "Acertos do cache de respostas.", {}, stats["hits"]
+        yield "chiquinho_answer_cache_misses_total", "counter", "Falhas do cache de respostas.", {}, stats["misses"]
+        yield "chiquinho_answer_cache_hit_ratio", "gauge", "Taxa de acerto do cache de respostas.", {}, stats["hit_rate"]
+        yield "chiquinho_answer_cache_entries", "gauge", "Respostas no cache.", {}, stats["entries"]
+
+    query_cache = get_query_cache() if get_query_cache.cache_info().currsize else None
+    if query_cache is not None:
+        stats = query_cache.stats()
+        for tier in ("memory", "disk"):
+            yield (
+                "chiquinho_embedding_cache_hits_total", "counter", "Acertos do cache de embeddings de consulta.",
+                {"tier": tier}, stats[f"{tier}_hits"],
+            )
+        yield "chiquinho_embedding_cache_misses_total", "counter", "Falhas do cache de embeddings de consulta.", {}, stats["misses"]
+        yield "chiquinho_embedding_cache_hit_ratio", "gauge", "Taxa de acerto do cache de embeddings.", {}, stats["hit_rate"]
+
+    packer = get_context_packer() if get_context_packer.cache_info().currsize else None
+    if packer is not None:
+        stats = packer.stats()
+        yield "chiquinho_context_saved_tokens_total", "counter", "Tokens removidos do prompt pelo empacotamento.", {}, stats["saved_tokens"]
+        yield "chiquinho_context_duplicates_total", "counter", "Chunks quase duplicados descartados.", {}, stats["duplicates_removed"]
+
+    coalescer = get_coalescer() if get_coalescer.cache_info().currsize else None
+    if coalescer is not None:
+        stats = coalescer.stats()
+        yield "chiquinho_coalesced_requests_total", "counter", "Perguntas que esperaram uma execução idêntica em voo.", {}, stats["coalesced"]
+        yield "chiquinho_coalescing_leaders_total", "counter", "Execuções do pipeline iniciadas com coalescência ligada.", {}, stats["leaders"]
+        yield "chiquinho_coalescing_in_flight", "gauge", "Execuções distintas em voo.", {}, stats["in_flight"]
+
+
+REGISTRY.add_collector(component_stats)
+
+
+@app.get(
+    "/metrics",
+    summary="Métricas no formato Prometheus",
+    description=(
+        "Histogramas de latência por etapa (embed, search, prompt, llm...), tokens de prompt e de resposta, "
+        "acertos dos caches e vazão da ingestão, no formato texto do Prometheus."
+    ),
+    response_class=PlainTextResponse,
+)
+def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 if __name__ == "__main__":
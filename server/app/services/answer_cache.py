@@ -0,0 +1,174 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List
+
+import numpy as np
+
+from app.services.collection_stamp import CollectionStamp
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Entry:
+    answer: str
+    expires_at: float
+    nbytes: int
+
+
+class SemanticAnswerCache:
+    """
+    Cache de respostas indexado pelo embedding da pergunta.
+
+    Uma pergunta nova reaproveita a resposta de uma pergunta anterior quando a
+    similaridade de cosseno entre os embeddings é >= `threshold`. Os vetores
+    ficam normalizados numa matriz pré-alocada, de modo que a busca é um único
+    produto matriz-vetor. A remoção é LRU, limitada por número de entradas e
+    por bytes, e cada entrada expira após `ttl_seconds`.
+
+    Com um `stamp`, o cache também é invalidado quando outro processo (o
+    ingest pela linha de comando, outro worker) altera a coleção.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.97,
+        max_entries: int = 1000,
+        ttl_seconds: float = 3600,
+        max_bytes: int = 32 * 1024 * 1024,
+        stamp: CollectionStamp | None = None,
+    ):
+        self.threshold = threshold
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.stamp = stamp
+        self._stamp_version = stamp.current() if stamp is not None else None
+
+        self._lock = threading.Lock()
+        self._matrix: np.ndarray | None = None
+        self._valid = np.zeros(self.max_entries, dtype=bool)
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._free: List[int] = list(range(self.max_entries - 1, -1, -1))
+        self._bytes = 0
+
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> np.ndarray | None:
+        vec = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        if vec.ndim != 1 or not norm:
+            return None
+        return vec / norm
+
+    def lookup(self, vector: List[float]) -> str | None:
+        self._sync_stamp()
+        vec = self._normalize(vector)
+
+        with self._lock:
+            if vec is None or self._matrix is None or vec.shape[0] != self._matrix.shape[1] or not self._entries:
+                self.misses += 1
+                return None
+
+            sims = self._matrix @ vec
+            sims[~self._valid] = -np.inf
+            now = time.monotonic()
+
+            # Entradas expiradas acima do limiar são removidas no caminho e a
+            # busca segue para a próxima mais parecida.
+            while True:
+                slot = int(np.argmax(sims))
+                if sims[slot] < self.threshold:
+                    break
+                entry = self._entries[slot]
+                if entry.expires_at > now:
+                    self._entries.move_to_end(slot)
+                    self.hits += 1
+                    return entry.answer
+                self._evict(slot)
+                sims[slot] = -np.inf
+
+            self.misses += 1
+            return None
+
+    def store(self, vector: List[float], answer: str, generation: int | None = None):
+        """
+        Guarda uma resposta. Se `generation` for informado e o cache tiver sido
+        invalidado desde então, a resposta (calculada com dados antigos) é
+        descartada.
+        """
+        self._sync_stamp()
+        vec = self._normalize(vector)
+        if vec is None:
+            return
+
+        nbytes = vec.nbytes + len(answer.encode("utf-8"))
+        if nbytes > self.max_bytes:
+            return
+
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+
+            if self._matrix is None or self._matrix.shape[1] != vec.shape[0]:
+                self._reset(dim=vec.shape[0])
+
+            while self._entries and (not self._free or self._bytes + nbytes > self.max_bytes):
+                oldest = next(iter(self._entries))
+                self._evict(oldest)
+
+            slot = self._free.pop()
+            self._matrix[slot] = vec
+            self._valid[slot] = True
+            self._entries[slot] = _Entry(answer, time.monotonic() + self.ttl_seconds, nbytes)
+            self._bytes += nbytes
+
+    def invalidate(self):
+        """Descarta todas as respostas (ex.: após mudança na coleção)."""
+        with self._lock:
+            dim = self._matrix.shape[1] if self._matrix is not None else None
+            self._reset(dim)
+            self.generation += 1
+        logger.info("Cache de respostas invalidado.")
+
+    def _sync_stamp(self):
+        if self.stamp is None:
+            return
+        version = self.stamp.current()
+        if version != self._stamp_version:
+            self._stamp_version = version
+            self.invalidate()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+                "generation": self.generation,
+            }
+
+    def _evict(self, slot: int):
+        entry = self._entries.pop(slot)
+        self._valid[slot] = False
+        self._free.append(slot)
+        self._bytes -= entry.nbytes
+        self.evictions += 1
+
+    def _reset(self, dim: int | None):
+        self._matrix = np.zeros((self.max_entries, dim), dtype=np.float32) if dim else None
+        self._valid[:] = False
+        self._entries.clear()
+        self._free = list(range(self.max_entries - 1, -1, -1))
+        self._bytes = 0
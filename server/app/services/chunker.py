@@ -0,0 +1,117 @@
+import re
+from typing import Callable, Iterator, List, Tuple
+
+# Aproximação de tokens sem depender de um tokenizer: palavras e sinais de
+# pontuação contam um token cada.
+_TOKEN = re.compile(r"\w+|[^\w\s]")
+
+# Fim de frase: pontuação final (com aspas e parênteses de fechamento, que
+# ficam na frase) seguida de espaço e de algo que inicia frase.
+_SENTENCE_END = re.compile(r"(?<=[.!?…])([\"')\]]*)\s+(?=[\"'(\[]?[A-ZÀ-Ú0-9•\-–])")
+
+# Abreviações comuns nos textos da UnB que não terminam frase.
+_ABBREVIATIONS = frozenset({
+    "art", "arts", "inc", "n", "nº", "no", "nos", "prof", "profa", "dr", "dra", "sr", "sra",
+    "p", "pág", "ex", "etc", "obs", "av", "tel", "min", "máx", "mín", "cap", "res", "fig",
+})
+
+_PARAGRAPH = re.compile(r"\n\s*\n")
+_WORD_BOUNDARY = re.compile(r"\S+\s*")
+
+
+def approx_tokens(text: str) -> int:
+    return len(_TOKEN.findall(text))
+
+
+def iter_sentences(text: str) -> Iterator[Tuple[str, str]]:
+    """
+    Gera (separador, frase) respeitando parágrafos e quebras de linha.
+    O separador é o que deve precedê-la ao remontar o texto: "\\n\\n", "\\n" ou " ".
+    """
+    first = True
+    for paragraph in _PARAGRAPH.split(text):
+        lines = [line.strip() for line in paragraph.split("\n")]
+        lines = [line for line in lines if line]
+        for line_idx, line in enumerate(lines):
+            sep = "\n\n" if line_idx == 0 else "\n"
+            start = 0
+            for match in _SENTENCE_END.finditer(line):
+                last_word = line[:match.start()].rsplit(None, 1)[-1].rstrip(".").lower()
+                if last_word in _ABBREVIATIONS:
+                    continue
+                yield ("" if first else sep), line[start:match.end(1)].strip()
+                first, sep = False, " "
+                start = match.end()
+            tail = line[start:].strip()
+            if tail:
+                yield ("" if first else sep), tail
+                first = False
+
+
+def _split_long(sentence: str, max_tokens: int, count_tokens: Callable[[str], int]) -> Iterator[str]:
+    """Quebra uma frase maior que o limite em fronteiras de palavra."""
+    piece, piece_tokens = [], 0
+    for match in _WORD_BOUNDARY.finditer(sentence):
+        word = match.group()
+        tokens = count_tokens(word)
+        if piece and piece_tokens + tokens > max_tokens:
+            yield "".join(piece).strip()
+            piece, piece_tokens = [], 0
+        piece.append(word)
+        piece_tokens += tokens
+    if piece:
+        yield "".join(piece).strip()
+
+
+def iter_chunks(
+    text: str,
+    max_tokens: int = 350,
+    overlap_tokens: int = 40,
+    count_tokens: Callable[[str], int] = approx_tokens,
+) -> Iterator[str]:
+    """
+    Divide `text` em chunks de até `max_tokens` tokens sem cortar frases.
+
+    Frases são acumuladas até o limite; cada novo chunk começa repetindo as
+    últimas frases do anterior, até `overlap_tokens` tokens. Só frases maiores
+    que o limite são quebradas, e mesmo assim entre palavras. `count_tokens`
+    permite usar o tokenizer real do modelo no lugar da aproximação.
+    """
+    max_tokens = max(1, max_tokens)
+    overlap_tokens = max(0, min(overlap_tokens, max_tokens // 2))
+
+    current: List[Tuple[str, str, int]] = []
+    current_tokens = 0
+    fresh = False  # se o chunk atual tem algo além da sobreposição
+
+    def render(units):
+        return "".join(sep + sentence for sep, sentence, _ in units).strip()
+
+    for sep, sentence in iter_sentences(text):
+        tokens = count_tokens(sentence)
+        pieces = [(sep, sentence, tokens)]
+        if tokens > max_tokens:
+            pieces = [
+                (sep if i == 0 else " ", part, count_tokens(part))
+                for i, part in enumerate(_split_long(sentence, max_tokens, count_tokens))
+            ]
+
+        for unit in pieces:
+            if current and current_tokens + unit[2] > max_tokens:
+                if fresh:
+                    yield render(current)
+
+                overlap, overlap_size = [], 0
+                for prev in reversed(current):
+                    if overlap_size + prev[2] > overlap_tokens or overlap_size + prev[2] + unit[2] > max_tokens:
+                        break
+                    overlap.insert(0, prev)
+                    overlap_size += prev[2]
+                current, current_tokens, fresh = overlap, overlap_size, False
+
+            current.append(unit)
+            current_tokens += unit[2]
+            fresh = True
+
+    if current and fresh:
+        yield render(current)
@@ -0,0 +1,60 @@
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class CollectionStamp:
+    """
+    Versão da coleção compartilhada entre processos (workers do uvicorn, o
+    ingest pela linha de comando) num arquivo pequeno: quem altera a coleção
+    chama `bump()` e quem guarda dados derivados dela compara `current()`
+    com a última versão vista.
+
+    `current()` consulta o arquivo no máximo a cada `check_interval` segundos
+    e só relê o conteúdo quando o mtime muda.
+    """
+
+    def __init__(self, path: str, check_interval: float = 1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._checked_at = float("-inf")
+        self._mtime_ns: int | None = None
+        self._version: str | None = None
+
+    def bump(self) -> str:
+        version = f"{time.time_ns()}-{os.getpid()}"
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(version)
+        os.replace(tmp, self.path)
+        logger.info(f"Versão da coleção atualizada: {version}")
+        return version
+
+    def current(self) -> str | None:
+        with self._lock:
+            now = time.monotonic()
+            if now - self._checked_at < self.check_interval:
+                return self._version
+            self._checked_at = now
+
+            try:
+                mtime_ns = os.stat(self.path).st_mtime_ns
+            except FileNotFoundError:
+                self._mtime_ns = self._version = None
+                return None
+            if mtime_ns != self._mtime_ns:
+                try:
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        self._version = f.read().strip() or None
+                except OSError as e:
+                    logger.warning(f"Não foi possível ler a versão da coleção em {self.path}: {e}")
+                    return self._version
+                self._mtime_ns = mtime_ns
+            return self._version
@@ -0,0 +1,209 @@
+import logging
+import threading
+import zlib
+from dataclasses import asdict, dataclass
+from typing import Callable, List
+
+import numpy as np
+
+from app.services.chunker import approx_tokens
+from app.services.retrieval.bm25 import tokenize
+from app.services.vector_store.base import SearchHit
+
+logger = logging.getLogger(__name__)
+
+# Dimensão dos vetores de termos (feature hashing) usados quando os hits não
+# trazem o embedding.
+HASH_DIM = 4096
+
+# Maior sobreposição procurada ao juntar chunks vizinhos (o chunker repete
+# frases do fim de um chunk no começo do seguinte).
+MAX_OVERLAP_CHARS = 2000
+
+
+@dataclass
+class PackStats:
+    """Contadores acumulados do empacotamento de contexto."""
+    questions: int = 0
+    candidates: int = 0
+    duplicates_removed: int = 0
+    chunks_merged: int = 0
+    chunks_over_budget: int = 0
+    input_tokens: int = 0
+    packed_tokens: int = 0
+    saved_tokens: int = 0
+
+
+def _hashed_vectors(texts: List[str]) -> np.ndarray:
+    matrix = np.zeros((len(texts), HASH_DIM), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for token in tokenize(text):
+            matrix[row, zlib.crc32(token.encode("utf-8")) % HASH_DIM] += 1.0
+    return matrix
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    return matrix / np.clip(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12, None)
+
+
+def _merge_texts(first: str, second: str) -> str:
+    """Junta dois chunks consecutivos removendo o trecho repetido entre eles."""
+    for size in range(min(len(first), len(second), MAX_OVERLAP_CHARS), 0, -1):
+        if first.endswith(second[:size]):
+            return first + second[size:]
+    return f"{first}\n{second}"
+
+
+class ContextPacker:
+    """
+    Monta o contexto do prompt a partir dos candidatos da busca:
+
+    1. remove quase-duplicatas (similaridade >= `dedup_threshold`);
+    2. ordena por MMR, equilibrando relevância e diversidade (`mmr_lambda`);
+    3. junta chunks vizinhos do mesmo documento num trecho contínuo;
+    4. inclui trechos até `token_budget` tokens.
+
+    A similaridade entre chunks usa os embeddings dos hits (os vector stores
+    os devolvem com `with_vectors=True`, ligado junto com o empacotamento) e,
+    quando algum hit vem sem embedding, vetores de termos com feature hashing.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = 1500,
+        candidates: int = 12,
+        mmr_lambda: float = 0.7,
+        dedup_threshold: float = 0.92,
+        count_tokens: Callable[[str], int] = approx_tokens,
+    ):
+        self.token_budget = token_budget
+        self.candidates = candidates
+        self.mmr_lambda = mmr_lambda
+        self.dedup_threshold = dedup_threshold
+        self.count_tokens = count_tokens
+
+        self._lock = threading.Lock()
+        self._stats = PackStats()
+
+    def pack(self, hits: List[SearchHit]) -> List[str]:
+        hits = [hit for hit in hits if hit.text]
+        if not hits:
+            return []
+
+        texts = [hit.text for hit in hits]
+        tokens = np.array([self.count_tokens(t) for t in texts])
+        similarity = self._similarity(hits, texts)
+
+        keep = self._deduplicate(similarity)
+        order = self._mmr(hits, similarity, keep)
+        blocks, merged = self._merge_adjacent(hits, order)
+
+        packed, packed_tokens, over_budget = [], 0, 0
+        for block in blocks:
+            rows = block["rows"]
+            size = int(tokens[rows[0]]) if len(rows) == 1 else self.count_tokens(block["text"])
+            if packed and packed_tokens + size > self.token_budget:
+                over_budget += 1
+                continue
+            packed.append(block["text"])
+            packed_tokens += size
+
+        input_tokens = int(tokens.sum())
+        with self._lock:
+            s = self._stats
+            s.questions += 1
+            s.candidates += len(hits)
+            s.duplicates_removed += len(hits) - len(keep)
+            s.chunks_merged += merged
+            s.chunks_over_budget += over_budget
+            s.input_tokens += input_tokens
+            s.packed_tokens += packed_tokens
+            s.saved_tokens += max(0, input_tokens - packed_tokens)
+
+        logger.debug(
+            f"Contexto: {len(hits)} candidatos -> {len(packed)} trechos, "
+            f"{packed_tokens}/{input_tokens} tokens ({input_tokens - packed_tokens} economizados)."
+        )
+        return packed
+
+    def stats(self) -> dict:
+        with self._lock:
+            return asdict(self._stats)
+
+    def _similarity(self, hits: List[SearchHit], texts: List[str]) -> np.ndarray:
+        dims = {len(hit.vector) for hit in hits if hit.vector is not None}
+        if all(hit.vector is not None for hit in hits) and len(dims) == 1:
+            matrix = np.asarray([hit.vector for hit in hits], dtype=np.float32)
+        else:
+            matrix = _hashed_vectors(texts)
+        matrix = _normalize_rows(matrix)
+        return matrix @ matrix.T
+
+    def _deduplicate(self, similarity: np.ndarray) -> List[int]:
+        """Mantém o primeiro (mais relevante) de cada grupo de quase-duplicatas."""
+        keep: List[int] = []
+        for row in range(len(similarity)):
+            if not keep or similarity[row, keep].max() < self.dedup_threshold:
+                keep.append(row)
+        return keep
+
+    def _mmr(self, hits: List[SearchHit], similarity: np.ndarray, rows: List[int]) -> List[int]:
+        rows = np.asarray(rows)
+        scores = np.array([hits[i].score for i in rows], dtype=np.float32)
+        spread = scores.max() - scores.min()
+        # Relevância normalizada para [0, 1]; scores iguais (ou ausentes)
+        # preservam a ordem da busca.
+        if spread > 1e-9:
+            relevance = (scores - scores.min()) / spread
+        else:
+            relevance = np.linspace(1.0, 0.5, len(rows), dtype=np.float32)
+
+        sub = similarity[np.ix_(rows, rows)]
+        selected: List[int] = []
+        max_sim = np.zeros(len(rows), dtype=np.float32)
+        available = np.ones(len(rows), dtype=bool)
+        for _ in range(len(rows)):
+            mmr = self.mmr_lambda * relevance - (1 - self.mmr_lambda) * max_sim
+            mmr[~available] = -np.inf
+            best = int(np.argmax(mmr))
+            selected.append(best)
+            available[best] = False
+            max_sim = np.maximum(max_sim, sub[best])
+        return [int(rows[i]) for i in selected]
+
+    @staticmethod
+    def _merge_adjacent(hits: List[SearchHit], order: List[int]):
+        """Agrupa chunks consecutivos da mesma URL, na posição do melhor deles."""
+        by_position = {}
+        for row in order:
+            payload = hits[row].payload
+            if payload.get("url") is not None and isinstance(payload.get("chunk"), int):
+                by_position[(payload["url"], payload["chunk"])] = row
+
+        blocks, used, merged = [], set(), 0
+        for row in order:
+            if row in used:
+                continue
+            payload = hits[row].payload
+            url, chunk = payload.get("url"), payload.get("chunk")
+            if (url, chunk) not in by_position:
+                blocks.append({"rows": [row], "text": hits[row].text})
+                used.add(row)
+                continue
+
+            start = chunk
+            while (url, start - 1) in by_position and by_position[(url, start - 1)] not in used:
+                start -= 1
+            rows = []
+            position = start
+            while (url, position) in by_position and by_position[(url, position)] not in used:
+                rows.append(by_position[(url, position)])
+                position += 1
+
+            text = hits[rows[0]].text
+            for other in rows[1:]:
+                text = _merge_texts(text, hits[other].text)
+            used.update(rows)
+            merged += len(rows) - 1
+            blocks.append({"rows": rows, "text": text})
+        return blocks, merged
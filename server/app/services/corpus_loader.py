@@ -0,0 +1,126 @@
+import bz2
+import gzip
+import io
+import json
+import logging
+import lzma
+import os
+from typing import IO, Iterable, Iterator
+
+logger = logging.getLogger(__name__)
+
+READ_SIZE = 1 << 20
+
+_decoder = json.JSONDecoder()
+
+
+def _open_text(path: str) -> IO[str]:
+    """Abre o arquivo como texto, descomprimindo conforme a extensão."""
+    lower = path.lower()
+    if lower.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    if lower.endswith(".bz2"):
+        return bz2.open(path, "rt", encoding="utf-8")
+    if lower.endswith(".xz"):
+        return lzma.open(path, "rt", encoding="utf-8")
+    if lower.endswith(".zst"):
+        try:
+            import zstandard
+        except ImportError as e:
+            raise ImportError("Arquivos .zst requerem o pacote opcional 'zstandard'.") from e
+        raw = open(path, "rb")
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(raw, closefd=True), encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+
+def _base_extension(path: str) -> str:
+    root, ext = os.path.splitext(path.lower())
+    if ext in (".gz", ".bz2", ".xz", ".zst"):
+        ext = os.path.splitext(root)[1]
+    return ext
+
+
+def iter_json_lines(stream: IO[str]) -> Iterator[dict]:
+    for line_no, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            logger.warning(f"Linha {line_no} ignorada (JSON inválido): {e}")
+
+
+def iter_json_array(stream: IO[str], read_size: int = READ_SIZE) -> Iterator[dict]:
+    """
+    Lê um array JSON de nível superior elemento a elemento, sem carregar o
+    arquivo inteiro. Um objeto solto no lugar do array também é aceito.
+    """
+    buf = ""
+    pos = 0
+    eof = False
+    started = False
+
+    def fill() -> bool:
+        nonlocal buf, pos, eof
+        chunk = stream.read(read_size)
+        if not chunk:
+            eof = True
+            return False
+        buf = buf[pos:] + chunk
+        pos = 0
+        return True
+
+    while True:
+        while pos < len(buf) and (buf[pos].isspace() or (started and buf[pos] == ",")):
+            pos += 1
+        if pos >= len(buf):
+            if eof or not fill():
+                return
+            continue
+
+        if not started:
+            started = True
+            if buf[pos] == "[":
+                pos += 1
+                continue
+            # Objeto único: decodifica o arquivo restante de uma vez.
+            while fill():
+                pass
+            yield _decoder.raw_decode(buf, pos)[0]
+            return
+
+        if buf[pos] == "]":
+            return
+
+        try:
+            item, end = _decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof or not fill():
+                raise
+            continue
+
+        # Um número no fim do buffer pode estar incompleto.
+        if end == len(buf) and not eof and fill():
+            continue
+
+        yield item
+        pos = end
+
+
+def iter_documents(paths: Iterable[str]) -> Iterator[dict]:
+    """
+    Gera os documentos de arquivos .json (array) ou .jsonl/.ndjson, opcionalmente
+    comprimidos com gzip, bz2, xz ou zstd. Arquivos inexistentes são ignorados.
+    """
+    for path in paths:
+        if not os.path.exists(path):
+            logger.warning(f"Arquivo não encontrado: {path}")
+            continue
+
+        logger.info(f"Lendo documentos de {path}")
+        with _open_text(path) as stream:
+            if _base_extension(path) in (".jsonl", ".ndjson"):
+                yield from iter_json_lines(stream)
+            else:
+                yield from iter_json_array(stream)
@@ -0,0 +1,134 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import zlib
+from typing import Dict, Iterable, List, Tuple
+
+from app.services.vector_store.base import SearchHit
+
+logger = logging.getLogger(__name__)
+
+try:
+    import zstandard
+except ImportError:  # dependência opcional; sem ela os blobs usam zlib
+    zstandard = None
+
+# Primeiro byte de cada blob: codec usado na compressão.
+_ZLIB = b"z"
+_ZSTD = b"s"
+
+MAX_IDS_PER_QUERY = 900
+
+# Campos que continuam no payload do Qdrant: filtros e controle do ingest
+# incremental. O restante (texto, título, resumo...) fica só no document store.
+VECTOR_PAYLOAD_FIELDS = ("source", "published_at", "url", "chunk", "total_chunks", "content_hash")
+
+
+def slim_payload(payload: dict) -> dict:
+    return {key: payload[key] for key in VECTOR_PAYLOAD_FIELDS if key in payload}
+
+
+class DocumentStore:
+    """
+    Armazena o payload completo de cada chunk em SQLite (modo WAL), com o JSON
+    comprimido em zstd (ou zlib, se o pacote zstandard não estiver instalado).
+
+    Com ele, o Qdrant guarda só os vetores e os campos de filtro; o texto dos
+    resultados é buscado aqui em uma única consulta por lote de ids.
+    """
+
+    def __init__(self, path: str, level: int = 3):
+        self.path = path
+        self.level = level
+        self._local = threading.local()
+        self._compressor_local = threading.local()
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS documents (id TEXT PRIMARY KEY, data BLOB NOT NULL)"
+        )
+
+    def put_many(self, items: Iterable[Tuple[str, dict]]):
+        rows = [(str(point_id), self._encode(payload)) for point_id, payload in items]
+        if not rows:
+            return
+        conn = self._connection()
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO documents (id, data) VALUES (?, ?)", rows)
+
+    def get_many(self, ids: List[str]) -> Dict[str, dict]:
+        ids = [str(i) for i in ids]
+        conn = self._connection()
+        documents = {}
+        # Respeita o limite de parâmetros por consulta do SQLite.
+        for start in range(0, len(ids), MAX_IDS_PER_QUERY):
+            batch = ids[start:start + MAX_IDS_PER_QUERY]
+            placeholders = ",".join("?" * len(batch))
+            rows = conn.execute(f"SELECT id, data FROM documents WHERE id IN ({placeholders})", batch)
+            documents.update((point_id, self._decode(data)) for point_id, data in rows)
+        return documents
+
+    def delete(self, ids: Iterable[str]):
+        rows = [(str(i),) for i in ids]
+        if not rows:
+            return
+        conn = self._connection()
+        with conn:
+            conn.executemany("DELETE FROM documents WHERE id = ?", rows)
+
+    def clear(self):
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM documents")
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def hydrate(self, hits: List[SearchHit]) -> List[SearchHit]:
+        """Completa, com uma única consulta, os payloads que vieram sem texto."""
+        missing = [hit.id for hit in hits if "content_text" not in hit.payload]
+        if not missing:
+            return hits
+
+        try:
+            documents = self.get_many(missing)
+        except sqlite3.Error as e:
+            logger.error(f"Erro ao ler o document store: {e}")
+            return hits
+
+        for hit in hits:
+            document = documents.get(hit.id)
+            if document is not None:
+                hit.payload = {**document, **hit.payload}
+        return hits
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _encode(self, payload: dict) -> bytes:
+        raw = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        if zstandard is not None:
+            # Os (de)compressores do zstandard não são thread-safe.
+            compressor = getattr(self._compressor_local, "compressor", None)
+            if compressor is None:
+                compressor = self._compressor_local.compressor = zstandard.ZstdCompressor(level=self.level)
+            return _ZSTD + compressor.compress(raw)
+        return _ZLIB + zlib.compress(raw, min(self.level * 2, 9))
+
+    def _decode(self, data: bytes) -> dict:
+        codec, body = data[:1], data[1:]
+        if codec == _ZSTD:
+            if zstandard is None:
+                raise RuntimeError("Documento comprimido com zstd, mas o pacote 'zstandard' não está instalado.")
+            raw = zstandard.ZstdDecompressor().decompress(body)
+        else:
+            raw = zlib.decompress(body)
+        return json.loads(raw)
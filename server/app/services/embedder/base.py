@@ -1,7 +1,54 @@
+import asyncio
+import logging
 from abc import ABC, abstractmethod
 from typing import List
 
+logger = logging.getLogger(__name__)
+
+
 class Embedder(ABC):
+    """Classe base abstrata para qualquer gerador de embeddings."""
+
+    max_batch_size: int = 100
+
+    @property
+    def dimension(self) -> int | None:
+        """Dimensão dos vetores gerados, quando conhecida."""
+        return None
+
     @abstractmethod
     def embed_text(self, text: str) -> List[float]:
         pass
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """
+        Gera embeddings para vários textos.
+
+        O resultado é alinhado com a entrada: a posição i contém o embedding
+        de texts[i], ou uma lista vazia se aquele item falhou. Implementações
+        com suporte a lote devem sobrescrever este método; a padrão chama
+        embed_text item a item.
+        """
+        vectors = []
+        for idx, text in enumerate(texts):
+            try:
+                vec = self.embed_text(text)
+            except Exception as e:
+                logger.error(f"Erro ao gerar embedding do item {idx}: {e}")
+                vec = []
+            vectors.append(vec)
+        return vectors
+
+    async def aembed_text(self, text: str) -> List[float]:
+        """Variante assíncrona. A padrão roda a versão síncrona numa thread."""
+        return await asyncio.to_thread(self.embed_text, text)
+
+    async def aembed_texts(self, texts: List[str]) -> List[List[float]]:
+        return await asyncio.to_thread(self.embed_texts, texts)
+
+
+def iter_batches(items: List, size: int):
+    """Divide uma lista em fatias de no máximo `size` itens."""
+    size = max(1, size)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
@@ -0,0 +1,230 @@
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(text: str) -> str:
+    """Normaliza uma pergunta para uso como chave (Unicode, caixa e espaços)."""
+    text = unicodedata.normalize("NFC", text)
+    return _WHITESPACE.sub(" ", text).strip().casefold()
+
+
+class EmbeddingCache:
+    """
+    Cache de embeddings de consulta em dois níveis.
+
+    O primeiro nível é um LRU em memória com no máximo `max_entries` vetores.
+    Se `path` for informado, um segundo nível em SQLite (modo WAL) guarda os
+    vetores em disco: as entradas sobrevivem a reinícios e são compartilhadas
+    entre os workers do uvicorn que apontam para o mesmo arquivo.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        path: str | None = None,
+        max_disk_entries: int = 200000,
+    ):
+        self.max_entries = max(1, max_entries)
+        self.path = path
+        self.max_disk_entries = max_disk_entries
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._local = threading.local()
+        self._puts_since_prune = 0
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if self.path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with self._connection() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings ("
+                    " key TEXT PRIMARY KEY,"
+                    " vector BLOB NOT NULL,"
+                    " created_at REAL NOT NULL)"
+                )
+
+    @staticmethod
+    def make_key(model_name: str, text: str) -> str:
+        raw = f"{model_name}\0{normalize_query(text)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, model_name: str, text: str) -> List[float] | None:
+        key = self.make_key(model_name, text)
+        vector = self._memory_get(key)
+        if vector is not None:
+            return vector
+        return self._disk_result(key, self._disk_get(key))
+
+    def put(self, model_name: str, text: str, vector: List[float]):
+        if not vector:
+            return
+        key = self.make_key(model_name, text)
+        vector = list(vector)
+        with self._lock:
+            self._memory_put(key, vector)
+        self._disk_put(key, vector)
+
+    # Variantes assíncronas: o nível em memória é consultado direto no event
+    # loop; o SQLite (que pode esperar pelo lock do arquivo quando vários
+    # workers o compartilham) roda numa thread.
+
+    async def aget(self, model_name: str, text: str) -> List[float] | None:
+        return (await self.aget_many(model_name, [text]))[0]
+
+    async def aget_many(self, model_name: str, texts: List[str]) -> List[List[float] | None]:
+        keys = [self.make_key(model_name, text) for text in texts]
+        vectors = [self._memory_get(key) for key in keys]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            found = await asyncio.to_thread(self._disk_get_many, [keys[i] for i in missing]) if self.path else {}
+            for i in missing:
+                vectors[i] = self._disk_result(keys[i], found.get(keys[i]))
+        return vectors
+
+    async def aput(self, model_name: str, text: str, vector: List[float]):
+        await self.aput_many(model_name, [(text, vector)])
+
+    async def aput_many(self, model_name: str, items: List[Tuple[str, List[float]]]):
+        entries = [(self.make_key(model_name, text), list(vector)) for text, vector in items if vector]
+        if not entries:
+            return
+        with self._lock:
+            for key, vector in entries:
+                self._memory_put(key, vector)
+        if self.path:
+            await asyncio.to_thread(self._disk_put_many, entries)
+
+    def get_or_embed(
+        self, model_name: str, text: str, embed: Callable[[str], List[float]]
+    ) -> List[float]:
+        vector = self.get(model_name, text)
+        if vector is None:
+            vector = embed(text)
+            self.put(model_name, text, vector)
+        return vector
+
+    async def aget_or_embed(
+        self, model_name: str, text: str, embed: Callable[[str], Awaitable[List[float]]]
+    ) -> List[float]:
+        vector = await self.aget(model_name, text)
+        if vector is None:
+            vector = await embed(text)
+            await self.aput(model_name, text, vector)
+        return vector
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._memory),
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / total if total else 0.0,
+            }
+
+    def _memory_put(self, key: str, vector: List[float]):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 não permite compartilhar conexões entre threads; cada thread
+        # do threadpool mantém a sua.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _memory_get(self, key: str) -> List[float] | None:
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+            return vector
+
+    def _disk_result(self, key: str, vector: List[float] | None) -> List[float] | None:
+        with self._lock:
+            if vector is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._memory_put(key, vector)
+            return vector
+
+    def _disk_get(self, key: str) -> List[float] | None:
+        if not self.path:
+            return None
+        return self._disk_get_many([key]).get(key)
+
+    def _disk_get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        try:
+            conn = self._connection()
+            for start in range(0, len(keys), 500):
+                part = keys[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(part))})", part
+                ).fetchall()
+                found.update((key, np.frombuffer(blob, dtype=np.float32).tolist()) for key, blob in rows)
+        except sqlite3.Error as e:
+            logger.warning(f"Erro ao ler cache de embeddings em disco: {e}")
+        return found
+
+    def _disk_put(self, key: str, vector: List[float]):
+        if not self.path:
+            return
+        self._disk_put_many([(key, vector)])
+
+    def _disk_put_many(self, entries: List[Tuple[str, List[float]]]):
+        now = time.time()
+        rows = [(key, np.asarray(vector, dtype=np.float32).tobytes(), now) for key, vector in entries]
+        try:
+            conn = self._connection()
+            # Uma transação (e um fsync) por lote, não por vetor.
+            conn.execute("BEGIN")
+            try:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector, created_at) VALUES (?, ?, ?)", rows
+                )
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                conn.execute("ROLLBACK")
+                raise
+            with self._lock:
+                self._puts_since_prune += len(rows)
+                prune = self._puts_since_prune >= 1000
+                if prune:
+                    self._puts_since_prune = 0
+            if prune:
+                conn.execute(
+                    "DELETE FROM embeddings WHERE key IN ("
+                    " SELECT key FROM embeddings ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_disk_entries,),
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Erro ao gravar cache de embeddings em disco: {e}")
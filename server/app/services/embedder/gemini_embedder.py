@@ -1,33 +1,132 @@
 import google.generativeai as genai
 import logging
-from app.services.embedder.base import Embedder
+from typing import List
+from app.services.embedder.base import Embedder, iter_batches
+from app.services.resilience import CircuitOpenError, ResiliencePolicy
 
 logger = logging.getLogger(__name__)
 
+KNOWN_DIMENSIONS = {
+    "models/text-embedding-004": 768,
+    "models/embedding-001": 768,
+    "models/gemini-embedding-001": 3072,
+}
+
 class GeminiEmbedder(Embedder):
-    def __init__(self, api_key: str, model_name: str = "models/text-embedding-004"):
+    def __init__(
+        self,
+        api_key: str,
+        model_name: str = "models/text-embedding-004",
+        max_batch_size: int = 100,
+        dimension: int | None = None,
+        policy: ResiliencePolicy | None = None,
+    ):
         genai.configure(api_key=api_key)
         self.model_name = model_name
+        self.max_batch_size = max_batch_size
+        self._dimension = dimension or KNOWN_DIMENSIONS.get(model_name)
+        self.policy = policy or ResiliencePolicy("gemini_embedder")
+
+    @property
+    def dimension(self) -> int | None:
+        if self._dimension is None:
+            self._dimension = len(self.embed_text("dimensão")) or None
+        return self._dimension
+
+    @staticmethod
+    def _extract(result) -> list:
+        emb = result.get("embedding")
+        if isinstance(emb, dict):
+            emb = emb.get("values")
+        return emb
+
+    def _options(self) -> dict:
+        if self.policy.timeout is None:
+            return {}
+        return {"request_options": {"timeout": self.policy.timeout}}
+
+    def _call(self, content):
+        options = self._options()
+        return self.policy.call(lambda: genai.embed_content(model=self.model_name, content=content, **options))
+
+    async def _acall(self, content):
+        options = self._options()
+        return await self.policy.acall(lambda: genai.embed_content_async(model=self.model_name, content=content, **options))
 
     def embed_text(self, text: str) -> list[float]:
         try:
-            result = genai.embed_content(
-                model=self.model_name,
-                content=text
-            )
+            return self._single(self._call(text))
 
-            emb = (
-                result.get("embedding", {}).get("values")
-                if isinstance(result.get("embedding"), dict)
-                else result.get("embedding")
-            )
-
-            if not emb:
-                raise ValueError("Embedding vazio ou inválido")
+        except Exception as e:
+            logger.error(f"Erro ao gerar embedding: {e}")
+            return []
 
-            logger.info(f"Embedding gerado (5 valores): {emb[:5]} ...")
-            return emb
+    async def aembed_text(self, text: str) -> list[float]:
+        try:
+            return self._single(await self._acall(text))
 
         except Exception as e:
             logger.error(f"Erro ao gerar embedding: {e}")
             return []
+
+    def _single(self, result) -> list[float]:
+        emb = self._extract(result)
+
+        if not emb:
+            raise ValueError("Embedding vazio ou inválido")
+
+        logger.info(f"Embedding gerado (5 valores): {emb[:5]} ...")
+        return emb
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        vectors: List[List[float]] = []
+        for offset, batch in enumerate(iter_batches(texts, self.max_batch_size)):
+            vectors.extend(self._embed_batch(batch, offset * self.max_batch_size))
+        return vectors
+
+    async def aembed_texts(self, texts: List[str]) -> List[List[float]]:
+        vectors: List[List[float]] = []
+        for offset, batch in enumerate(iter_batches(texts, self.max_batch_size)):
+            vectors.extend(await self._aembed_batch(batch, offset * self.max_batch_size))
+        return vectors
+
+    def _embed_batch(self, batch: List[str], offset: int) -> List[List[float]]:
+        try:
+            embs = self._batch(self._call(batch), batch)
+        except CircuitOpenError as e:
+            # Item a item também seria recusado; falha o lote de uma vez.
+            logger.error(f"Lote de embeddings ({len(batch)} itens) não enviado: {e}")
+            embs = [[] for _ in batch]
+        except Exception as e:
+            # Um item inválido derruba o lote inteiro na API; refaz item a item
+            # para isolar e reportar apenas os que realmente falharam.
+            logger.warning(f"Falha no lote de embeddings ({len(batch)} itens): {e}. Refazendo item a item.")
+            embs = [self.embed_text(text) for text in batch]
+        return self._report_batch(embs, offset)
+
+    async def _aembed_batch(self, batch: List[str], offset: int) -> List[List[float]]:
+        try:
+            embs = self._batch(await self._acall(batch), batch)
+        except CircuitOpenError as e:
+            logger.error(f"Lote de embeddings ({len(batch)} itens) não enviado: {e}")
+            embs = [[] for _ in batch]
+        except Exception as e:
+            logger.warning(f"Falha no lote de embeddings ({len(batch)} itens): {e}. Refazendo item a item.")
+            embs = [await self.aembed_text(text) for text in batch]
+        return self._report_batch(embs, offset)
+
+    def _batch(self, result, batch: List[str]) -> list:
+        embs = self._extract(result) or []
+        if len(embs) != len(batch):
+            raise ValueError(
+                f"Lote retornou {len(embs)} embeddings para {len(batch)} textos"
+            )
+        return embs
+
+    def _report_batch(self, embs: list, offset: int) -> List[List[float]]:
+        for idx, emb in enumerate(embs):
+            if not emb:
+                logger.error(f"Embedding vazio para o item {offset + idx} do lote.")
+
+        logger.info(f"Lote de {len(embs)} embeddings gerado.")
+        return [list(emb) if emb else [] for emb in embs]
@@ -0,0 +1,38 @@
+from typing import List
+
+from app.services.embedder.base import Embedder
+from app.services.metrics import EMBEDDED_TEXTS, EMBEDDING_SECONDS
+
+
+class InstrumentedEmbedder(Embedder):
+    """Repassa as chamadas ao embedder interno medindo duração e volume."""
+
+    def __init__(self, inner: Embedder):
+        self.inner = inner
+        self.max_batch_size = inner.max_batch_size
+        # Mantém a chave do cache de embeddings igual à do embedder interno.
+        self.model_name = getattr(inner, "model_name", type(inner).__name__)
+
+    @property
+    def dimension(self) -> int | None:
+        return self.inner.dimension
+
+    def embed_text(self, text: str) -> List[float]:
+        EMBEDDED_TEXTS.inc(operation="query")
+        with EMBEDDING_SECONDS.time(operation="query"):
+            return self.inner.embed_text(text)
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        EMBEDDED_TEXTS.inc(len(texts), operation="batch")
+        with EMBEDDING_SECONDS.time(operation="batch"):
+            return self.inner.embed_texts(texts)
+
+    async def aembed_text(self, text: str) -> List[float]:
+        EMBEDDED_TEXTS.inc(operation="query")
+        with EMBEDDING_SECONDS.time(operation="query"):
+            return await self.inner.aembed_text(text)
+
+    async def aembed_texts(self, texts: List[str]) -> List[List[float]]:
+        EMBEDDED_TEXTS.inc(len(texts), operation="batch")
+        with EMBEDDING_SECONDS.time(operation="batch"):
+            return await self.inner.aembed_texts(texts)
@@ -0,0 +1,105 @@
+import logging
+import os
+from typing import List
+
+import numpy as np
+
+from app.services.embedder.base import Embedder, iter_batches
+
+logger = logging.getLogger(__name__)
+
+
+def _import_runtime():
+    try:
+        import onnxruntime
+        from tokenizers import Tokenizer
+    except ImportError as e:
+        raise ImportError(
+            "O embedder local requer os pacotes opcionais 'onnxruntime' e 'tokenizers' "
+            "(pip install onnxruntime tokenizers)."
+        ) from e
+    return onnxruntime, Tokenizer
+
+
+class OnnxEmbedder(Embedder):
+    """
+    Embedder local, só CPU, para modelos sentence-embedding exportados em ONNX
+    (ex.: versões quantizadas int8 do paraphrase-multilingual-MiniLM).
+
+    `model_path` é o arquivo .onnx; o tokenizer é lido de `tokenizer.json` na
+    mesma pasta, salvo se `tokenizer_path` for informado. A inferência é feita
+    em lotes de `max_batch_size` textos, usando `num_threads` threads do
+    onnxruntime por lote.
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        tokenizer_path: str | None = None,
+        max_batch_size: int = 32,
+        num_threads: int | None = None,
+        max_length: int = 256,
+        normalize: bool = True,
+    ):
+        ort, Tokenizer = _import_runtime()
+
+        model_dir = os.path.dirname(os.path.abspath(model_path))
+        self.model_name = f"onnx:{os.path.basename(model_dir)}/{os.path.basename(model_path)}"
+        self.max_batch_size = max_batch_size
+        self.normalize = normalize
+
+        tokenizer_path = tokenizer_path or os.path.join(model_dir, "tokenizer.json")
+        self.tokenizer = Tokenizer.from_file(tokenizer_path)
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = num_threads or os.cpu_count() or 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            model_path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        self._dimension: int | None = None
+        logger.info(f"Embedder local inicializado: {self.model_name} ({options.intra_op_num_threads} threads)")
+
+    @property
+    def dimension(self) -> int:
+        if self._dimension is None:
+            self._dimension = len(self._infer(["dimensão"])[0])
+        return self._dimension
+
+    def embed_text(self, text: str) -> List[float]:
+        return self.embed_texts([text])[0]
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        vectors: List[List[float]] = []
+        for batch in iter_batches(texts, self.max_batch_size):
+            try:
+                vectors.extend(row.tolist() for row in self._infer(batch))
+            except Exception as e:
+                logger.error(f"Erro na inferência local de {len(batch)} textos: {e}")
+                vectors.extend([] for _ in batch)
+        return vectors
+
+    def _infer(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+
+        feeds = {"input_ids": ids, "attention_mask": mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.zeros_like(ids)
+
+        hidden = self.session.run(None, feeds)[0]
+
+        if hidden.ndim == 3:
+            # Mean pooling sobre os tokens válidos (saída last_hidden_state).
+            weights = mask[..., None].astype(np.float32)
+            hidden = (hidden * weights).sum(axis=1) / np.clip(weights.sum(axis=1), 1e-9, None)
+
+        if self.normalize:
+            hidden = hidden / np.clip(np.linalg.norm(hidden, axis=1, keepdims=True), 1e-12, None)
+
+        return hidden.astype(np.float32)
@@ -0,0 +1,149 @@
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from enum import Enum
+from typing import Callable, Dict, List
+
+from app.services.ingest_pipeline import IngestStats
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+@dataclass
+class IngestJob:
+    id: str
+    document_count: int
+    status: JobStatus = JobStatus.QUEUED
+    submitted_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+    error: str | None = None
+    stats: IngestStats = field(default_factory=IngestStats)
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status.value,
+            "documents": self.document_count,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "progress": asdict(self.stats),
+        }
+
+
+# Recebe os documentos e o IngestStats do job, que deve ser atualizado
+# durante a execução para que o progresso fique visível.
+IngestRunner = Callable[[List[dict], IngestStats], IngestStats]
+
+
+class IngestJobManager:
+    """
+    Fila de jobs de ingestão executados em segundo plano.
+
+    No máximo `max_concurrent_jobs` jobs rodam ao mesmo tempo; os demais
+    esperam na fila do executor. Apenas os `max_retained_jobs` jobs mais
+    recentes ficam disponíveis para consulta.
+    """
+
+    def __init__(
+        self,
+        runner: IngestRunner,
+        max_concurrent_jobs: int = 1,
+        max_retained_jobs: int = 200,
+        on_complete: Callable[[IngestJob], None] | None = None,
+    ):
+        self.runner = runner
+        self.max_retained_jobs = max_retained_jobs
+        self.on_complete = on_complete
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, max_concurrent_jobs),
+            thread_name_prefix="ingest-job",
+        )
+        self._jobs: "OrderedDict[str, IngestJob]" = OrderedDict()
+        # job -> future no executor, enquanto o job não termina
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, docs: List[dict]) -> IngestJob:
+        job = IngestJob(id=uuid.uuid4().hex, document_count=len(docs))
+
+        with self._lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.max_retained_jobs:
+                oldest_id, oldest = next(iter(self._jobs.items()))
+                if oldest.status in (JobStatus.QUEUED, JobStatus.RUNNING):
+                    break
+                del self._jobs[oldest_id]
+
+        future = self._executor.submit(self._run, job, docs)
+        with self._lock:
+            self._futures[job.id] = future
+        future.add_done_callback(lambda _: self._forget(job.id))
+        logger.info(f"Job de ingestão {job.id} enfileirado ({len(docs)} documentos).")
+        return job
+
+    def get(self, job_id: str) -> IngestJob | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def shutdown(self, wait: bool = True, cancel_queued: bool = False):
+        """
+        Para de aceitar jobs. Com `cancel_queued`, os que ainda não começaram
+        são descartados e marcados como falhos; os que estão rodando terminam
+        normalmente (com `wait`, espera por eles).
+        """
+        with self._lock:
+            pending = dict(self._futures)
+        self._executor.shutdown(wait=False, cancel_futures=cancel_queued)
+        cancelled = [job_id for job_id, future in pending.items() if future.cancelled()]
+        with self._lock:
+            for job_id in cancelled:
+                job = self._jobs.get(job_id)
+                if job is not None:
+                    job.status = JobStatus.FAILED
+                    job.error = "Cancelado: o servidor foi desligado antes do início do job."
+                    job.finished_at = time.time()
+        if cancelled:
+            logger.warning(f"{len(cancelled)} job(s) de ingestão na fila cancelado(s) no desligamento.")
+        if wait:
+            self._executor.shutdown(wait=True)
+
+    def _forget(self, job_id: str):
+        with self._lock:
+            self._futures.pop(job_id, None)
+
+    def _run(self, job: IngestJob, docs: List[dict]):
+        job.status = JobStatus.RUNNING
+        job.started_at = time.time()
+
+        try:
+            self.runner(docs, job.stats)
+            job.status = JobStatus.COMPLETED
+        except Exception as e:
+            logger.error(f"Job de ingestão {job.id} falhou: {e}", exc_info=True)
+            job.error = str(e)
+            job.status = JobStatus.FAILED
+        finally:
+            job.finished_at = time.time()
+
+        if self.on_complete is not None:
+            try:
+                self.on_complete(job)
+            except Exception as e:
+                logger.error(f"Erro no callback do job {job.id}: {e}")
+
+        logger.info(f"Job de ingestão {job.id} finalizado com status {job.status.value}.")
@@ -0,0 +1,281 @@
+import contextvars
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, PointStruct, VectorParams
+
+from app.services.document_store import DocumentStore, slim_payload
+from app.services.embedder.base import Embedder
+from app.services.vector_store.qdrant import QdrantClients, ensure_payload_indexes
+
+logger = logging.getLogger(__name__)
+
+MAX_REPORTED_ERRORS = 100
+
+
+@dataclass
+class IngestStats:
+    """Contadores de uma execução de ingestão."""
+    total_chunks: int = 0
+    embedded: int = 0
+    upserted: int = 0
+    failed_embeddings: int = 0
+    failed_upserts: int = 0
+    skipped_unchanged: int = 0
+    deleted_stale: int = 0
+    errors: List[str] = field(default_factory=list)
+
+
+def iter_chunked(items: Iterable, size: int) -> Iterator[list]:
+    """Agrupa um iterável qualquer em listas de no máximo `size` itens."""
+    it = iter(items)
+    while batch := list(islice(it, size)):
+        yield batch
+
+
+class IngestPipeline:
+    """
+    Ingestão em estágios sobrepostos: embedding -> upsert.
+
+    Os registros são consumidos em streaming e agrupados em lotes. Cada lote é
+    embedado por um pool de workers e, assim que fica pronto, enviado ao pool
+    de upsert. No máximo `queue_depth` lotes ficam em voo ao mesmo tempo; o
+    produtor bloqueia quando esse limite é atingido (backpressure), então o
+    pico de memória depende da profundidade da fila e não do tamanho do corpus.
+
+    No modo incremental, antes de embedar cada lote os pontos existentes são
+    buscados em bloco pelo id e os chunks cujo `content_hash` não mudou são
+    pulados. Quando um documento encolhe, os chunks que sobraram da versão
+    anterior são removidos.
+
+    `payload_indexes` ({campo: tipo}) são criados junto com a coleção. Com um
+    `document_store`, o payload completo vai para ele e o Qdrant recebe só os
+    campos de filtro e de controle.
+    `on_upsert(points)` e `on_delete(ids)` são chamados depois de cada upsert
+    ou remoção bem-sucedida (ex.: para manter o índice lexical em dia).
+    Com `collections`, a verificação da coleção usa o cache compartilhado com
+    a busca e não é repetida a cada job.
+    """
+
+    def __init__(
+        self,
+        client: QdrantClient,
+        embedder: Embedder,
+        collection_name: str,
+        point_id_fn: Callable[[dict], str],
+        batch_size: int = 64,
+        embed_workers: int = 4,
+        upsert_workers: int = 2,
+        queue_depth: int = 8,
+        recreate: bool = False,
+        incremental: bool = True,
+        on_upsert: Callable[[List[PointStruct]], None] | None = None,
+        on_delete: Callable[[List[str]], None] | None = None,
+        payload_indexes: dict | None = None,
+        document_store: DocumentStore | None = None,
+        collections: QdrantClients | None = None,
+    ):
+        self.client = client
+        self.embedder = embedder
+        self.collection_name = collection_name
+        self.point_id_fn = point_id_fn
+        self.batch_size = max(1, batch_size)
+        self.embed_workers = max(1, embed_workers)
+        self.upsert_workers = max(1, upsert_workers)
+        self.queue_depth = max(1, queue_depth)
+        self.recreate = recreate
+        self.incremental = incremental and not recreate
+        self.on_upsert = on_upsert
+        self.on_delete = on_delete
+        self.payload_indexes = payload_indexes
+        self.document_store = document_store
+        self.collections = collections
+
+        self._collection_ready = False
+        self._lookup_existing = False
+        self._collection_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+    def run(self, records: Iterable[dict], stats: IngestStats | None = None) -> IngestStats:
+        """
+        Executa a ingestão. Um `stats` informado pelo chamador é atualizado
+        durante a execução e pode ser lido por outra thread para acompanhar o
+        progresso.
+        """
+        stats = stats if stats is not None else IngestStats()
+        slots = threading.BoundedSemaphore(self.queue_depth)
+
+        # Sem coleção ainda, não há o que comparar.
+        self._lookup_existing = self.incremental and self._collection_exists()
+
+        # O pool de embedding é encerrado primeiro (with aninhado), garantindo
+        # que todo lote embedado já foi submetido ao pool de upsert.
+        with ThreadPoolExecutor(self.upsert_workers, thread_name_prefix="ingest-upsert") as upsert_pool, \
+                ThreadPoolExecutor(self.embed_workers, thread_name_prefix="ingest-embed") as embed_pool:
+            for batch in iter_chunked(records, self.batch_size):
+                slots.acquire()
+                stats.total_chunks += len(batch)
+                # Cópia do contexto: os workers herdam a prioridade da
+                # ingestão no rate limit das chamadas ao embedder.
+                embed_pool.submit(
+                    contextvars.copy_context().run, self._embed_stage, batch, stats, slots, upsert_pool,
+                )
+
+        return stats
+
+    def _embed_stage(self, batch: List[dict], stats: IngestStats, slots, upsert_pool):
+        handed_off = False
+        # Itens ainda não contabilizados, caso o estágio falhe no meio.
+        pending = len(batch)
+        try:
+            if self._lookup_existing:
+                batch = self._drop_unchanged(batch, stats)
+                if not batch:
+                    return
+
+            try:
+                vectors = self.embedder.embed_texts([rec["text"] for rec in batch])
+            except Exception as e:
+                logger.error(f"Erro ao gerar embeddings do lote: {e}")
+                vectors = [[] for _ in batch]
+
+            points = []
+            for rec, vec in zip(batch, vectors):
+                if not vec:
+                    payload = rec["payload"]
+                    self._record_error(
+                        stats,
+                        "failed_embeddings",
+                        f"Falha ao gerar embedding do chunk {payload.get('chunk')} de {payload.get('url')}",
+                    )
+                    continue
+                points.append(PointStruct(
+                    id=self.point_id_fn(rec),
+                    vector=vec,
+                    payload=rec["payload"],
+                ))
+
+            pending = len(points)
+            if not points:
+                return
+
+            self._ensure_collection(len(points[0].vector))
+            with self._stats_lock:
+                stats.embedded += len(points)
+            upsert_pool.submit(self._upsert_stage, points, stats, slots)
+            handed_off = True
+        except Exception as e:
+            self._record_error(stats, "failed_embeddings", f"Erro no estágio de embedding: {e}", count=pending)
+        finally:
+            if not handed_off:
+                slots.release()
+
+    def _drop_unchanged(self, batch: List[dict], stats: IngestStats) -> List[dict]:
+        ids = [self.point_id_fn(rec) for rec in batch]
+        existing = self.client.retrieve(
+            collection_name=self.collection_name,
+            ids=ids,
+            with_payload=["content_hash", "total_chunks"],
+            with_vectors=False,
+        )
+        stored = {str(point.id): point.payload or {} for point in existing}
+
+        changed = []
+        stale_ids = []
+        for point_id, rec in zip(ids, batch):
+            payload = rec["payload"]
+            previous = stored.get(str(point_id))
+            if previous is None:
+                changed.append(rec)
+                continue
+
+            if payload.get("chunk") == 0:
+                old_total = previous.get("total_chunks") or 0
+                for idx in range(payload.get("total_chunks", 0), old_total):
+                    stale = {"payload": {**payload, "chunk": idx}}
+                    stale_ids.append(self.point_id_fn(stale))
+
+            if previous.get("content_hash") != payload.get("content_hash"):
+                changed.append(rec)
+
+        if stale_ids:
+            self.client.delete(collection_name=self.collection_name, points_selector=stale_ids)
+            if self.document_store is not None:
+                self.document_store.delete(stale_ids)
+            if self.on_delete:
+                self.on_delete(stale_ids)
+
+        with self._stats_lock:
+            stats.skipped_unchanged += len(batch) - len(changed)
+            stats.deleted_stale += len(stale_ids)
+
+        return changed
+
+    def _upsert_stage(self, points: List[PointStruct], stats: IngestStats, slots):
+        try:
+            if self.document_store is None:
+                self.client.upsert(collection_name=self.collection_name, points=points)
+            else:
+                # O texto é gravado antes, para nenhum vetor apontar para um
+                # documento inexistente.
+                self.document_store.put_many((p.id, p.payload) for p in points)
+                self.client.upsert(
+                    collection_name=self.collection_name,
+                    points=[PointStruct(id=p.id, vector=p.vector, payload=slim_payload(p.payload)) for p in points],
+                )
+            with self._stats_lock:
+                stats.upserted += len(points)
+            if self.on_upsert:
+                self.on_upsert(points)
+            logger.info(f"Upsert batch ({len(points)}) OK")
+        except Exception as e:
+            self._record_error(stats, "failed_upserts", f"Erro no upsert de {len(points)} pontos: {e}", count=len(points))
+        finally:
+            slots.release()
+
+    def _ensure_collection(self, vector_size: int):
+        if self._collection_ready:
+            return
+
+        with self._collection_lock:
+            if self._collection_ready:
+                return
+
+            if self.recreate and self._collection_exists():
+                if self.collections is not None:
+                    self.collections.delete_collection(self.collection_name)
+                else:
+                    self.client.delete_collection(self.collection_name)
+                if self.document_store is not None:
+                    self.document_store.clear()
+
+            if self.collections is not None:
+                self.collections.ensure_collection(self.collection_name, vector_size, self.payload_indexes)
+            else:
+                if not self.client.collection_exists(self.collection_name):
+                    self.client.create_collection(
+                        collection_name=self.collection_name,
+                        vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE),
+                    )
+                    logger.info(f"Coleção criada com dimensão={vector_size}")
+                if self.payload_indexes:
+                    ensure_payload_indexes(self.client, self.collection_name, self.payload_indexes)
+
+            self._collection_ready = True
+
+    def _collection_exists(self) -> bool:
+        if self.collections is not None:
+            return self.collections.collection_exists(self.collection_name)
+        return self.client.collection_exists(self.collection_name)
+
+    def _record_error(self, stats: IngestStats, counter: str, message: str, count: int = 1):
+        logger.error(message)
+        with self._stats_lock:
+            setattr(stats, counter, getattr(stats, counter) + count)
+            if len(stats.errors) < MAX_REPORTED_ERRORS:
+                stats.errors.append(message)
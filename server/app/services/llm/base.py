@@ -1,9 +1,25 @@
+import asyncio
 from abc import ABC, abstractmethod
+from typing import AsyncIterator, Iterator
 
 
 class LLM(ABC):
     """Classe base abstrata para qualquer modelo de linguagem (LLM)."""
 
+    # Resposta devolvida quando a geração falha; não deve ser cacheada.
+    error_response: str | None = None
+
     @abstractmethod
     def generate_response(self, prompt: str) -> str:
-        pass
\ No newline at end of file
+        pass
+
+    async def agenerate_response(self, prompt: str) -> str:
+        """Variante assíncrona. A padrão roda a versão síncrona numa thread."""
+        return await asyncio.to_thread(self.generate_response, prompt)
+
+    def stream_response(self, prompt: str) -> Iterator[str]:
+        """Gera a resposta em pedaços. A padrão entrega tudo de uma vez."""
+        yield self.generate_response(prompt)
+
+    async def astream_response(self, prompt: str) -> AsyncIterator[str]:
+        yield await self.agenerate_response(prompt)
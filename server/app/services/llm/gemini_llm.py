@@ -1,20 +1,79 @@
 import google.generativeai as genai
 import logging
+from typing import AsyncIterator, Iterator
 from app.services.llm.base import LLM
+from app.services.resilience import ResiliencePolicy
 
 logger = logging.getLogger(__name__)
 
 
 class GeminiLLM(LLM):
-    def __init__(self, api_key: str, model_name: str = "gemini-flash-latest"):
+    error_response = "Desculpe, ocorreu um erro ao processar sua solicitação."
+
+    def __init__(
+        self,
+        api_key: str,
+        model_name: str = "gemini-flash-latest",
+        policy: ResiliencePolicy | None = None,
+    ):
         genai.configure(api_key=api_key)
         self.model = genai.GenerativeModel(model_name)
+        # Prazo, retentativas, hedge e circuit breaker das chamadas à API.
+        self.policy = policy or ResiliencePolicy("gemini_llm")
         logger.info(f"Serviço LLM inicializado com o modelo: {model_name}")
 
+    def _options(self) -> dict:
+        if self.policy.timeout is None:
+            return {}
+        return {"request_options": {"timeout": self.policy.timeout}}
+
     def generate_response(self, prompt: str) -> str:
         try:
-            response = self.model.generate_content(prompt)
+            response = self.policy.call(lambda: self.model.generate_content(prompt, **self._options()))
+            return response.text
+        except Exception as e:
+            logger.error(f"Erro ao chamar a API Gemini: {e}")
+            return self.error_response
+
+    async def agenerate_response(self, prompt: str) -> str:
+        try:
+            response = await self.policy.acall(lambda: self.model.generate_content_async(prompt, **self._options()))
             return response.text
         except Exception as e:
             logger.error(f"Erro ao chamar a API Gemini: {e}")
-            return "Desculpe, ocorreu um erro ao processar sua solicitação."
+            return self.error_response
+
+    # No stream, prazo e retentativas valem só para abrir a resposta: depois
+    # do primeiro pedaço, repetir duplicaria o texto já enviado.
+
+    def stream_response(self, prompt: str) -> Iterator[str]:
+        sent = False
+        try:
+            response = self.policy.call(lambda: self.model.generate_content(prompt, stream=True, **self._options()))
+            for chunk in response:
+                if chunk.text:
+                    sent = True
+                    yield chunk.text
+        except Exception as e:
+            logger.error(f"Erro ao chamar a API Gemini (stream): {e}")
+            # Sem nada enviado ainda, mantém o comportamento da versão sem
+            # stream; no meio da resposta, propaga para o chamador sinalizar.
+            if sent:
+                raise
+            yield self.error_response
+
+    async def astream_response(self, prompt: str) -> AsyncIterator[str]:
+        sent = False
+        try:
+            response = await self.policy.acall(
+                lambda: self.model.generate_content_async(prompt, stream=True, **self._options())
+            )
+            async for chunk in response:
+                if chunk.text:
+                    sent = True
+                    yield chunk.text
+        except Exception as e:
+            logger.error(f"Erro ao chamar a API Gemini (stream): {e}")
+            if sent:
+                raise
+            yield self.error_response
@@ -0,0 +1,262 @@
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# Métricas no formato texto do Prometheus, sem dependência externa. Cada
+# observação custa um lock e uma busca binária nos buckets.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, description: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}", *self._samples()]
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, labels: Tuple[str, ...] = ()):
+        super().__init__(name, description, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        if not values and not self.labels:
+            values = [((), 0)]
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(v)}" for key, v in values]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labels: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(sorted(buckets))
+        # rótulos -> (contagem por bucket, soma, total)
+        self._series: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return series[2] if series else 0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            series = sorted((key, (list(counts), total, n)) for key, (counts, total, n) in self._series.items())
+
+        lines = []
+        for key, (counts, total, n) in series:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                le = _format_labels(self.labels, key, f'le="{_format_value(float(bound))}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            labels = _format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {n}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Guarda as métricas do processo e gera o texto de `/metrics`. Coletores
+    registrados com `add_collector` produzem amostras na hora da leitura (ex.:
+    estatísticas dos caches), sem custo no caminho das requisições.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, Dict[str, str], float]]]] = []
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, description: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, description, labels))
+
+    def histogram(
+        self,
+        name: str,
+        description: str,
+        labels: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, description, labels, buckets))
+
+    def add_collector(self, collector: Callable[[], Iterable[Tuple[str, str, str, Dict[str, str], float]]]):
+        """
+        `collector()` retorna tuplas (nome, tipo, descrição, rótulos, valor),
+        onde tipo é "counter" ou "gauge".
+        """
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+
+        collected: Dict[str, Tuple[str, str, List[str]]] = {}
+        for collector in collectors:
+            for name, kind, description, labels, value in collector():
+                _, _, samples = collected.setdefault(name, (kind, description, []))
+                samples.append(f"{name}{_format_labels(labels.keys(), labels.values())} {_format_value(value)}")
+        for name, (kind, description, samples) in collected.items():
+            lines.extend([f"# HELP {name} {description}", f"# TYPE {name} {kind}", *samples])
+
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric: _Metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "chiquinho_stage_seconds",
+    "Duração de cada etapa do RAG (embed, search, prompt, llm).",
+    labels=("stage",),
+)
+EMBEDDING_SECONDS = REGISTRY.histogram(
+    "chiquinho_embedding_seconds",
+    "Duração das chamadas ao embedder (query: um texto; batch: vários).",
+    labels=("operation",),
+)
+EMBEDDED_TEXTS = REGISTRY.counter(
+    "chiquinho_embedded_texts_total",
+    "Textos enviados ao embedder.",
+    labels=("operation",),
+)
+PROMPT_TOKENS = REGISTRY.histogram(
+    "chiquinho_prompt_tokens",
+    "Tokens (aproximados) dos prompts enviados ao LLM.",
+    buckets=TOKEN_BUCKETS,
+)
+ANSWER_TOKENS = REGISTRY.histogram(
+    "chiquinho_answer_tokens",
+    "Tokens (aproximados) das respostas geradas pelo LLM.",
+    buckets=TOKEN_BUCKETS,
+)
+INGEST_CHUNKS = REGISTRY.counter(
+    "chiquinho_ingest_chunks_total",
+    "Chunks processados pela ingestão, por resultado.",
+    labels=("result",),
+)
+INGEST_SECONDS = REGISTRY.counter(
+    "chiquinho_ingest_seconds_total",
+    "Tempo total gasto em execuções de ingestão.",
+)
+INGEST_RUNS = REGISTRY.counter(
+    "chiquinho_ingest_runs_total",
+    "Execuções de ingestão concluídas.",
+)
+UPSTREAM_SECONDS = REGISTRY.histogram(
+    "chiquinho_upstream_seconds",
+    "Duração das tentativas bem-sucedidas de chamada a serviços externos.",
+    labels=("upstream",),
+)
+UPSTREAM_CALLS = REGISTRY.counter(
+    "chiquinho_upstream_calls_total",
+    "Tentativas de chamada a serviços externos, por resultado (ok, error, timeout, rejected).",
+    labels=("upstream", "result"),
+)
+UPSTREAM_RETRIES = REGISTRY.counter(
+    "chiquinho_upstream_retries_total",
+    "Novas tentativas após falhas transitórias.",
+    labels=("upstream",),
+)
+UPSTREAM_HEDGES = REGISTRY.counter(
+    "chiquinho_upstream_hedges_total",
+    "Requisições duplicadas (hedge) enviadas e vencedoras.",
+    labels=("upstream", "outcome"),
+)
+CIRCUIT_TRANSITIONS = REGISTRY.counter(
+    "chiquinho_circuit_transitions_total",
+    "Mudanças de estado dos circuit breakers.",
+    labels=("upstream", "state"),
+)
+
+
+def stage_timer(stage: str):
+    """Mede uma etapa do RAG: `with stage_timer("search"): ...`."""
+    return STAGE_SECONDS.time(stage=stage)
@@ -1,19 +1,310 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, List
+
+from app.services.answer_cache import SemanticAnswerCache
+from app.services.chunker import approx_tokens
+from app.services.context_packer import ContextPacker
 from app.services.llm.base import LLM
-from app.services.vector_store.base import VectorStore
+from app.services.metrics import ANSWER_TOKENS, PROMPT_TOKENS, STAGE_SECONDS, stage_timer
+from app.services.single_flight import SingleFlight, normalize_question
+from app.services.vector_store.base import SearchFilter, VectorStore
+
+logger = logging.getLogger(__name__)
+
+# Quantos documentos vão para o prompt quando não há empacotamento de contexto
+# (mesmo padrão do search() do Qdrant).
+DEFAULT_TOP_K = 4
+
+
+@dataclass
+class BatchAnswer:
+    """Resposta de uma pergunta do lote, com o tempo gasto no LLM."""
+    query: str
+    answer: str | None = None
+    cached: bool = False
+    llm_ms: float = 0.0
+    error: str | None = None
+
+
+@dataclass
+class BatchResult:
+    answers: List[BatchAnswer]
+    timings_ms: Dict[str, float] = field(default_factory=dict)
 
 
 class RAGService:
     """Orquestra o fluxo RAG (busca vetorial + geração de resposta)."""
 
-    def __init__(self, llm: LLM, vector_store: VectorStore):
+    def __init__(
+        self,
+        llm: LLM,
+        vector_store: VectorStore,
+        answer_cache: SemanticAnswerCache | None = None,
+        packer: ContextPacker | None = None,
+        coalescer: SingleFlight | None = None,
+    ):
         self.llm = llm
         self.vector_store = vector_store
+        self.answer_cache = answer_cache
+        self.packer = packer
+        # Compartilhado entre instâncias: perguntas iguais (normalizadas) em
+        # voo ao mesmo tempo esperam uma única execução do pipeline.
+        self.coalescer = coalescer
+
+    # Buscas filtradas não passam pelo cache semântico: a mesma pergunta pode
+    # ter respostas diferentes conforme a fonte ou o período.
+
+    def generate_answer(self, query: str, filters: SearchFilter | None = None) -> str:
+        # Sem coalescência: o SingleFlight é do event loop, e os endpoints usam
+        # as variantes assíncronas.
+        if filters or self.answer_cache is None:
+            docs = self._retrieve(query, filters=filters)
+            return self._generate(self._prompt(query, docs))
+
+        vector = self._embed(query)
+        cached = self.answer_cache.lookup(vector)
+        if cached is not None:
+            return cached
+
+        generation = self.answer_cache.generation
+        docs = self._retrieve(query, vector=vector)
+        answer = self._generate(self._prompt(query, docs))
+
+        if answer != self.llm.error_response:
+            self.answer_cache.store(vector, answer, generation=generation)
+
+        return answer
 
-    def generate_answer(self, query: str) -> str:
-        docs = self.vector_store.search(query)
+    async def agenerate_answer(self, query: str, filters: SearchFilter | None = None) -> str:
+        if self.coalescer is None:
+            return await self._agenerate_answer(query, filters)
+        return await self.coalescer.do(self._key(query, filters), lambda: self._agenerate_answer(query, filters))
+
+    async def _agenerate_answer(self, query: str, filters: SearchFilter | None = None) -> str:
+        if filters or self.answer_cache is None:
+            docs = await self._aretrieve(query, filters=filters)
+            return await self._agenerate(self._prompt(query, docs))
+
+        vector = await self._aembed(query)
+        cached = self.answer_cache.lookup(vector)
+        if cached is not None:
+            return cached
+
+        generation = self.answer_cache.generation
+        docs = await self._aretrieve(query, vector=vector)
+        answer = await self._agenerate(self._prompt(query, docs))
+
+        if answer != self.llm.error_response:
+            self.answer_cache.store(vector, answer, generation=generation)
+
+        return answer
+
+    async def astream_answer(self, query: str, filters: SearchFilter | None = None) -> AsyncIterator[str]:
+        """Como agenerate_answer, mas entrega a resposta em pedaços."""
+        if self.coalescer is None:
+            stream = self._astream_answer(query, filters)
+        else:
+            stream = self.coalescer.stream(self._key(query, filters), lambda: self._astream_answer(query, filters))
+        async for chunk in stream:
+            yield chunk
+
+    async def _astream_answer(self, query: str, filters: SearchFilter | None = None) -> AsyncIterator[str]:
+        vector = None
+        generation = None
+
+        if filters or self.answer_cache is None:
+            docs = await self._aretrieve(query, filters=filters)
+        else:
+            vector = await self._aembed(query)
+            cached = self.answer_cache.lookup(vector)
+            if cached is not None:
+                yield cached
+                return
+            generation = self.answer_cache.generation
+            docs = await self._aretrieve(query, vector=vector)
+
+        parts = []
+        prompt = self._prompt(query, docs)
+        started = time.perf_counter()
+        async for chunk in self.llm.astream_response(prompt):
+            parts.append(chunk)
+            yield chunk
+
+        answer = "".join(parts)
+        STAGE_SECONDS.observe(time.perf_counter() - started, stage="llm")
+        ANSWER_TOKENS.observe(approx_tokens(answer))
+        if vector is not None and answer != self.llm.error_response:
+            self.answer_cache.store(vector, answer, generation=generation)
+
+    async def abatch_answers(
+        self,
+        queries: List[str],
+        filters: SearchFilter | None = None,
+        concurrency: int = 4,
+    ) -> BatchResult:
+        """
+        Responde várias perguntas de uma vez: um embedding em lote, uma busca
+        em lote e as chamadas ao LLM com no máximo `concurrency` simultâneas.
+
+        Perguntas repetidas no lote (normalizadas) são buscadas e respondidas
+        uma vez só, e uma pergunta igual já em voo em /response é aproveitada.
+        """
+        started = time.perf_counter()
+        answers = [BatchAnswer(query=q) for q in queries]
+
+        with stage_timer("embed"):
+            vectors = await self.vector_store.aembed_queries(queries)
+        embedded = time.perf_counter()
+
+        use_cache = self.answer_cache is not None and not filters
+        generation = self.answer_cache.generation if use_cache else None
+        pending = []
+        # índice da primeira ocorrência -> índices das repetições
+        repeats: Dict[int, List[int]] = {}
+        first_by_key: Dict[tuple, int] = {}
+        for i, vector in enumerate(vectors):
+            if not vector:
+                answers[i].error = "Falha ao gerar o embedding da pergunta."
+                continue
+            key = self._key(queries[i], filters)
+            if key in first_by_key:
+                repeats[first_by_key[key]].append(i)
+                continue
+            first_by_key[key] = i
+            repeats[i] = []
+            cached = self.answer_cache.lookup(vector) if use_cache else None
+            if cached is not None:
+                answers[i].answer, answers[i].cached = cached, True
+            else:
+                pending.append(i)
+
+        top_k = self.packer.candidates if self.packer is not None else DEFAULT_TOP_K
+        batch = await self.vector_store.asearch_hits_batch(
+            [vectors[i] for i in pending], top_k, [queries[i] for i in pending], filters
+        ) if pending else []
+        await self.vector_store.ahydrate([hit for hits in batch for hit in hits])
+        searched = time.perf_counter()
+
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def generate(i: int, hits) -> str:
+            docs = self._pack(hits) if self.packer is not None else [h.text for h in hits]
+            result = await self._agenerate(self._prompt(queries[i], docs))
+            if use_cache and result != self.llm.error_response:
+                self.answer_cache.store(vectors[i], result, generation=generation)
+            return result
+
+        async def answer(i: int, hits):
+            async with semaphore:
+                llm_started = time.perf_counter()
+                try:
+                    if self.coalescer is None:
+                        result = await generate(i, hits)
+                    else:
+                        result = await self.coalescer.follow(self._key(queries[i], filters), lambda: generate(i, hits))
+                except Exception as e:
+                    logger.error(f"Erro ao responder pergunta do lote: {e}")
+                    answers[i].error = "Falha ao gerar a resposta."
+                    return
+                finally:
+                    answers[i].llm_ms = (time.perf_counter() - llm_started) * 1000
+            answers[i].answer = result
+
+        await asyncio.gather(*(answer(i, hits) for i, hits in zip(pending, batch)))
+        for i, copies in repeats.items():
+            for j in copies:
+                answers[j].answer, answers[j].cached = answers[i].answer, answers[i].cached
+                answers[j].error, answers[j].llm_ms = answers[i].error, answers[i].llm_ms
+        finished = time.perf_counter()
+
+        return BatchResult(answers=answers, timings_ms={
+            "embedding": (embedded - started) * 1000,
+            "busca": (searched - embedded) * 1000,
+            "llm": (finished - searched) * 1000,
+            "total": (finished - started) * 1000,
+        })
+
+    def _retrieve(
+        self,
+        query: str,
+        vector: List[float] | None = None,
+        filters: SearchFilter | None = None,
+    ) -> List[str]:
+        if self.packer is not None:
+            if vector is None:
+                vector = self._embed(query)
+            hits = self.vector_store.search_hits(vector, self.packer.candidates, query, filters)
+            return self._pack(self.vector_store.hydrate(hits))
+
+        if vector is not None:
+            return self.vector_store.search_by_vector(vector, query=query, filters=filters)
+        if filters:
+            return self.vector_store.search(query, filters=filters)
+        return self.vector_store.search(query)
+
+    async def _aretrieve(
+        self,
+        query: str,
+        vector: List[float] | None = None,
+        filters: SearchFilter | None = None,
+    ) -> List[str]:
+        if self.packer is not None:
+            if vector is None:
+                vector = await self._aembed(query)
+            hits = await self.vector_store.asearch_hits(vector, self.packer.candidates, query, filters)
+            return self._pack(await self.vector_store.ahydrate(hits))
+
+        if vector is not None:
+            return await self.vector_store.asearch_by_vector(vector, query=query, filters=filters)
+        if filters:
+            return await self.vector_store.asearch(query, filters=filters)
+        return await self.vector_store.asearch(query)
+
+    @staticmethod
+    def _key(query: str, filters: SearchFilter | None) -> tuple:
+        """Chave de coalescência: a pergunta normalizada e os filtros."""
+        return normalize_question(query), filters or None
+
+    # Ganchos de métricas: cada etapa alimenta o histograma chiquinho_stage_seconds.
+
+    def _embed(self, query: str) -> List[float]:
+        with stage_timer("embed"):
+            return self.vector_store.embed_query(query)
+
+    async def _aembed(self, query: str) -> List[float]:
+        with stage_timer("embed"):
+            return await self.vector_store.aembed_query(query)
+
+    def _pack(self, hits) -> List[str]:
+        with stage_timer("pack"):
+            return self.packer.pack(hits)
+
+    def _prompt(self, query: str, docs: List[str]) -> str:
+        with stage_timer("prompt"):
+            prompt = self.build_prompt(query, docs)
+        PROMPT_TOKENS.observe(approx_tokens(prompt))
+        return prompt
+
+    def _generate(self, prompt: str) -> str:
+        with stage_timer("llm"):
+            answer = self.llm.generate_response(prompt)
+        ANSWER_TOKENS.observe(approx_tokens(answer or ""))
+        return answer
+
+    async def _agenerate(self, prompt: str) -> str:
+        with stage_timer("llm"):
+            answer = await self.llm.agenerate_response(prompt)
+        ANSWER_TOKENS.observe(approx_tokens(answer or ""))
+        return answer
+
+    @staticmethod
+    def build_prompt(query: str, docs: List[str]) -> str:
         context = "\n\n".join(docs)
 
-        prompt = f"""
+        return f"""
         Você é um assistente que responde com base nestes documentos:
         {context}
 
@@ -22,5 +313,3 @@ class RAGService:
 
         Responda de forma clara e com base apenas nas informações acima.
         """
-
-        return self.llm.generate_response(prompt)
@@ -0,0 +1,250 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Callable, Dict
+
+from app.services.metrics import REGISTRY
+
+
+class Priority(IntEnum):
+    """Classes de prioridade das chamadas ao Gemini; menor valor passa na frente."""
+    INTERACTIVE = 0
+    BATCH = 1
+    BULK = 2
+
+
+# Prioridade da tarefa atual. Perguntas ao vivo usam o padrão; a ingestão e o
+# /response/batch marcam o próprio contexto com `priority(...)`.
+_PRIORITY: ContextVar[Priority] = ContextVar("gemini_priority", default=Priority.INTERACTIVE)
+
+
+@contextmanager
+def priority(level: Priority):
+    token = _PRIORITY.set(level)
+    try:
+        yield
+    finally:
+        _PRIORITY.reset(token)
+
+
+def current_priority() -> Priority:
+    return _PRIORITY.get()
+
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "cost", "notify", "granted", "cancelled")
+
+    def __init__(self, priority: Priority, seq: int, cost: float, notify: Callable[[], None]):
+        self.priority = priority
+        self.seq = seq
+        self.cost = cost
+        self.notify = notify
+        self.granted = False
+        self.cancelled = False
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class TokenBucketScheduler:
+    """
+    Token bucket compartilhado pelo processo inteiro (threads e event loops),
+    com fila por prioridade: quando faltam tokens, quem espera é atendido por
+    ordem de prioridade e, dentro dela, de chegada. As chamadas BULK ainda
+    deixam `bulk_reserve` tokens livres para as perguntas que chegarem.
+
+    `rate` é em tokens por segundo (uma chamada à API custa 1); com `rate <= 0`
+    não há limite. `burst` é a capacidade do balde.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        burst: float | None = None,
+        bulk_reserve: float = 0.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.rate = rate
+        self.burst = max(1.0, float(burst if burst is not None else rate))
+        self.bulk_reserve = max(0.0, min(bulk_reserve, self.burst - 1))
+        self._clock = clock
+        self._tokens = self.burst
+        self._updated = clock()
+        self._heap: list = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._queued = {p: 0 for p in Priority}
+        self._granted = {p: 0 for p in Priority}
+        self._throttled = {p: 0 for p in Priority}
+        self._wait_seconds = {p: 0.0 for p in Priority}
+        _SCHEDULERS[name] = self
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def acquire(self, cost: float = 1.0, level: Priority | None = None) -> float:
+        """Bloqueia a thread até haver tokens; retorna o tempo de espera."""
+        if not self.enabled:
+            return 0.0
+        event = threading.Event()
+        waiter, started = self._enqueue(cost, level, event.set)
+        try:
+            with self._lock:
+                delay = self._dispatch()
+            throttled = not waiter.granted
+            while not waiter.granted:
+                event.wait(delay)
+                with self._lock:
+                    delay = self._dispatch()
+        except BaseException:
+            self._cancel(waiter)
+            raise
+        return self._done(waiter, started, throttled)
+
+    async def aacquire(self, cost: float = 1.0, level: Priority | None = None) -> float:
+        """Variante assíncrona: espera sem bloquear o event loop."""
+        if not self.enabled:
+            return 0.0
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def notify():
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+
+        waiter, started = self._enqueue(cost, level, notify)
+        try:
+            with self._lock:
+                delay = self._dispatch()
+            throttled = not waiter.granted
+            while not waiter.granted:
+                try:
+                    await asyncio.wait_for(asyncio.shield(future), delay)
+                except asyncio.TimeoutError:
+                    pass
+                with self._lock:
+                    delay = self._dispatch()
+        except BaseException:
+            self._cancel(waiter)
+            raise
+        return self._done(waiter, started, throttled)
+
+    def try_acquire(self, cost: float = 1.0, level: Priority | None = None) -> bool:
+        """Pega os tokens só se estiverem livres agora e ninguém à frente estiver esperando."""
+        if not self.enabled:
+            return True
+        level = current_priority() if level is None else level
+        with self._lock:
+            self._refill()
+            if any(not w.cancelled and w.priority <= level for w in self._heap):
+                return False
+            if self._tokens < self._needed(cost, level):
+                return False
+            self._tokens -= cost
+            self._granted[level] += 1
+            return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._refill()
+            return {
+                "enabled": self.enabled,
+                "rate_per_second": self.rate,
+                "burst": self.burst,
+                "tokens": round(self._tokens, 3),
+                "queued": {p.name.lower(): n for p, n in self._queued.items()},
+                "granted": {p.name.lower(): n for p, n in self._granted.items()},
+                "throttled": {p.name.lower(): n for p, n in self._throttled.items()},
+                "wait_seconds": {p.name.lower(): round(s, 3) for p, s in self._wait_seconds.items()},
+            }
+
+    def _enqueue(self, cost: float, level: Priority | None, notify: Callable[[], None]):
+        level = current_priority() if level is None else level
+        with self._lock:
+            waiter = _Waiter(level, next(self._seq), min(cost, self.burst), notify)
+            heapq.heappush(self._heap, waiter)
+            self._queued[level] += 1
+        return waiter, time.perf_counter()
+
+    def _done(self, waiter: _Waiter, started: float, throttled: bool) -> float:
+        waited = time.perf_counter() - started
+        with self._lock:
+            self._wait_seconds[waiter.priority] += waited
+            if throttled:
+                self._throttled[waiter.priority] += 1
+        return waited
+
+    def _cancel(self, waiter: _Waiter):
+        with self._lock:
+            if waiter.granted:
+                # Tokens concedidos a quem desistiu voltam para o balde.
+                self._tokens = min(self.burst, self._tokens + waiter.cost)
+            elif not waiter.cancelled:
+                waiter.cancelled = True
+                self._queued[waiter.priority] -= 1
+            self._dispatch()
+
+    def _needed(self, cost: float, level: Priority) -> float:
+        return cost + (self.bulk_reserve if level == Priority.BULK else 0.0)
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _dispatch(self) -> float | None:
+        """
+        Concede tokens aos primeiros da fila. Retorna quanto falta para o
+        próximo poder ser atendido, ou None com a fila vazia. Chamado com o
+        lock adquirido.
+        """
+        self._refill()
+        while self._heap:
+            waiter = self._heap[0]
+            if waiter.cancelled:
+                heapq.heappop(self._heap)
+                continue
+            needed = self._needed(waiter.cost, waiter.priority)
+            if self._tokens < needed:
+                return (needed - self._tokens) / self.rate
+            heapq.heappop(self._heap)
+            self._tokens -= waiter.cost
+            waiter.granted = True
+            self._queued[waiter.priority] -= 1
+            self._granted[waiter.priority] += 1
+            waiter.notify()
+        return None
+
+
+_SCHEDULERS: Dict[str, TokenBucketScheduler] = {}
+
+
+def _scheduler_stats():
+    for name, scheduler in list(_SCHEDULERS.items()):
+        if not scheduler.enabled:
+            continue
+        stats = scheduler.stats()
+        yield "chiquinho_rate_limit_tokens", "gauge", "Tokens disponíveis no balde.", {"limiter": name}, stats["tokens"]
+        for level in Priority:
+            labels = {"limiter": name, "priority": level.name.lower()}
+            key = level.name.lower()
+            yield "chiquinho_rate_limit_queued", "gauge", "Chamadas esperando tokens.", labels, stats["queued"][key]
+            yield "chiquinho_rate_limit_granted_total", "counter", "Chamadas liberadas.", labels, stats["granted"][key]
+            yield (
+                "chiquinho_rate_limit_throttled_total", "counter", "Chamadas que precisaram esperar por tokens.",
+                labels, stats["throttled"][key],
+            )
+            yield (
+                "chiquinho_rate_limit_wait_seconds_total", "counter", "Tempo total de espera por tokens.",
+                labels, stats["wait_seconds"][key],
+            )
+
+
+REGISTRY.add_collector(_scheduler_stats)
@@ -0,0 +1,306 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, TypeVar
+
+from app.services.metrics import (
+    CIRCUIT_TRANSITIONS,
+    REGISTRY,
+    UPSTREAM_CALLS,
+    UPSTREAM_HEDGES,
+    UPSTREAM_RETRIES,
+    UPSTREAM_SECONDS,
+)
+from app.services.rate_limit import TokenBucketScheduler
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Status HTTP que indicam falha transitória do serviço (as exceções do
+# google.api_core expõem o status em `code`).
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Timeouts, erros de conexão e status transitórios valem nova tentativa."""
+    if isinstance(exc, (TimeoutError, ConnectionError)):
+        return True
+    code = getattr(exc, "code", None)
+    return isinstance(code, int) and code in RETRYABLE_STATUS
+
+
+class CircuitOpenError(RuntimeError):
+    """O circuito está aberto: a chamada foi recusada sem ir ao serviço."""
+
+
+class CircuitBreaker:
+    """
+    Abre depois de `failure_threshold` falhas transitórias seguidas e recusa
+    chamadas por `reset_seconds`; depois deixa passar uma única chamada de
+    teste (meio aberto), que fecha o circuito se der certo ou o reabre se
+    falhar. Com `failure_threshold <= 0` nunca abre.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_seconds:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        if self.failure_threshold <= 0:
+            return True
+        with self._lock:
+            if self._state == self.OPEN:
+                if self._clock() - self._opened_at < self.reset_seconds:
+                    return False
+                self._transition(self.HALF_OPEN)
+            if self._state == self.HALF_OPEN:
+                if self._probing:
+                    return False
+                self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+            if self._state != self.CLOSED:
+                self._transition(self.CLOSED)
+
+    def release(self):
+        """Libera a chamada de teste sem contar sucesso nem falha (cancelamento)."""
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self):
+        if self.failure_threshold <= 0:
+            return
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._state == self.HALF_OPEN or (
+                self._state == self.CLOSED and self._failures >= self.failure_threshold
+            ):
+                self._opened_at = self._clock()
+                self._transition(self.OPEN)
+
+    def _transition(self, state: str):
+        self._state = state
+        CIRCUIT_TRANSITIONS.inc(upstream=self.name, state=state)
+        log = logger.warning if state == self.OPEN else logger.info
+        log(f"Circuito de '{self.name}' agora está {state} ({self._failures} falhas seguidas).")
+
+
+class ResiliencePolicy:
+    """
+    Envolve as chamadas a um serviço externo com:
+
+    - prazo por tentativa (`timeout`, em segundos; None = sem prazo);
+    - até `max_retries` novas tentativas para erros transitórios, com backoff
+      exponencial e jitter completo (espera sorteada em [0, base * 2^n]);
+    - hedging (só na variante assíncrona): se a tentativa passar do p95
+      observado (no mínimo `hedge_min_delay`), dispara uma duplicata e fica
+      com a primeira que responder;
+    - circuit breaker, que falha na hora com CircuitOpenError enquanto o
+      serviço está degradado;
+    - `limiter`: cada tentativa (e cada duplicata) espera sua vez no token
+      bucket compartilhado, na prioridade do contexto atual.
+
+    Na variante síncrona o prazo precisa ser repassado ao cliente HTTP pelo
+    chamador (ver `timeout`); na assíncrona ele também é imposto aqui.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        timeout: float | None = None,
+        max_retries: int = 2,
+        backoff_base: float = 0.2,
+        backoff_max: float = 2.0,
+        hedge: bool = False,
+        hedge_min_delay: float = 0.05,
+        hedge_quantile: float = 0.95,
+        hedge_min_samples: int = 20,
+        breaker: CircuitBreaker | None = None,
+        retryable: Callable[[BaseException], bool] = is_retryable,
+        rng: random.Random | None = None,
+        limiter: TokenBucketScheduler | None = None,
+    ):
+        self.name = name
+        self.timeout = timeout
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge = hedge
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.breaker = breaker or CircuitBreaker(name, failure_threshold=0)
+        self.retryable = retryable
+        self.limiter = limiter
+        self._rng = rng or random.Random()
+        # Latências das tentativas bem-sucedidas, base do atraso do hedge.
+        self._latencies: deque = deque(maxlen=500)
+        _POLICIES[name] = self
+
+    def backoff(self, attempt: int) -> float:
+        return self._rng.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def hedge_delay(self) -> float | None:
+        if not self.hedge or len(self._latencies) < self.hedge_min_samples:
+            return None
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(self.hedge_quantile * len(ordered)))
+        return max(self.hedge_min_delay, ordered[index])
+
+    def call(self, fn: Callable[[], T]) -> T:
+        attempt = 0
+        while True:
+            self._admit()
+            try:
+                if self.limiter is not None:
+                    self.limiter.acquire()
+                started = time.perf_counter()
+                result = fn()
+            except Exception as e:
+                self._record_failure(e)
+                if not self._should_retry(e, attempt):
+                    raise
+                time.sleep(self.backoff(attempt))
+                attempt += 1
+                continue
+            except BaseException:
+                self.breaker.release()
+                raise
+            self._record_success(time.perf_counter() - started)
+            return result
+
+    async def acall(self, fn: Callable[[], Awaitable[T]]) -> T:
+        attempt = 0
+        while True:
+            self._admit()
+            if self.limiter is not None:
+                try:
+                    await self.limiter.aacquire()
+                except BaseException:
+                    self.breaker.release()
+                    raise
+            try:
+                return await self._attempt(fn)
+            except Exception as e:
+                if not self._should_retry(e, attempt):
+                    raise
+                await asyncio.sleep(self.backoff(attempt))
+                attempt += 1
+
+    async def _attempt(self, fn: Callable[[], Awaitable[T]]) -> T:
+        primary = asyncio.ensure_future(self._timed(fn))
+        delay = self.hedge_delay()
+        if delay is None:
+            return await primary
+
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done or not self.breaker.allow():
+            return await primary
+        # A duplicata não entra na fila: sem token livre agora, não há hedge.
+        if self.limiter is not None and not self.limiter.try_acquire():
+            return await primary
+
+        UPSTREAM_HEDGES.inc(upstream=self.name, outcome="sent")
+        hedge = asyncio.ensure_future(self._timed(fn))
+        pending = {primary, hedge}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            UPSTREAM_HEDGES.inc(upstream=self.name, outcome="won")
+                        return task.result()
+            # As duas falharam: vale o erro da original.
+            return primary.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _timed(self, fn: Callable[[], Awaitable[T]]) -> T:
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(fn(), self.timeout)
+        except Exception as e:
+            self._record_failure(e)
+            raise
+        except BaseException:
+            # Cancelada (cliente desistiu, duplicata perdedora): não diz nada
+            # sobre a saúde do serviço, mas a chamada de teste é liberada.
+            self.breaker.release()
+            raise
+        self._record_success(time.perf_counter() - started)
+        return result
+
+    def _admit(self):
+        if not self.breaker.allow():
+            UPSTREAM_CALLS.inc(upstream=self.name, result="rejected")
+            raise CircuitOpenError(f"Circuito de '{self.name}' aberto; chamada recusada.")
+
+    def _record_success(self, seconds: float):
+        self._latencies.append(seconds)
+        UPSTREAM_SECONDS.observe(seconds, upstream=self.name)
+        UPSTREAM_CALLS.inc(upstream=self.name, result="ok")
+        self.breaker.record_success()
+
+    def _record_failure(self, exc: Exception):
+        timeout = isinstance(exc, TimeoutError) or getattr(exc, "code", None) == 504
+        UPSTREAM_CALLS.inc(upstream=self.name, result="timeout" if timeout else "error")
+        # Erros do cliente (prompt inválido, chave errada) não indicam que o
+        # serviço está degradado: ele respondeu, o que vale como sucesso.
+        if self.retryable(exc):
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    def _should_retry(self, exc: Exception, attempt: int) -> bool:
+        if attempt >= self.max_retries or not self.retryable(exc):
+            return False
+        UPSTREAM_RETRIES.inc(upstream=self.name)
+        logger.warning(f"Falha transitória em '{self.name}' (tentativa {attempt + 1}/{self.max_retries + 1}): {exc}")
+        return True
+
+
+_POLICIES: Dict[str, ResiliencePolicy] = {}
+
+
+def _circuit_states():
+    for name, policy in list(_POLICIES.items()):
+        yield (
+            "chiquinho_circuit_open", "gauge", "1 se o circuito do serviço externo está aberto.",
+            {"upstream": name}, int(policy.breaker.state == CircuitBreaker.OPEN),
+        )
+
+
+REGISTRY.add_collector(_circuit_states)
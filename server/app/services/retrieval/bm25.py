@@ -0,0 +1,324 @@
+import json
+import logging
+import os
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Fração de documentos removidos a partir da qual a compactação descarta
+# as postings órfãs.
+VACUUM_RATIO = 0.25
+
+# Palavras funcionais do português que não ajudam a ranquear.
+STOPWORDS = frozenset("""
+a ao aos as ate com como da das de dela dele deles do dos e ela elas ele eles em entre era essa esse esta
+este eu foi for ha isso isto ja la lhe mais mas me mesmo meu minha muito na nas nem no nos nossa nosso
+num numa o os ou para pela pelas pelo pelos por qual quando que quem se sem ser seu seus sua suas so tambem
+te tem ter uma um umas uns voce voces sao sobre
+""".split())
+
+# Identificadores como "0005/2025", "ceg-n", "fcte" são mantidos inteiros,
+# além de quebrados nas partes.
+_TOKEN = re.compile(r"[a-z0-9]+(?:[./-][a-z0-9]+)*")
+_SPLIT = re.compile(r"[./-]")
+
+# Sufixos removidos pelo stemmer leve (já sem acentos), do mais longo ao mais curto.
+_SUFFIXES = (
+    ("amentos", ""), ("imentos", ""), ("amento", ""), ("imento", ""),
+    ("mente", ""), ("coes", "cao"), ("soes", "sao"), ("oes", "ao"), ("aes", "ao"),
+    ("ais", "al"), ("eis", "el"), ("ois", "ol"), ("res", "r"), ("ns", "m"), ("s", ""),
+)
+
+
+def _strip_accents(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def stem(token: str) -> str:
+    """Stemmer leve para o português: remove plural e alguns sufixos comuns."""
+    if len(token) <= 3 or any(ch.isdigit() for ch in token):
+        return token
+    for suffix, replacement in _SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            return token[: -len(suffix)] + replacement
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for raw in _TOKEN.findall(_strip_accents(text.lower())):
+        parts = _SPLIT.split(raw)
+        if len(parts) > 1:
+            tokens.append(raw)
+        for part in parts:
+            if part and part not in STOPWORDS:
+                tokens.append(stem(part))
+    return tokens
+
+
+class BM25Index:
+    """
+    Índice invertido BM25 construído de forma incremental.
+
+    As postings ficam em formato CSR: um único array de documentos (int32) e
+    um de frequências (uint16), fatiados pelos offsets de cada termo. Novos
+    documentos vão para um buffer em memória que é compactado no CSR quando
+    passa de `compact_every` postings ou ao salvar. Reindexar um id marca a
+    versão anterior como removida.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, compact_every: int = 50000):
+        self.k1 = k1
+        self.b = b
+        self.compact_every = compact_every
+
+        self._lock = threading.RLock()
+        self._terms: Dict[str, int] = {}
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._docs = np.zeros(0, dtype=np.int32)
+        self._freqs = np.zeros(0, dtype=np.uint16)
+        self._pending: Dict[int, List[Tuple[int, int]]] = defaultdict(list)
+        self._pending_count = 0
+
+        self._ids: List[str] = []
+        self._doc_by_id: Dict[str, int] = {}
+        # Arrays com capacidade extra; só as len(self._ids) primeiras posições valem.
+        self._lengths_buf = np.zeros(1024, dtype=np.int32)
+        self._deleted_buf = np.zeros(1024, dtype=bool)
+        self._total_length = 0
+        self._live = 0
+
+        self.path: str | None = None
+        self._mtime: float | None = None
+
+    def __len__(self) -> int:
+        return self._live
+
+    @property
+    def _lengths(self) -> np.ndarray:
+        return self._lengths_buf[: len(self._ids)]
+
+    @property
+    def _deleted(self) -> np.ndarray:
+        return self._deleted_buf[: len(self._ids)]
+
+    def add(self, point_id: str, text: str):
+        self.add_many([(point_id, text)])
+
+    def add_many(self, docs: Iterable[Tuple[str, str]]):
+        with self._lock:
+            for point_id, text in docs:
+                point_id = str(point_id)
+                self._remove(point_id)
+
+                counts = Counter(tokenize(text))
+                doc = len(self._ids)
+                if doc == len(self._lengths_buf):
+                    capacity = max(1024, doc * 2)
+                    self._lengths_buf = np.resize(self._lengths_buf, capacity)
+                    self._deleted_buf = np.resize(self._deleted_buf, capacity)
+                self._ids.append(point_id)
+                self._doc_by_id[point_id] = doc
+                length = sum(counts.values())
+                self._lengths_buf[doc] = length
+                self._deleted_buf[doc] = False
+                self._total_length += length
+                self._live += 1
+
+                for term, freq in counts.items():
+                    term_id = self._terms.setdefault(term, len(self._terms))
+                    self._pending[term_id].append((doc, min(freq, 65535)))
+                self._pending_count += len(counts)
+
+            if self._pending_count >= self.compact_every:
+                self._compact()
+
+    def remove(self, point_ids: Iterable[str]):
+        with self._lock:
+            for point_id in point_ids:
+                self._remove(str(point_id))
+
+    def clear(self):
+        with self._lock:
+            path, mtime = self.path, self._mtime
+            self.__init__(self.k1, self.b, self.compact_every)
+            self.path, self._mtime = path, mtime
+
+    def search(self, query: str, top_k: int = 20) -> List[Tuple[str, float]]:
+        """Retorna (id, score) dos `top_k` documentos mais relevantes."""
+        terms = [self._terms.get(t) for t in set(tokenize(query))]
+        terms = [t for t in terms if t is not None]
+
+        with self._lock:
+            if not terms or not self._live:
+                return []
+
+            n_docs = len(self._ids)
+            scores = np.zeros(n_docs, dtype=np.float32)
+            avgdl = self._total_length / self._live
+            norm = self.k1 * (1 - self.b + self.b * self._lengths / max(avgdl, 1e-9))
+
+            for term_id in terms:
+                docs, freqs = self._postings(term_id)
+                if not len(docs):
+                    continue
+                df = len(docs) - int(self._deleted[docs].sum())
+                idf = np.log(1 + (self._live - df + 0.5) / (df + 0.5))
+                tf = freqs.astype(np.float32)
+                scores[docs] += idf * tf * (self.k1 + 1) / (tf + norm[docs])
+
+            scores[self._deleted] = 0
+            candidates = np.flatnonzero(scores)
+            if not len(candidates):
+                return []
+            k = min(top_k, len(candidates))
+            best = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+            best = best[np.argsort(-scores[best])]
+            return [(self._ids[d], float(scores[d])) for d in best]
+
+    def save(self, path: str | None = None):
+        path = path or self.path
+        with self._lock:
+            self._compact()
+            tmp = f"{path}.tmp.npz"
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            np.savez(
+                tmp,
+                terms=np.array(json.dumps(list(self._terms))),
+                offsets=self._offsets,
+                docs=self._docs,
+                freqs=self._freqs,
+                ids=np.array(json.dumps(self._ids)),
+                lengths=self._lengths,
+                deleted=self._deleted,
+                params=np.array([self.k1, self.b]),
+            )
+            os.replace(tmp, path)
+            self.path = path
+            self._mtime = os.path.getmtime(path)
+        logger.info(f"Índice BM25 salvo em {path} ({self._live} documentos, {len(self._terms)} termos).")
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        index = cls()
+        index.path = path
+        if os.path.exists(path):
+            index._load_from(path)
+        return index
+
+    def reload_if_changed(self):
+        """Recarrega do disco se outro processo (ex.: ingest) salvou o índice."""
+        if not self.path or not os.path.exists(self.path):
+            return
+        mtime = os.path.getmtime(self.path)
+        if mtime != self._mtime:
+            self._load_from(self.path)
+
+    def _load_from(self, path: str):
+        with np.load(path) as data:
+            terms = json.loads(str(data["terms"]))
+            ids = json.loads(str(data["ids"]))
+            k1, b = data["params"]
+            with self._lock:
+                self.k1, self.b = float(k1), float(b)
+                self._terms = {t: i for i, t in enumerate(terms)}
+                self._offsets = data["offsets"]
+                self._docs = data["docs"]
+                self._freqs = data["freqs"]
+                self._pending = defaultdict(list)
+                self._pending_count = 0
+                self._ids = ids
+                self._lengths_buf = data["lengths"].copy()
+                self._deleted_buf = data["deleted"].copy()
+                self._doc_by_id = {pid: d for d, pid in enumerate(ids) if not self._deleted[d]}
+                self._live = int((~self._deleted).sum())
+                self._total_length = int(self._lengths[~self._deleted].sum())
+                self._mtime = os.path.getmtime(path)
+
+    def _remove(self, point_id: str):
+        doc = self._doc_by_id.pop(point_id, None)
+        if doc is not None and not self._deleted_buf[doc]:
+            self._deleted_buf[doc] = True
+            self._total_length -= int(self._lengths[doc])
+            self._live -= 1
+
+    def _postings(self, term_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        if term_id + 1 < len(self._offsets):
+            start, end = self._offsets[term_id], self._offsets[term_id + 1]
+            docs, freqs = self._docs[start:end], self._freqs[start:end]
+        else:
+            docs, freqs = self._docs[:0], self._freqs[:0]
+
+        pending = self._pending.get(term_id)
+        if pending:
+            extra = np.array(pending, dtype=np.int64)
+            docs = np.concatenate([docs, extra[:, 0].astype(np.int32)])
+            freqs = np.concatenate([freqs, extra[:, 1].astype(np.uint16)])
+        return docs, freqs
+
+    def _compact(self):
+        n_docs = len(self._ids)
+        if n_docs and n_docs - self._live > VACUUM_RATIO * n_docs:
+            self._vacuum()
+            return
+
+        if not self._pending_count:
+            return
+
+        n_terms = len(self._terms)
+        counts = np.zeros(n_terms, dtype=np.int64)
+        old_counts = np.diff(self._offsets)
+        counts[: len(old_counts)] = old_counts
+        for term_id, postings in self._pending.items():
+            counts[term_id] += len(postings)
+
+        offsets = np.zeros(n_terms + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        docs = np.empty(offsets[-1], dtype=np.int32)
+        freqs = np.empty(offsets[-1], dtype=np.uint16)
+
+        for term_id in range(n_terms):
+            term_docs, term_freqs = self._postings(term_id)
+            start = offsets[term_id]
+            docs[start:start + len(term_docs)] = term_docs
+            freqs[start:start + len(term_freqs)] = term_freqs
+
+        self._offsets, self._docs, self._freqs = offsets, docs, freqs
+        self._pending = defaultdict(list)
+        self._pending_count = 0
+
+    def _vacuum(self):
+        """Reconstrói o CSR descartando as postings de documentos removidos."""
+        keep = ~self._deleted
+        remap = np.cumsum(keep, dtype=np.int64) - 1
+
+        n_terms = len(self._terms)
+        all_docs, all_freqs, counts = [], [], np.zeros(n_terms, dtype=np.int64)
+        for term_id in range(n_terms):
+            docs, freqs = self._postings(term_id)
+            mask = keep[docs]
+            all_docs.append(remap[docs[mask]].astype(np.int32))
+            all_freqs.append(freqs[mask])
+            counts[term_id] = int(mask.sum())
+
+        offsets = np.zeros(n_terms + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        self._offsets = offsets
+        self._docs = np.concatenate(all_docs) if all_docs else np.zeros(0, dtype=np.int32)
+        self._freqs = np.concatenate(all_freqs) if all_freqs else np.zeros(0, dtype=np.uint16)
+        self._pending = defaultdict(list)
+        self._pending_count = 0
+
+        lengths = self._lengths[keep]
+        self._ids = [pid for pid, k in zip(self._ids, keep) if k]
+        self._lengths_buf = np.zeros(max(1024, len(self._ids) * 2), dtype=np.int32)
+        self._lengths_buf[: len(lengths)] = lengths
+        self._deleted_buf = np.zeros(len(self._lengths_buf), dtype=bool)
+        self._doc_by_id = {pid: d for d, pid in enumerate(self._ids)}
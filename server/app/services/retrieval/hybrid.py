@@ -0,0 +1,201 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+from app.services.metrics import stage_timer
+from app.services.retrieval.bm25 import BM25Index
+from app.services.vector_store.base import SearchFilter, SearchHit, VectorStore
+
+logger = logging.getLogger(__name__)
+
+# A busca lexical roda em paralelo com a vetorial nas chamadas síncronas.
+_lexical_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="lexical")
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """Combina rankings por RRF: score(d) = soma de 1 / (k + posição de d)."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class HybridVectorStore(VectorStore):
+    """
+    Busca híbrida: vetorial (banco denso) + lexical (BM25), fundidas por RRF.
+
+    Cada lado retorna `candidates` resultados; os `top_k` melhores da fusão
+    são devolvidos. Pontos que só apareceram na busca lexical têm o payload
+    buscado no banco denso numa única chamada.
+    """
+
+    def __init__(
+        self,
+        dense: VectorStore,
+        lexical: BM25Index,
+        candidates: int = 20,
+        rrf_k: int = 60,
+        reload_interval: float = 30.0,
+    ):
+        self.dense = dense
+        self.lexical = lexical
+        self.candidates = candidates
+        self.rrf_k = rrf_k
+        self.reload_interval = reload_interval
+        self._last_reload = 0.0
+
+    def embed_query(self, query: str) -> List[float]:
+        return self.dense.embed_query(query)
+
+    async def aembed_query(self, query: str) -> List[float]:
+        return await self.dense.aembed_query(query)
+
+    def search(self, query: str, top_k: int = 4, filters: SearchFilter | None = None) -> List[str]:
+        return self.search_by_vector(self.embed_query(query), top_k, query, filters)
+
+    async def asearch(self, query: str, top_k: int = 4, filters: SearchFilter | None = None) -> List[str]:
+        return await self.asearch_by_vector(await self.aembed_query(query), top_k, query, filters)
+
+    def search_by_vector(
+        self,
+        vector: List[float],
+        top_k: int = 4,
+        query: str | None = None,
+        filters: SearchFilter | None = None,
+    ) -> List[str]:
+        return [hit.text for hit in self.hydrate(self.search_hits(vector, top_k, query, filters))]
+
+    async def asearch_by_vector(
+        self,
+        vector: List[float],
+        top_k: int = 4,
+        query: str | None = None,
+        filters: SearchFilter | None = None,
+    ) -> List[str]:
+        return [hit.text for hit in await self.ahydrate(await self.asearch_hits(vector, top_k, query, filters))]
+
+    def search_hits(
+        self,
+        vector: List[float],
+        top_k: int = 4,
+        query: str | None = None,
+        filters: SearchFilter | None = None,
+    ) -> List[SearchHit]:
+        if not query:
+            return self.dense.search_hits(vector, top_k, filters=filters)
+
+        lexical = _lexical_pool.submit(self._lexical_search, query)
+        dense_hits = self.dense.search_hits(vector, max(top_k, self.candidates), filters=filters)
+        lexical_hits = lexical.result()
+
+        ranking = self._rank(dense_hits, lexical_hits)
+        missing = self._missing(dense_hits, ranking, top_k, filters)
+        retrieved = self.dense.retrieve(missing) if missing else []
+        return self._combine(dense_hits, retrieved, ranking, top_k, filters)
+
+    async def asearch_hits(
+        self,
+        vector: List[float],
+        top_k: int = 4,
+        query: str | None = None,
+        filters: SearchFilter | None = None,
+    ) -> List[SearchHit]:
+        if not query:
+            return await self.dense.asearch_hits(vector, top_k, filters=filters)
+
+        dense_hits, lexical_hits = await asyncio.gather(
+            self.dense.asearch_hits(vector, max(top_k, self.candidates), filters=filters),
+            asyncio.to_thread(self._lexical_search, query),
+        )
+
+        ranking = self._rank(dense_hits, lexical_hits)
+        missing = self._missing(dense_hits, ranking, top_k, filters)
+        retrieved = await self.dense.aretrieve(missing) if missing else []
+        return self._combine(dense_hits, retrieved, ranking, top_k, filters)
+
+    async def aembed_queries(self, queries: List[str]) -> List[List[float]]:
+        return await self.dense.aembed_queries(queries)
+
+    async def asearch_hits_batch(
+        self,
+        vectors: List[List[float]],
+        top_k: int = 4,
+        queries: List[str] | None = None,
+        filters: SearchFilter | None = None,
+    ) -> List[List[SearchHit]]:
+        if not queries:
+            return await self.dense.asearch_hits_batch(vectors, top_k, filters=filters)
+
+        dense_batch, lexical_batch = await asyncio.gather(
+            self.dense.asearch_hits_batch(vectors, max(top_k, self.candidates), queries, filters),
+            asyncio.gather(*(asyncio.to_thread(self._lexical_search, q) for q in queries)),
+        )
+
+        rankings = [self._rank(d, l) for d, l in zip(dense_batch, lexical_batch)]
+        missing = list(dict.fromkeys(
+            doc_id
+            for dense_hits, ranking in zip(dense_batch, rankings)
+            for doc_id in self._missing(dense_hits, ranking, top_k, filters)
+        ))
+        retrieved = await self.dense.aretrieve(missing) if missing else []
+        return [
+            self._combine(dense_hits, retrieved, ranking, top_k, filters)
+            for dense_hits, ranking in zip(dense_batch, rankings)
+        ]
+
+    def retrieve(self, ids: List[str]) -> List[SearchHit]:
+        return self.dense.retrieve(ids)
+
+    async def aretrieve(self, ids: List[str]) -> List[SearchHit]:
+        return await self.dense.aretrieve(ids)
+
+    def hydrate(self, hits: List[SearchHit]) -> List[SearchHit]:
+        return self.dense.hydrate(hits)
+
+    async def ahydrate(self, hits: List[SearchHit]) -> List[SearchHit]:
+        return await self.dense.ahydrate(hits)
+
+    def _lexical_search(self, query: str) -> List[Tuple[str, float]]:
+        now = time.monotonic()
+        if now - self._last_reload >= self.reload_interval:
+            self._last_reload = now
+            self.lexical.reload_if_changed()
+        with stage_timer("lexical"):
+            return self.lexical.search(query, self.candidates)
+
+    def _rank(self, dense_hits: List[SearchHit], lexical_hits: List[Tuple[str, float]]) -> List[Tuple[str, float]]:
+        return reciprocal_rank_fusion(
+            [[hit.id for hit in dense_hits], [doc_id for doc_id, _ in lexical_hits]],
+            k=self.rrf_k,
+        )
+
+    @staticmethod
+    def _missing(dense_hits, ranking, top_k: int, filters: SearchFilter | None) -> List[str]:
+        """
+        Ids só lexicais cujo payload precisa ser buscado. Com filtros, todos os
+        candidatos lexicais são buscados, já que alguns serão descartados.
+        """
+        known = {hit.id for hit in dense_hits}
+        candidates = ranking if filters else ranking[:top_k]
+        return [doc_id for doc_id, _ in candidates if doc_id not in known]
+
+    @staticmethod
+    def _combine(dense_hits, retrieved, ranking, top_k: int, filters: SearchFilter | None) -> List[SearchHit]:
+        dense = {hit.id: hit for hit in dense_hits}
+        lexical_only = {hit.id: hit for hit in retrieved}
+
+        result = []
+        for doc_id, score in ranking:
+            hit = dense.get(doc_id)
+            if hit is None:
+                hit = lexical_only.get(doc_id)
+                # Ausente do banco denso (removido) ou fora dos filtros.
+                if hit is None or (filters and not filters.matches(hit.payload)):
+                    continue
+            result.append(SearchHit(id=hit.id, score=score, payload=hit.payload, vector=hit.vector))
+            if len(result) == top_k:
+                break
+        return result
@@ -0,0 +1,298 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+import weakref
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import List, Tuple
+
+import numpy as np
+
+from app.services.embedder.base import iter_batches
+from app.services.embedder.onnx_embedder import _import_runtime
+from app.services.metrics import REGISTRY, stage_timer
+from app.services.vector_store.base import SearchFilter, SearchHit, VectorStore
+
+logger = logging.getLogger(__name__)
+
+_rerank_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="rerank")
+
+
+class BudgetExceeded(Exception):
+    pass
+
+
+class Reranker(ABC):
+    """Pontua a relevância de cada texto para a consulta (maior = melhor)."""
+
+    max_batch_size: int = 16
+
+    @abstractmethod
+    def score_batch(self, query: str, texts: List[str]) -> List[float]:
+        pass
+
+    def score(self, query: str, texts: List[str], deadline: float | None = None) -> List[float]:
+        """
+        Pontua em lotes de `max_batch_size`. Se `deadline` (time.monotonic)
+        passar entre um lote e outro, levanta BudgetExceeded.
+        """
+        scores: List[float] = []
+        with stage_timer("rerank"):
+            for batch in iter_batches(texts, self.max_batch_size):
+                if deadline is not None and time.monotonic() > deadline:
+                    raise BudgetExceeded
+                scores.extend(self.score_batch(query, batch))
+        return scores
+
+
+class OnnxCrossEncoder(Reranker):
+    """
+    Cross-encoder local em ONNX (ex.: mmarco-mMiniLMv2 ou ms-marco-MiniLM
+    quantizados). Cada par (consulta, texto) é tokenizado junto e o logit de
+    relevância é usado como score.
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        tokenizer_path: str | None = None,
+        max_batch_size: int = 16,
+        num_threads: int | None = None,
+        max_length: int = 256,
+    ):
+        ort, Tokenizer = _import_runtime()
+
+        model_dir = os.path.dirname(os.path.abspath(model_path))
+        self.max_batch_size = max_batch_size
+
+        tokenizer_path = tokenizer_path or os.path.join(model_dir, "tokenizer.json")
+        self.tokenizer = Tokenizer.from_file(tokenizer_path)
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = num_threads or os.cpu_count() or 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            model_path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        logger.info(f"Reranker local inicializado: {os.path.basename(model_dir)}/{os.path.basename(model_path)}")
+
+    def score_batch(self, query: str, texts: List[str]) -> List[float]:
+        encodings = self.tokenizer.encode_batch([(query, text) for text in texts])
+        ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        feeds = {
+            "input_ids": ids,
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+        }
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+        logits = self.session.run(None, feeds)[0]
+        # Saída (n, 1) com o logit de relevância ou (n, 2) com [irrelevante, relevante].
+        return logits.reshape(len(texts), -1)[:, -1].astype(float).tolist()
+
+
+class RerankingVectorStore(VectorStore):
+    """
+    Busca em dois estágios: o banco interno retorna `candidates` pontos e o
+    reranker reordena os candidatos antes do corte em `top_k`.
+
+    O reranking tem um orçamento de `budget_ms`, contado a partir do início
+    do estágio de reranking (depois da busca e do hydrate dos candidatos). Se
+    estourar, a consulta segue com a ordem da busca vetorial, para que o
+    reranker não aumente a latência de cauda. Em lote, as consultas vão juntas
+    para o pool e dividem um único prazo.
+    """
+
+    def __init__(
+        self,
+        inner: VectorStore,
+        reranker: Reranker,
+        candidates: int = 50,
+        budget_ms: float = 150,
+    ):
+        self.inner = inner
+        self.reranker = reranker
+        self.candidates = candidates
+        self.budget = budget_ms / 1000
+
+        self._lock = threading.Lock()
+        self.reranked = 0
+        self.fallbacks = 0
+        _STORES.add(self)
+
+    def embed_query(self, query: str) -> List[float]:
+        return self.inner.embed_query(query)
+
+    async def aembed_query(self, query: str) -> List[float]:
+        return await self.inner.aembed_query(query)
+
+    def search(self, query: str, top_k: int = 4, filters: SearchFilter | None = None) -> List[str]:
+        return self.search_by_vector(self.embed_query(query), top_k, query, filters)
+
+    async def asearch(self, query: str, top_k: int = 4, filters: SearchFilter | None = None) -> List[str]:
+        return await self.asearch_by_vector(await self.aembed_query(query), top_k, query, filters)
+
+    def search_by_vector(
+        self,
+        vector: List[float],
+        top_k: int = 4,
+        query: str | None = None,
+        filters: SearchFilter | None = None,
+    ) -> List[str]:
+        return [hit.text for hit in self.hydrate(self.search_hits(vector, top_k, query, filters))]
+
+    async def asearch_by_vector(
+        self,
+        vector: List[float],
+        top_k: int = 4,
+        query: str | None = None,
+        filters: SearchFilter | None = None,
+    ) -> List[str]:
+        return [hit.text for hit in await self.ahydrate(await self.asearch_hits(vector, top_k, query, filters))]
+
+    def search_hits(
+        self,
+        vector: List[float],
+        top_k: int = 4,
+        query: str | None = None,
+        filters: SearchFilter | None = None,
+    ) -> List[SearchHit]:
+        if not query:
+            return self.inner.search_hits(vector, top_k, filters=filters)
+
+        hits = self.inner.search_hits(vector, max(top_k, self.candidates), query, filters)
+        if len(hits) <= 1:
+            return hits[:top_k]
+        # O cross-encoder precisa do texto de todos os candidatos.
+        hits = self.inner.hydrate(hits)
+
+        started = time.monotonic()
+        future = self._submit(query, hits, started + self.budget)
+        wait([future], timeout=self.budget)
+        return self._collect(future, hits, top_k, started)
+
+    async def asearch_hits(
+        self,
+        vector: List[float],
+        top_k: int = 4,
+        query: str | None = None,
+        filters: SearchFilter | None = None,
+    ) -> List[SearchHit]:
+        if not query:
+            return await self.inner.asearch_hits(vector, top_k, filters=filters)
+
+        hits = await self.inner.asearch_hits(vector, max(top_k, self.candidates), query, filters)
+        if len(hits) <= 1:
+            return hits[:top_k]
+        return (await self._arerank([(query, await self.inner.ahydrate(hits))], top_k))[0]
+
+    async def aembed_queries(self, queries: List[str]) -> List[List[float]]:
+        return await self.inner.aembed_queries(queries)
+
+    async def asearch_hits_batch(
+        self,
+        vectors: List[List[float]],
+        top_k: int = 4,
+        queries: List[str] | None = None,
+        filters: SearchFilter | None = None,
+    ) -> List[List[SearchHit]]:
+        if not queries:
+            return await self.inner.asearch_hits_batch(vectors, top_k, filters=filters)
+
+        batch = await self.inner.asearch_hits_batch(vectors, max(top_k, self.candidates), queries, filters)
+        # Um único hydrate para os candidatos de todas as consultas.
+        await self.inner.ahydrate([hit for hits in batch for hit in hits])
+
+        results = [hits[:top_k] for hits in batch]
+        pending = [i for i, hits in enumerate(batch) if len(hits) > 1]
+        if pending:
+            reranked = await self._arerank([(queries[i], batch[i]) for i in pending], top_k)
+            for i, hits in zip(pending, reranked):
+                results[i] = hits
+        return results
+
+    async def _arerank(self, items: List[Tuple[str, List[SearchHit]]], top_k: int) -> List[List[SearchHit]]:
+        """Envia todas as consultas ao pool de uma vez, com um único prazo."""
+        started = time.monotonic()
+        deadline = started + self.budget
+        futures = [asyncio.wrap_future(self._submit(query, hits, deadline)) for query, hits in items]
+        await asyncio.wait(futures, timeout=self.budget)
+        return [self._collect(future, hits, top_k, started) for future, (_, hits) in zip(futures, items)]
+
+    def _submit(self, query: str, hits: List[SearchHit], deadline: float):
+        return _rerank_pool.submit(self.reranker.score, query, [h.text or "" for h in hits], deadline)
+
+    def _collect(self, future, hits: List[SearchHit], top_k: int, started: float) -> List[SearchHit]:
+        if not future.done():
+            # Cancela o que ainda não começou; o que está rodando para no
+            # próximo lote ao ver o prazo vencido.
+            future.cancel()
+            return self._fallback(hits, top_k, started)
+        try:
+            scores = future.result()
+        except BudgetExceeded:
+            return self._fallback(hits, top_k, started)
+        except Exception as e:
+            logger.error(f"Erro no reranking, usando a ordem vetorial: {e}")
+            return self._fallback(hits, top_k, started)
+        return self._apply(hits, scores, top_k)
+
+    def retrieve(self, ids: List[str]) -> List[SearchHit]:
+        return self.inner.retrieve(ids)
+
+    async def aretrieve(self, ids: List[str]) -> List[SearchHit]:
+        return await self.inner.aretrieve(ids)
+
+    def hydrate(self, hits: List[SearchHit]) -> List[SearchHit]:
+        return self.inner.hydrate(hits)
+
+    async def ahydrate(self, hits: List[SearchHit]) -> List[SearchHit]:
+        return await self.inner.ahydrate(hits)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"reranked": self.reranked, "fallbacks": self.fallbacks}
+
+    def _apply(self, hits: List[SearchHit], scores: List[float], top_k: int) -> List[SearchHit]:
+        with self._lock:
+            self.reranked += 1
+        order = np.argsort(-np.asarray(scores, dtype=np.float32), kind="stable")[:top_k]
+        return [
+            SearchHit(id=hits[i].id, score=float(scores[i]), payload=hits[i].payload, vector=hits[i].vector)
+            for i in order
+        ]
+
+    def _fallback(self, hits: List[SearchHit], top_k: int, started: float) -> List[SearchHit]:
+        with self._lock:
+            self.fallbacks += 1
+        elapsed = (time.monotonic() - started) * 1000
+        logger.warning(f"Reranking excedeu o orçamento ({elapsed:.0f} ms); usando a ordem vetorial.")
+        return hits[:top_k]
+
+
+_STORES: "weakref.WeakSet[RerankingVectorStore]" = weakref.WeakSet()
+
+
+def _rerank_stats():
+    stores = list(_STORES)
+    if not stores:
+        return
+    totals = {"reranked": 0, "fallbacks": 0}
+    for store in stores:
+        for key, value in store.stats().items():
+            totals[key] += value
+    yield "chiquinho_rerank_budget_seconds", "gauge", "Orçamento do reranking por consulta.", {}, max(s.budget for s in stores)
+    for outcome, key in (("reranked", "reranked"), ("fallback", "fallbacks")):
+        yield (
+            "chiquinho_rerank_queries_total", "counter",
+            "Consultas reordenadas pelo reranker ou que voltaram à ordem vetorial por estourar o orçamento.",
+            {"outcome": outcome}, totals[key],
+        )
+
+
+REGISTRY.add_collector(_rerank_stats)
@@ -0,0 +1,147 @@
+import asyncio
+import re
+import unicodedata
+from typing import AsyncIterator, Awaitable, Callable, Dict, Hashable, List, TypeVar
+
+T = TypeVar("T")
+
+_SPACES = re.compile(r"\s+")
+_EDGE_PUNCTUATION = " \t\n?!.,;:¿¡"
+
+
+def normalize_question(text: str) -> str:
+    """
+    Chave de coalescência de uma pergunta: Unicode NFKC, sem diferença de
+    maiúsculas, espaços colapsados e sem pontuação nas pontas ("Quando abre a
+    matrícula?" e "quando abre a  matrícula" viram a mesma chave).
+    """
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return _SPACES.sub(" ", text).strip(_EDGE_PUNCTUATION)
+
+
+class _Flight:
+    """Uma computação em voo; `chunks` é None quando ela não é em streaming."""
+
+    __slots__ = ("task", "chunks", "finished", "error", "changed")
+
+    def __init__(self, streaming: bool = False):
+        self.task: asyncio.Task | None = None
+        self.chunks: List | None = [] if streaming else None
+        self.finished = False
+        self.error: BaseException | None = None
+        self.changed = asyncio.Event()
+
+    def publish(self, chunk=None):
+        if chunk is not None:
+            self.chunks.append(chunk)
+        # Acorda quem está esperando e arma um novo evento para a próxima vez.
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+
+class SingleFlight:
+    """
+    Coalescência de chamadas assíncronas em voo: enquanto a computação de uma
+    chave não termina, novas chamadas com a mesma chave esperam por ela em vez
+    de começar outra, e todas recebem o mesmo resultado ou a mesma exceção.
+
+    A computação roda numa task própria: se quem a iniciou desistir (cliente
+    desconectado), os demais continuam esperando normalmente. Nada é guardado
+    depois que ela termina; reaproveitar respostas prontas é papel do cache.
+
+    `stream` faz o mesmo para geradores assíncronos: cada inscrito recebe os
+    pedaços desde o começo, inclusive os produzidos antes de ele chegar.
+    Chamadas comuns e em streaming com a mesma chave também se juntam: `do`
+    recebe o resultado final (`combine` dos pedaços) e `stream` recebe o
+    resultado de `do` como um único pedaço.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, _Flight] = {}
+        self._leaders = 0
+        self._coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        flight = self._inflight.get(key)
+        if flight is None:
+            flight = self._start(key, _Flight(), fn())
+        else:
+            self._coalesced += 1
+        return await asyncio.shield(flight.task)
+
+    async def follow(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Espera a computação em voo da chave, se houver; senão roda `fn` sem
+        registrá-la. Serve a chamadas de prioridade menor (lotes), que podem
+        aproveitar uma pergunta ao vivo sem que ela passe a esperar por elas.
+        """
+        flight = self._inflight.get(key)
+        if flight is None:
+            return await fn()
+        self._coalesced += 1
+        return await asyncio.shield(flight.task)
+
+    async def stream(
+        self,
+        key: Hashable,
+        fn: Callable[[], AsyncIterator[T]],
+        combine: Callable[[List[T]], object] = "".join,
+    ) -> AsyncIterator[T]:
+        flight = self._inflight.get(key)
+        if flight is None:
+            flight = _Flight(streaming=True)
+            self._start(key, flight, self._pump(flight, fn, combine))
+        else:
+            self._coalesced += 1
+            if flight.chunks is None:
+                yield await asyncio.shield(flight.task)
+                return
+
+        sent = 0
+        while True:
+            changed = flight.changed
+            if sent < len(flight.chunks):
+                sent += 1
+                yield flight.chunks[sent - 1]
+            elif flight.finished:
+                break
+            else:
+                await changed.wait()
+        if flight.error is not None:
+            raise flight.error
+
+    @staticmethod
+    async def _pump(flight: _Flight, fn: Callable[[], AsyncIterator[T]], combine):
+        try:
+            async for chunk in fn():
+                flight.publish(chunk)
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            flight.finished = True
+            flight.publish()
+        return combine(flight.chunks)
+
+    def _start(self, key: Hashable, flight: _Flight, coro: Awaitable) -> _Flight:
+        self._leaders += 1
+        flight.task = asyncio.ensure_future(coro)
+        self._inflight[key] = flight
+        flight.task.add_done_callback(lambda task: self._finish(key, flight))
+        return flight
+
+    def _finish(self, key: Hashable, flight: _Flight):
+        if self._inflight.get(key) is flight:
+            del self._inflight[key]
+        # Marca a exceção como lida mesmo que todos tenham desistido de esperar.
+        if not flight.task.cancelled():
+            flight.task.exception()
+
+    def stats(self) -> dict:
+        total = self._leaders + self._coalesced
+        return {
+            "in_flight": len(self._inflight),
+            "leaders": self._leaders,
+            "coalesced": self._coalesced,
+            "coalesced_rate": self._coalesced / total if total else 0.0,
+        }
@@ -1,10 +1,147 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import List
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import List, Tuple
+
+
+@dataclass
+class SearchHit:
+    """Um ponto retornado pela busca, com score e payload."""
+    id: str
+    score: float
+    payload: dict
+    vector: List[float] | None = None
+
+    @property
+    def text(self) -> str:
+        return self.payload.get("content_text", self.payload.get("excerpt"))
+
+
+@dataclass(frozen=True)
+class SearchFilter:
+    """
+    Filtros opcionais de busca: fontes (`source`) aceitas e intervalo fechado
+    de publicação (`published_at`). Campos vazios não restringem.
+    """
+    sources: Tuple[str, ...] = ()
+    date_from: date | None = None
+    date_to: date | None = None
+
+    def __bool__(self) -> bool:
+        return bool(self.sources or self.date_from or self.date_to)
+
+    def matches(self, payload: dict) -> bool:
+        if self.sources and payload.get("source") not in self.sources:
+            return False
+        if self.date_from or self.date_to:
+            published = payload.get("published_at")
+            if not published:
+                return False
+            day = datetime.fromisoformat(published.replace("Z", "+00:00")).date()
+            if self.date_from and day < self.date_from:
+                return False
+            if self.date_to and day > self.date_to:
+                return False
+        return True
 
 
 class VectorStore(ABC):
     """Classe abstrata para qualquer banco vetorial."""
 
     @abstractmethod
-    def search(self, query: str, top_k: int = 3) -> List[str]:
-        pass
\ No newline at end of file
+    def search(self, query: str, top_k: int = 3, filters: SearchFilter | None = None) -> List[str]:
+        pass
+
+    @abstractmethod
+    def embed_query(self, query: str) -> List[float]:
+        """Gera o vetor de consulta usado por search()."""
+        pass
+
+    @abstractmethod
+    def search_by_vector(
+        self,
+        vector: List[float],
+        top_k: int = 3,
+        query: str | None = None,
+        filters: SearchFilter | None = None,
+    ) -> List[str]:
+        """
+        Igual a search(), mas reaproveitando um vetor já calculado. O texto da
+        consulta, quando informado, é usado por buscas que não são só vetoriais.
+        """
+        pass
+
+    @abstractmethod
+    def search_hits(
+        self,
+        vector: List[float],
+        top_k: int = 3,
+        query: str | None = None,
+        filters: SearchFilter | None = None,
+    ) -> List[SearchHit]:
+        """Como search_by_vector(), mas retornando ids, scores e payloads."""
+        pass
+
+    @abstractmethod
+    def retrieve(self, ids: List[str]) -> List[SearchHit]:
+        """Busca pontos pelo id, na ordem pedida; ids inexistentes são omitidos."""
+        pass
+
+    def hydrate(self, hits: List[SearchHit]) -> List[SearchHit]:
+        """
+        Completa o payload (texto, título...) de hits retornados por search_hits()
+        e retrieve(), quando o banco guarda só vetores e campos de filtro.
+        """
+        return hits
+
+    # Variantes assíncronas. As padrões rodam as versões síncronas numa thread;
+    # implementações com cliente assíncrono nativo devem sobrescrevê-las.
+
+    async def asearch(self, query: str, top_k: int = 3, filters: SearchFilter | None = None) -> List[str]:
+        return await asyncio.to_thread(self.search, query, top_k, filters)
+
+    async def aembed_query(self, query: str) -> List[float]:
+        return await asyncio.to_thread(self.embed_query, query)
+
+    async def asearch_by_vector(
+        self,
+        vector: List[float],
+        top_k: int = 3,
+        query: str | None = None,
+        filters: SearchFilter | None = None,
+    ) -> List[str]:
+        return await asyncio.to_thread(self.search_by_vector, vector, top_k, query, filters)
+
+    async def asearch_hits(
+        self,
+        vector: List[float],
+        top_k: int = 3,
+        query: str | None = None,
+        filters: SearchFilter | None = None,
+    ) -> List[SearchHit]:
+        return await asyncio.to_thread(self.search_hits, vector, top_k, query, filters)
+
+    async def aretrieve(self, ids: List[str]) -> List[SearchHit]:
+        return await asyncio.to_thread(self.retrieve, ids)
+
+    async def ahydrate(self, hits: List[SearchHit]) -> List[SearchHit]:
+        return await asyncio.to_thread(self.hydrate, hits)
+
+    # Variantes em lote. As padrões fazem uma chamada por consulta;
+    # implementações com suporte nativo a lotes devem sobrescrevê-las.
+
+    async def aembed_queries(self, queries: List[str]) -> List[List[float]]:
+        return list(await asyncio.gather(*(self.aembed_query(q) for q in queries)))
+
+    async def asearch_hits_batch(
+        self,
+        vectors: List[List[float]],
+        top_k: int = 3,
+        queries: List[str] | None = None,
+        filters: SearchFilter | None = None,
+    ) -> List[List[SearchHit]]:
+        queries = queries or [None] * len(vectors)
+        return list(await asyncio.gather(*(
+            self.asearch_hits(vector, top_k, query, filters) for vector, query in zip(vectors, queries)
+        )))
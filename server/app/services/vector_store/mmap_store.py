@@ -0,0 +1,374 @@
+import argparse
+import json
+import logging
+import os
+import zlib
+from typing import Iterable, List, Literal, Tuple
+
+import numpy as np
+
+from app.services.embedder.base import Embedder
+from app.services.embedder.cache import EmbeddingCache
+from app.services.metrics import stage_timer
+from app.services.document_store import DocumentStore
+from app.services.vector_store.base import SearchFilter, SearchHit, VectorStore
+
+logger = logging.getLogger(__name__)
+
+Quantization = Literal["float32", "int8"]
+
+# Linhas pontuadas por vez na busca exata, para limitar a memória temporária
+# da conversão int8 -> float32.
+SCORE_BLOCK_ROWS = 65536
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.clip(norms, 1e-12, None)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    idx = np.argpartition(-scores, k - 1)[:k]
+    return idx[np.argsort(-scores[idx])]
+
+
+def _map(path: str, dtype, shape=None) -> np.ndarray:
+    """np.memmap somente leitura; arquivos vazios viram arrays vazios."""
+    if not os.path.getsize(path):
+        return np.empty(shape if shape else 0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=shape)
+
+
+def _kmeans(sample: np.ndarray, n_lists: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """K-means esférico simples, suficiente para particionar o índice IVF."""
+    rng = np.random.default_rng(seed)
+    centroids = sample[rng.choice(sample.shape[0], n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(sample @ centroids.T, axis=1)
+        for c in range(n_lists):
+            members = sample[assign == c]
+            if len(members):
+                centroids[c] = members.mean(axis=0)
+        centroids = _normalize_rows(centroids)
+    return centroids.astype(np.float32)
+
+
+class MmapIndexWriter:
+    """
+    Escreve um índice para o MmapVectorStore em streaming.
+
+    Arquivos gerados em `path`:
+      - vectors.f32 | vectors.i8 (+ scales.f32): matriz de vetores normalizados
+      - payloads.bin + offsets.u64: payloads JSON comprimidos com zlib
+      - ids.json: ids originais dos pontos
+      - ivf_*.{f32,u32,u64}: partição IVF opcional (modo aproximado)
+      - meta.json
+    """
+
+    def __init__(self, path: str, quantization: Quantization = "float32"):
+        self.path = path
+        self.quantization = quantization
+        os.makedirs(path, exist_ok=True)
+
+        ext = "i8" if quantization == "int8" else "f32"
+        self._vectors = open(os.path.join(path, f"vectors.{ext}"), "wb")
+        self._scales = open(os.path.join(path, "scales.f32"), "wb") if quantization == "int8" else None
+        self._payloads = open(os.path.join(path, "payloads.bin"), "wb")
+        self._offsets = [0]
+        self._ids: List = []
+        self.dim: int | None = None
+
+    def add(self, point_id, vector: List[float], payload: dict):
+        vec = np.asarray(vector, dtype=np.float32).reshape(1, -1)
+        if self.dim is None:
+            self.dim = vec.shape[1]
+        elif vec.shape[1] != self.dim:
+            raise ValueError(f"Vetor com dimensão {vec.shape[1]}, esperado {self.dim}")
+
+        vec = _normalize_rows(vec)[0]
+        if self._scales is not None:
+            scale = max(float(np.abs(vec).max()) / 127.0, 1e-12)
+            self._vectors.write(np.round(vec / scale).astype(np.int8).tobytes())
+            self._scales.write(np.float32(scale).tobytes())
+        else:
+            self._vectors.write(vec.tobytes())
+
+        blob = zlib.compress(json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+        self._payloads.write(blob)
+        self._offsets.append(self._offsets[-1] + len(blob))
+        self._ids.append(point_id)
+
+    def close(self, ivf_lists: int = 0):
+        self._vectors.close()
+        self._payloads.close()
+        if self._scales is not None:
+            self._scales.close()
+
+        np.asarray(self._offsets, dtype=np.uint64).tofile(os.path.join(self.path, "offsets.u64"))
+        with open(os.path.join(self.path, "ids.json"), "w", encoding="utf-8") as f:
+            json.dump([str(i) for i in self._ids], f)
+
+        meta = {
+            "dim": self.dim or 0,
+            "count": len(self._ids),
+            "quantization": self.quantization,
+            "ivf_lists": 0,
+        }
+        with open(os.path.join(self.path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+        if ivf_lists and len(self._ids) > ivf_lists:
+            self._build_ivf(meta, ivf_lists)
+
+    def _build_ivf(self, meta: dict, n_lists: int):
+        store = MmapVectorStore(self.path, embedder=None)
+        rng = np.random.default_rng(0)
+        sample_rows = np.sort(rng.choice(store.count, min(store.count, n_lists * 64), replace=False))
+        centroids = _kmeans(store._rows(sample_rows), n_lists)
+
+        assign = np.empty(store.count, dtype=np.int64)
+        for start in range(0, store.count, SCORE_BLOCK_ROWS):
+            rows = np.arange(start, min(start + SCORE_BLOCK_ROWS, store.count))
+            assign[rows] = np.argmax(store._rows(rows) @ centroids.T, axis=1)
+
+        order = np.argsort(assign, kind="stable").astype(np.uint32)
+        counts = np.bincount(assign, minlength=n_lists)
+        offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.uint64)
+
+        centroids.tofile(os.path.join(self.path, "ivf_centroids.f32"))
+        order.tofile(os.path.join(self.path, "ivf_order.u32"))
+        offsets.tofile(os.path.join(self.path, "ivf_offsets.u64"))
+
+        meta["ivf_lists"] = n_lists
+        with open(os.path.join(self.path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+
+class MmapVectorStore(VectorStore):
+    """
+    Banco vetorial em processo, lido de arquivos mapeados em memória.
+
+    Os arquivos são abertos somente leitura com np.memmap, então vários
+    workers que abrem o mesmo índice compartilham as páginas pelo cache do
+    sistema operacional, sem cópia. A busca exata é um produto matriz-vetor
+    vetorizado; com `approximate=True` e um índice IVF, só as `nprobe`
+    partições mais próximas da consulta são pontuadas.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        embedder: Embedder | None,
+        query_cache: EmbeddingCache | None = None,
+        approximate: bool = False,
+        nprobe: int = 8,
+        document_store: DocumentStore | None = None,
+        with_vectors: bool = False,
+    ):
+        self.path = path
+        self.document_store = document_store
+        self.with_vectors = with_vectors
+        self.embedder = embedder
+        self.query_cache = query_cache
+        self.model_name = getattr(embedder, "model_name", type(embedder).__name__)
+        self.nprobe = nprobe
+
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        self.dim = meta["dim"]
+        self.count = meta["count"]
+        self.quantization = meta["quantization"]
+
+        shape = (self.count, self.dim)
+        if self.quantization == "int8":
+            self._matrix = _map(os.path.join(path, "vectors.i8"), np.int8, shape)
+            self._scales = _map(os.path.join(path, "scales.f32"), np.float32)
+        else:
+            self._matrix = _map(os.path.join(path, "vectors.f32"), np.float32, shape)
+            self._scales = None
+
+        self._payloads = _map(os.path.join(path, "payloads.bin"), np.uint8)
+        self._offsets = np.fromfile(os.path.join(path, "offsets.u64"), dtype=np.uint64)
+        with open(os.path.join(path, "ids.json"), encoding="utf-8") as f:
+            self.ids = json.load(f)
+        self._rows_by_id: dict | None = None
+
+        self.approximate = approximate and meta.get("ivf_lists", 0) > 0
+        if approximate and not self.approximate:
+            logger.warning("Índice sem partição IVF; usando busca exata.")
+        if self.approximate:
+            self._centroids = np.fromfile(os.path.join(path, "ivf_centroids.f32"), dtype=np.float32).reshape(-1, self.dim)
+            self._ivf_order = _map(os.path.join(path, "ivf_order.u32"), np.uint32)
+            self._ivf_offsets = np.fromfile(os.path.join(path, "ivf_offsets.u64"), dtype=np.uint64)
+
+    @classmethod
+    def build(
+        cls,
+        path: str,
+        points: Iterable[Tuple[object, List[float], dict]],
+        quantization: Quantization = "float32",
+        ivf_lists: int = 0,
+    ) -> str:
+        """Grava um índice a partir de (id, vetor, payload) e retorna o caminho."""
+        writer = MmapIndexWriter(path, quantization=quantization)
+        for point_id, vector, payload in points:
+            writer.add(point_id, vector, payload)
+        writer.close(ivf_lists=ivf_lists)
+        return path
+
+    def embed_query(self, query: str) -> List[float]:
+        if self.query_cache is None:
+            return self.embedder.embed_text(query)
+        return self.query_cache.get_or_embed(self.model_name, query, self.embedder.embed_text)
+
+    def search(self, query: str, top_k: int = 4, filters: SearchFilter | None = None) -> List[str]:
+        return self.search_by_vector(self.embed_query(query), top_k, query, filters)
+
+    def search_by_vector(
+        self,
+        vector: List[float],
+        top_k: int = 4,
+        query: str | None = None,
+        filters: SearchFilter | None = None,
+    ) -> List[str]:
+        return [hit.text for hit in self.hydrate(self.search_hits(vector, top_k, filters=filters))]
+
+    def search_hits(
+        self,
+        vector: List[float],
+        top_k: int = 4,
+        query: str | None = None,
+        filters: SearchFilter | None = None,
+    ) -> List[SearchHit]:
+        with stage_timer("search"):
+            return self._search_hits(vector, top_k, filters)
+
+    def _search_hits(self, vector: List[float], top_k: int, filters: SearchFilter | None) -> List[SearchHit]:
+        if not filters:
+            return [self._hit(row, score, self.payload(row)) for row, score in self.search_rows(vector, top_k)]
+
+        # Sem índice de payload: busca cada vez mais candidatos e filtra até
+        # completar top_k ou esgotar o índice. No modo IVF, quando as partições
+        # sondadas se esgotam, sonda mais partições (até a busca exata).
+        limit, nprobe = top_k * 8, self.nprobe
+        while True:
+            hits = []
+            rows = self.search_rows(vector, limit, nprobe)
+            for row, score in rows:
+                payload = self.payload(row)
+                if filters.matches(payload):
+                    hits.append(self._hit(row, score, payload))
+                    if len(hits) == top_k:
+                        return hits
+            if len(rows) == limit:
+                limit *= 4
+            elif self.approximate and nprobe < len(self._centroids):
+                nprobe *= 4
+            else:
+                return hits
+
+    def retrieve(self, ids: List[str]) -> List[SearchHit]:
+        if self._rows_by_id is None:
+            self._rows_by_id = {point_id: row for row, point_id in enumerate(self.ids)}
+        rows = [self._rows_by_id.get(str(i)) for i in ids]
+        return [self._hit(row, 0.0, self.payload(row)) for row in rows if row is not None]
+
+    def hydrate(self, hits: List[SearchHit]) -> List[SearchHit]:
+        if self.document_store is None:
+            return hits
+        return self.document_store.hydrate(hits)
+
+    def search_rows(self, vector: List[float], top_k: int = 4, nprobe: int | None = None) -> List[Tuple[int, float]]:
+        """
+        Retorna (linha, score) dos `top_k` vetores mais similares. No modo IVF,
+        `nprobe` substitui o número de partições sondadas.
+        """
+        if not self.count:
+            return []
+
+        q = np.asarray(vector, dtype=np.float32)
+        q = q / max(float(np.linalg.norm(q)), 1e-12)
+
+        nprobe = self.nprobe if nprobe is None else nprobe
+        if self.approximate and nprobe < len(self._centroids):
+            rows = self._probe_rows(q, nprobe)
+        else:
+            rows = None
+
+        if rows is None:
+            scores = np.empty(self.count, dtype=np.float32)
+            for start in range(0, self.count, SCORE_BLOCK_ROWS):
+                end = min(start + SCORE_BLOCK_ROWS, self.count)
+                scores[start:end] = self._rows(slice(start, end)) @ q
+            best = _top_k(scores, top_k)
+            return [(int(r), float(scores[r])) for r in best]
+
+        scores = self._rows(rows) @ q
+        best = _top_k(scores, top_k)
+        return [(int(rows[i]), float(scores[i])) for i in best]
+
+    def payload(self, row: int) -> dict:
+        start, end = int(self._offsets[row]), int(self._offsets[row + 1])
+        return json.loads(zlib.decompress(self._payloads[start:end].tobytes()))
+
+    def _hit(self, row: int, score: float, payload: dict) -> SearchHit:
+        vector = self._rows([row])[0].tolist() if self.with_vectors else None
+        return SearchHit(id=self.ids[row], score=score, payload=payload, vector=vector)
+
+    def _probe_rows(self, q: np.ndarray, nprobe: int) -> np.ndarray:
+        lists = _top_k(self._centroids @ q, nprobe)
+        parts = [
+            self._ivf_order[int(self._ivf_offsets[c]):int(self._ivf_offsets[c + 1])]
+            for c in lists
+        ]
+        return np.sort(np.concatenate(parts).astype(np.int64))
+
+    def _rows(self, rows) -> np.ndarray:
+        block = np.asarray(self._matrix[rows], dtype=np.float32)
+        if self._scales is not None:
+            block = block * np.asarray(self._scales[rows], dtype=np.float32)[:, None]
+        return block
+
+
+def export_from_qdrant(client, collection_name: str, path: str, quantization: Quantization = "float32", ivf_lists: int = 0) -> str:
+    """Copia todos os pontos de uma coleção do Qdrant para um índice mmap."""
+    def points():
+        offset = None
+        while True:
+            records, offset = client.scroll(
+                collection_name=collection_name,
+                limit=512,
+                offset=offset,
+                with_payload=True,
+                with_vectors=True,
+            )
+            for rec in records:
+                yield rec.id, rec.vector, rec.payload or {}
+            if offset is None:
+                break
+
+    return MmapVectorStore.build(path, points(), quantization=quantization, ivf_lists=ivf_lists)
+
+
+def main():
+    from app.dependencies import get_qdrant_clients
+
+    parser = argparse.ArgumentParser(description="Exporta a coleção do Qdrant para um índice mmap local.")
+    parser.add_argument("--output", required=True, help="Pasta de destino do índice.")
+    parser.add_argument("--collection", default="ChiquinhoAI")
+    parser.add_argument("--quantization", choices=["float32", "int8"], default="float32")
+    parser.add_argument("--ivf-lists", type=int, default=0, help="Partições IVF (0 = só busca exata).")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    clients = get_qdrant_clients()
+
+    export_from_qdrant(clients.sync, args.collection, args.output, args.quantization, args.ivf_lists)
+    logger.info(f"Índice mmap gravado em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
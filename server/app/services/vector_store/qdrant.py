@@ -1,8 +1,167 @@
-from typing import List
-from qdrant_client import QdrantClient
+import asyncio
+import logging
+import threading
+from datetime import datetime, time, timezone
+from typing import Dict, List, Tuple
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.http import models
 from qdrant_client.http.models import VectorParams, Distance, PointStruct
-from app.services.vector_store.base import VectorStore
+from app.services.vector_store.base import SearchFilter, SearchHit, VectorStore
 from app.services.embedder.base import Embedder
+from app.services.embedder.cache import EmbeddingCache
+from app.services.document_store import DocumentStore
+from app.services.metrics import stage_timer
+
+logger = logging.getLogger(__name__)
+
+# Índices de payload usados pelos filtros de busca.
+PAYLOAD_INDEXES = {
+    "source": models.PayloadSchemaType.KEYWORD,
+    "published_at": models.PayloadSchemaType.DATETIME,
+}
+
+
+def to_qdrant_filter(filters: SearchFilter | None) -> models.Filter | None:
+    if not filters:
+        return None
+
+    must = []
+    if filters.sources:
+        must.append(models.FieldCondition(key="source", match=models.MatchAny(any=list(filters.sources))))
+    if filters.date_from or filters.date_to:
+        must.append(models.FieldCondition(
+            key="published_at",
+            range=models.DatetimeRange(
+                gte=datetime.combine(filters.date_from, time.min, timezone.utc) if filters.date_from else None,
+                lte=datetime.combine(filters.date_to, time.max, timezone.utc) if filters.date_to else None,
+            ),
+        ))
+    return models.Filter(must=must)
+
+
+def ensure_payload_indexes(client: QdrantClient, collection_name: str, indexes: dict = PAYLOAD_INDEXES):
+    """Cria os índices de payload que ainda não existem na coleção."""
+    existing = client.get_collection(collection_name).payload_schema or {}
+    for field, schema in indexes.items():
+        if field not in existing:
+            client.create_payload_index(collection_name, field_name=field, field_schema=schema)
+            logger.info(f"Índice de payload criado: {field} ({schema.value})")
+
+
+class _LocalAsyncClient:
+    """
+    Interface assíncrona sobre o cliente síncrono do Qdrant embutido: cada
+    método roda numa thread, com o mesmo armazenamento do cliente síncrono.
+    """
+
+    def __init__(self, client: QdrantClient):
+        self._client = client
+
+    def __getattr__(self, name):
+        method = getattr(self._client, name)
+        if not callable(method):
+            return method
+
+        async def call(*args, **kwargs):
+            return await asyncio.to_thread(method, *args, **kwargs)
+        return call
+
+    async def close(self):
+        # Quem fecha o armazenamento é o cliente síncrono.
+        pass
+
+
+class QdrantClients:
+    """
+    Clientes síncrono e assíncrono do Qdrant compartilhados por busca e
+    ingestão, com pool de conexões (HTTP ou gRPC) aberto uma vez por processo.
+
+    Com `location` (ex.: ":memory:"), o Qdrant embutido guarda os dados no
+    próprio objeto do cliente; o cliente assíncrono passa então a usar o
+    síncrono por baixo, para que busca e ingestão vejam a mesma coleção.
+
+    Também guarda as coleções já verificadas, para que `collection_exists`,
+    a checagem de dimensão e os índices de payload não sejam repetidos a cada
+    instância ou job de ingestão.
+    """
+
+    def __init__(
+        self,
+        url: str | None = None,
+        api_key: str | None = None,
+        prefer_grpc: bool = False,
+        grpc_port: int = 6334,
+        pool_size: int | None = None,
+        timeout: int | None = None,
+        location: str | None = None,
+    ):
+        # `location` (ex.: ":memory:") usa o Qdrant embutido, sem servidor.
+        options = dict(
+            url=None if location else url,
+            location=location,
+            api_key=api_key or None,
+            prefer_grpc=prefer_grpc,
+            grpc_port=grpc_port,
+            pool_size=pool_size,
+            timeout=timeout,
+            check_compatibility=False,
+        )
+        self.sync = QdrantClient(**options)
+        self.aio = _LocalAsyncClient(self.sync) if location else AsyncQdrantClient(**options)
+
+        # coleção -> dimensão dos vetores (None se não for possível ler)
+        self._collections: Dict[str, int | None] = {}
+        self._lock = threading.Lock()
+
+    def collection_exists(self, collection_name: str) -> bool:
+        if collection_name in self._collections:
+            return True
+        return self.sync.collection_exists(collection_name)
+
+    def ensure_collection(
+        self,
+        collection_name: str,
+        vector_size: int,
+        payload_indexes: dict | None = PAYLOAD_INDEXES,
+    ) -> int | None:
+        """
+        Cria a coleção (e os índices de payload) se preciso, uma única vez por
+        processo. Retorna a dimensão dos vetores da coleção.
+        """
+        if collection_name in self._collections:
+            return self._collections[collection_name]
+
+        with self._lock:
+            if collection_name in self._collections:
+                return self._collections[collection_name]
+
+            if not self.sync.collection_exists(collection_name):
+                self.sync.create_collection(
+                    collection_name=collection_name,
+                    vectors_config=VectorParams(size=vector_size, distance=Distance.COSINE),
+                )
+                logger.info(f"Coleção '{collection_name}' criada com dimensão={vector_size}")
+            if payload_indexes:
+                ensure_payload_indexes(self.sync, collection_name, payload_indexes)
+
+            vectors = self.sync.get_collection(collection_name).config.params.vectors
+            size = getattr(vectors, "size", None)
+            self._collections[collection_name] = size
+            return size
+
+    def delete_collection(self, collection_name: str):
+        with self._lock:
+            self._collections.pop(collection_name, None)
+            self.sync.delete_collection(collection_name)
+
+    async def awarmup(self):
+        """Abre as conexões do cliente assíncrono antes do primeiro request."""
+        await self.aio.get_collections()
+
+    async def aclose(self):
+        await self.aio.close()
+        self.sync.close()
+
 
 class QdrantVectorStore(VectorStore):
     def __init__(
@@ -11,51 +170,239 @@ class QdrantVectorStore(VectorStore):
         embedder: Embedder,
         api_key: str | None = None,
         collection_name: str = "ChiquinhoAI",
-        embedding_size: int = 768,
+        embedding_size: int | None = None,
+        query_cache: EmbeddingCache | None = None,
+        document_store: DocumentStore | None = None,
+        clients: QdrantClients | None = None,
+        with_vectors: bool = False,
     ):
         self.collection_name = collection_name
-        self.embedding_size = embedding_size
+        self.document_store = document_store
+        # Devolve o embedding de cada ponto nos hits (usado pelo ContextPacker
+        # para a similaridade entre chunks).
+        self.with_vectors = with_vectors
+        self.embedding_size = embedding_size or embedder.dimension
         self.embedder = embedder
+        self.query_cache = query_cache
+        self.model_name = getattr(embedder, "model_name", type(embedder).__name__)
 
-        self.qdrant = QdrantClient(
-            url=url,
-            api_key=api_key or None,
-            check_compatibility=False
-        )
+        self.clients = clients or QdrantClients(url=url, api_key=api_key)
+        self.qdrant = self.clients.sync
+        self.aqdrant = self.clients.aio
 
-        if not self.qdrant.collection_exists(self.collection_name):
-            self.qdrant.create_collection(
-                collection_name=self.collection_name,
-                vectors_config=VectorParams(
-                    size=self.embedding_size,
-                    distance=Distance.COSINE
-                ),
+        if not self.embedding_size:
+            raise ValueError("Não foi possível determinar a dimensão dos embeddings.")
+
+        size = self.clients.ensure_collection(self.collection_name, self.embedding_size)
+        self._check_dimension(size)
+
+    def _check_dimension(self, size: int | None):
+        if size is not None and size != self.embedding_size:
+            logger.error(
+                f"A coleção '{self.collection_name}' tem dimensão {size}, mas o embedder "
+                f"'{self.model_name}' gera vetores de dimensão {self.embedding_size}. "
+                "Recrie a coleção (python -m app.ingest --recreate)."
             )
 
     def embed(self, text: str) -> List[float]:
         return self.embedder.embed_text(text)
 
     def add_document(self, doc_id: str, text: str):
-        vector = self.embed(text)
+        self.add_documents([(doc_id, text)])
 
-        point = PointStruct(
-            id=doc_id,
-            vector=vector,
-            payload={"text": text},
-        )
+    def add_documents(self, docs: List[Tuple[str, str]]) -> List[str]:
+        """Insere vários (id, texto) com um único lote de embeddings.
 
-        self.qdrant.upsert(
-            collection_name=self.collection_name,
-            points=[point]
-        )
+        Retorna os ids que não puderam ser inseridos por falha no embedding.
+        """
+        vectors = self.embedder.embed_texts([text for _, text in docs])
+
+        points = []
+        failed = []
+        for (doc_id, text), vector in zip(docs, vectors):
+            if not vector:
+                logger.error(f"Falha ao gerar embedding do documento {doc_id}.")
+                failed.append(doc_id)
+                continue
+            points.append(PointStruct(id=doc_id, vector=vector, payload={"text": text}))
+
+        if points:
+            self.qdrant.upsert(
+                collection_name=self.collection_name,
+                points=points
+            )
+
+        return failed
+
+    def embed_query(self, query: str) -> List[float]:
+        if self.query_cache is None:
+            return self.embed(query)
+        return self.query_cache.get_or_embed(self.model_name, query, self.embed)
+
+    async def aembed_query(self, query: str) -> List[float]:
+        if self.query_cache is None:
+            return await self.embedder.aembed_text(query)
+        return await self.query_cache.aget_or_embed(self.model_name, query, self.embedder.aembed_text)
+
+    def search(self, query: str, top_k: int = 4, filters: SearchFilter | None = None):
+        return self.search_by_vector(self.embed_query(query), top_k, query, filters)
+
+    async def asearch(self, query: str, top_k: int = 4, filters: SearchFilter | None = None):
+        return await self.asearch_by_vector(await self.aembed_query(query), top_k, query, filters)
+
+    def search_by_vector(
+        self,
+        vector: List[float],
+        top_k: int = 4,
+        query: str | None = None,
+        filters: SearchFilter | None = None,
+    ):
+        return [hit.text for hit in self.hydrate(self.search_hits(vector, top_k, filters=filters))]
+
+    async def asearch_by_vector(
+        self,
+        vector: List[float],
+        top_k: int = 4,
+        query: str | None = None,
+        filters: SearchFilter | None = None,
+    ):
+        return [hit.text for hit in await self.ahydrate(await self.asearch_hits(vector, top_k, filters=filters))]
+
+    def search_hits(
+        self,
+        vector: List[float],
+        top_k: int = 4,
+        query: str | None = None,
+        filters: SearchFilter | None = None,
+    ) -> List[SearchHit]:
+        with stage_timer("search"):
+            result = self.qdrant.query_points(
+                collection_name=self.collection_name,
+                query=vector,
+                query_filter=to_qdrant_filter(filters),
+                limit=top_k,
+                with_vectors=self.with_vectors,
+            )
+        return self._hits(result.points)
+
+    async def asearch_hits(
+        self,
+        vector: List[float],
+        top_k: int = 4,
+        query: str | None = None,
+        filters: SearchFilter | None = None,
+    ) -> List[SearchHit]:
+        with stage_timer("search"):
+            result = await self.aqdrant.query_points(
+                collection_name=self.collection_name,
+                query=vector,
+                query_filter=to_qdrant_filter(filters),
+                limit=top_k,
+                with_vectors=self.with_vectors,
+            )
+        return self._hits(result.points)
+
+    async def aembed_queries(self, queries: List[str]) -> List[List[float]]:
+        """Embeda as consultas que não estão no cache numa única chamada em lote."""
+        vectors: List[List[float] | None] = [None] * len(queries)
+        if self.query_cache is not None:
+            vectors = await self.query_cache.aget_many(self.model_name, queries)
+
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            embedded = await self.embedder.aembed_texts([queries[i] for i in missing])
+            for i, vector in zip(missing, embedded):
+                vectors[i] = vector
+            if self.query_cache is not None:
+                await self.query_cache.aput_many(
+                    self.model_name, [(queries[i], vector) for i, vector in zip(missing, embedded)]
+                )
+        return vectors
+
+    async def asearch_hits_batch(
+        self,
+        vectors: List[List[float]],
+        top_k: int = 4,
+        queries: List[str] | None = None,
+        filters: SearchFilter | None = None,
+    ) -> List[List[SearchHit]]:
+        if not vectors:
+            return []
+        query_filter = to_qdrant_filter(filters)
+        with stage_timer("search"):
+            results = await self.aqdrant.query_batch_points(
+                collection_name=self.collection_name,
+                requests=[
+                    models.QueryRequest(
+                        query=vector, filter=query_filter, limit=top_k, with_payload=True, with_vector=self.with_vectors
+                    )
+                    for vector in vectors
+                ],
+            )
+        return [self._hits(result.points) for result in results]
 
-    def search(self, query: str, top_k: int = 4):
-        vector = self.embed(query)
+    def retrieve(self, ids: List[str]) -> List[SearchHit]:
+        records = self.qdrant.retrieve(collection_name=self.collection_name, ids=ids, with_vectors=self.with_vectors)
+        return self._ordered(records, ids)
 
-        result = self.qdrant.query_points(
-            collection_name=self.collection_name,
-            query=vector,
-            limit=top_k
+    async def aretrieve(self, ids: List[str]) -> List[SearchHit]:
+        records = await self.aqdrant.retrieve(
+            collection_name=self.collection_name, ids=ids, with_vectors=self.with_vectors
         )
+        return self._ordered(records, ids)
+
+    def hydrate(self, hits: List[SearchHit]) -> List[SearchHit]:
+        if self.document_store is None:
+            return hits
+        return self.document_store.hydrate(hits)
+
+    async def ahydrate(self, hits: List[SearchHit]) -> List[SearchHit]:
+        if self.document_store is None:
+            return hits
+        return await asyncio.to_thread(self.document_store.hydrate, hits)
+
+    @staticmethod
+    def _hits(points) -> List[SearchHit]:
+        return [
+            SearchHit(id=str(p.id), score=p.score, payload=p.payload or {}, vector=p.vector)
+            for p in points
+        ]
+
+    @staticmethod
+    def _ordered(records, ids: List[str]) -> List[SearchHit]:
+        by_id = {str(r.id): r for r in records}
+        return [
+            SearchHit(id=str(i), score=0.0, payload=by_id[str(i)].payload or {}, vector=by_id[str(i)].vector)
+            for i in ids if str(i) in by_id
+        ]
+
+
+def main():
+    import argparse
+    from app.config import get_settings
+    from app.dependencies import get_embedder, get_qdrant_clients
+
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Cria a coleção do Qdrant e os índices de payload, se preciso.")
+    parser.add_argument("--collection", default="ChiquinhoAI")
+    parser.add_argument(
+        "--dimension", type=int, default=settings.embedding_dimension,
+        help="Dimensão dos embeddings (padrão: EMBEDDING_DIMENSION ou a do embedder configurado, como no server).",
+    )
+    args = parser.parse_args()
+    args.dimension = args.dimension or get_embedder().dimension
+    if not args.dimension:
+        parser.error("não foi possível determinar a dimensão; informe --dimension ou EMBEDDING_DIMENSION.")
+
+    logging.basicConfig(level=logging.INFO)
+    clients = get_qdrant_clients()
+    size = clients.ensure_collection(args.collection, args.dimension)
+    if size is not None and size != args.dimension:
+        logger.warning(f"A coleção '{args.collection}' tem dimensão {size}, esperado {args.dimension}.")
+    else:
+        logger.info(f"Coleção '{args.collection}' pronta (dimensão {args.dimension}).")
+    clients.sync.close()
+
 
-        return [hit.payload.get("content_text", hit.payload.get("excerpt")) for hit in result.points]
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Compara o divisor antigo (split_text, 3500 caracteres) com o chunker por frases.
+
+Para cada estratégia mede: número de chunks, tokens embedados (custo de
+embedding), tokens enviados ao LLM com top_k chunks, chunks que terminam no
+meio de uma palavra e a taxa de acerto da recuperação.
+
+A taxa de acerto usa perguntas sintéticas: para frases sorteadas do corpus, a
+consulta é um trecho de palavras do meio da frase, e há acerto se algum dos
+top_k chunks recuperados contém a frase inteira. Por padrão a recuperação é
+BM25 (offline); com --dense usa o embedder configurado no .env.
+
+    python -m benchmarks.chunking
+    python -m benchmarks.chunking --dense --queries 100 --json resultado.json
+"""
+import argparse
+import json
+import os
+import random
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from app.ingest import MAX_CHARS, split_text
+from app.services.chunker import approx_tokens, iter_chunks, iter_sentences
+from app.services.retrieval.bm25 import BM25Index
+
+WEBSCRAPER = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "..", "webscraper"))
+
+
+def load_texts(paths: List[str]) -> List[str]:
+    texts = []
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            for d in json.load(f):
+                text = f"{d.get('title') or ''}\n\n{d.get('content_text') or ''}".strip()
+                if text:
+                    texts.append(text)
+    return texts
+
+
+def make_queries(texts: List[str], n: int, seed: int = 7) -> List[Dict[str, str]]:
+    rng = random.Random(seed)
+    sentences = [s for text in texts for _, s in iter_sentences(text) if len(s.split()) >= 12]
+    queries = []
+    for sentence in rng.sample(sentences, min(n, len(sentences))):
+        words = sentence.split()
+        start = rng.randrange(2, len(words) - 8)
+        queries.append({"query": " ".join(words[start:start + 6]), "sentence": sentence})
+    return queries
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split())
+
+
+def lexical_retriever(chunks: List[str]) -> Callable[[str, int], List[int]]:
+    index = BM25Index()
+    index.add_many((str(i), chunk) for i, chunk in enumerate(chunks))
+    return lambda query, k: [int(doc) for doc, _ in index.search(query, k)]
+
+
+def dense_retriever(chunks: List[str]) -> Callable[[str, int], List[int]]:
+    from app.dependencies import get_embedder
+
+    embedder = get_embedder()
+    matrix = np.asarray(embedder.embed_texts(chunks), dtype=np.float32)
+    matrix /= np.clip(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12, None)
+
+    def search(query: str, k: int) -> List[int]:
+        q = np.asarray(embedder.embed_text(query), dtype=np.float32)
+        return list(np.argsort(-(matrix @ q))[:k])
+
+    return search
+
+
+def evaluate(name: str, chunker, texts, queries, top_k: int, retriever_factory) -> dict:
+    started = time.perf_counter()
+    chunks = [chunk for text in texts for chunk in chunker(text)]
+    elapsed = time.perf_counter() - started
+
+    tokens = [approx_tokens(c) for c in chunks]
+    mid_word = sum(1 for c in chunks if len(c) >= MAX_CHARS and c[-1].isalnum())
+
+    search = retriever_factory(chunks)
+    normalized = [_normalize(c) for c in chunks]
+    hits = 0
+    for q in queries:
+        sentence = _normalize(q["sentence"])
+        hits += any(sentence in normalized[i] for i in search(q["query"], top_k))
+
+    return {
+        "strategy": name,
+        "chunks": len(chunks),
+        "avg_tokens_per_chunk": round(float(np.mean(tokens)), 1) if tokens else 0,
+        "embedded_tokens": int(sum(tokens)),
+        "prompt_tokens_at_top_k": round(float(np.mean(tokens)) * top_k, 1) if tokens else 0,
+        "chunks_cut_mid_word": mid_word,
+        "hit_rate": round(hits / len(queries), 3) if queries else 0.0,
+        "chunking_seconds": round(elapsed, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de estratégias de chunking.")
+    parser.add_argument("--files", nargs="*", default=[
+        os.path.join(WEBSCRAPER, "deg.json"), os.path.join(WEBSCRAPER, "unb_data.json"),
+    ])
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--top-k", type=int, default=4)
+    parser.add_argument("--max-tokens", type=int, default=350)
+    parser.add_argument("--overlap", type=int, default=40)
+    parser.add_argument("--dense", action="store_true", help="Usa o embedder configurado em vez de BM25.")
+    parser.add_argument("--json", help="Grava o resultado neste arquivo.")
+    args = parser.parse_args()
+
+    texts = load_texts(args.files)
+    if not texts:
+        raise SystemExit("Nenhum documento encontrado.")
+    queries = make_queries(texts, args.queries)
+    retriever = dense_retriever if args.dense else lexical_retriever
+
+    results = [
+        evaluate("split_text", split_text, texts, queries, args.top_k, retriever),
+        evaluate(
+            f"frases ({args.max_tokens}/{args.overlap})",
+            lambda t: iter_chunks(t, args.max_tokens, args.overlap),
+            texts, queries, args.top_k, retriever,
+        ),
+    ]
+
+    columns = list(results[0])
+    print(" | ".join(columns))
+    for row in results:
+        print(" | ".join(str(row[c]) for c in columns))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"documents": len(texts), "queries": len(queries), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
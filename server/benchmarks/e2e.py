@@ -0,0 +1,253 @@
+"""
+Benchmark de ponta a ponta, offline: ingestão e `/response` com embedder e
+LLM falsos (latência configurável, ver benchmarks/fakes.py) e Qdrant em
+memória.
+
+Mede:
+- ingest(): chunks/s e tempo total;
+- GET /response (app FastAPI via ASGI, sem rede) em níveis crescentes de
+  concorrência: p50/p95/p99, vazão e erros;
+- pico de memória: RSS máximo do processo e, com --tracemalloc, o pico de
+  alocações Python de cada fase.
+
+O resultado sai em JSON (stdout ou --json) com o commit atual, para comparar
+execuções entre commits.
+
+    python -m benchmarks.e2e
+    python -m benchmarks.e2e --concurrency 1,8,32 --requests 200 --llm-ms 300 --json bench.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, List
+
+# O Settings exige estas variáveis; nada aqui acessa a rede.
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+os.environ.setdefault("QDRANT_URL", "http://localhost:6333")
+# O ingest do benchmark não deve invalidar os caches de um servidor local.
+os.environ.setdefault("COLLECTION_STAMP_PATH", os.path.join(tempfile.gettempdir(), "chiquinho-bench.stamp"))
+# Índices de payload não têm efeito no Qdrant em memória.
+warnings.filterwarnings("ignore", message="Payload indexes have no effect")
+
+import httpx  # noqa: E402
+import numpy as np  # noqa: E402
+
+from app.ingest import COLLECTION_NAME, ingest  # noqa: E402
+from app.services.answer_cache import SemanticAnswerCache  # noqa: E402
+from app.services.chunker import iter_sentences  # noqa: E402
+from app.services.corpus_loader import iter_documents  # noqa: E402
+from app.services.rag import RAGService  # noqa: E402
+from app.services.vector_store.qdrant import QdrantClients, QdrantVectorStore  # noqa: E402
+from benchmarks.fakes import FakeEmbedder, FakeLLM  # noqa: E402
+
+WEBSCRAPER = os.path.normpath(os.path.join(os.path.dirname(__file__), "..", "..", "webscraper"))
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(__file__),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def max_rss_mb() -> float:
+    # ru_maxrss vem em KB no Linux e em bytes no macOS.
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+@contextmanager
+def memory_phase(result: dict, trace: bool):
+    if trace:
+        tracemalloc.start()
+    try:
+        yield
+    finally:
+        if trace:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            result["tracemalloc_peak_mb"] = round(peak / (1024 * 1024), 1)
+        result["max_rss_mb"] = max_rss_mb()
+
+
+def synthetic_documents(n: int, seed: int = 7) -> List[dict]:
+    rng = random.Random(seed)
+    words = (
+        "edital matrícula disciplina semestre monitoria bolsa estudante curso graduação prazo "
+        "resultado seleção calendário acadêmico coordenação campus inscrição documento aluno "
+        "professor departamento pesquisa extensão auxílio moradia restaurante biblioteca"
+    ).split()
+    docs = []
+    for i in range(n):
+        sentences = [
+            " ".join(rng.choice(words) for _ in range(rng.randint(8, 20))).capitalize() + "."
+            for _ in range(rng.randint(10, 60))
+        ]
+        docs.append({
+            "title": f"Documento {i}",
+            "url": f"https://bench.local/{i}",
+            "source": "bench.local",
+            "publication_date": "29 de agosto de 2025",
+            "content_text": " ".join(sentences),
+        })
+    return docs
+
+
+def load_documents(args) -> List[dict]:
+    paths = [p for p in args.files if os.path.exists(p)]
+    docs = list(iter_documents(paths)) if paths and not args.synthetic else synthetic_documents(args.docs or 300)
+    if args.docs:
+        docs = docs[:args.docs]
+    return docs
+
+
+def make_queries(docs: List[dict], n: int, seed: int = 7) -> List[str]:
+    rng = random.Random(seed)
+    sentences = [
+        s for doc in docs for _, s in iter_sentences(doc.get("content_text") or "") if len(s.split()) >= 8
+    ]
+    return [" ".join(s.split()[:10]) for s in rng.sample(sentences, min(n, len(sentences)))]
+
+
+def bench_ingest(docs: List[dict], embedder: FakeEmbedder, clients: QdrantClients, args) -> dict:
+    result: Dict[str, float] = {"documents": len(docs)}
+    with memory_phase(result, args.tracemalloc):
+        started = time.perf_counter()
+        stats = ingest(docs, embedder=embedder, batch_size=args.batch_size, recreate=True, clients=clients)
+        elapsed = time.perf_counter() - started
+
+    result.update({
+        "chunks": stats.total_chunks,
+        "upserted": stats.upserted,
+        "failed": stats.failed_embeddings + stats.failed_upserts,
+        "seconds": round(elapsed, 3),
+        "chunks_per_second": round(stats.total_chunks / elapsed, 1) if elapsed else 0.0,
+    })
+    return result
+
+
+async def bench_level(client: httpx.AsyncClient, queries: List[str], concurrency: int, requests: int, trace: bool) -> dict:
+    latencies: List[float] = []
+    errors = 0
+    pending = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in pending:
+            started = time.perf_counter()
+            response = await client.get("/response", params={"pergunta": queries[i % len(queries)]})
+            latencies.append((time.perf_counter() - started) * 1000)
+            errors += response.status_code != 200
+
+    result: Dict[str, float] = {"concurrency": concurrency, "requests": requests}
+    with memory_phase(result, trace):
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    result.update({
+        "errors": errors,
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+        "mean_ms": round(float(np.mean(latencies)), 2),
+        "requests_per_second": round(requests / elapsed, 1),
+    })
+    return result
+
+
+async def bench_response(rag: RAGService, queries: List[str], args) -> List[dict]:
+    from app.dependencies import get_rag_service
+    from app.main import app
+
+    app.dependency_overrides[get_rag_service] = lambda: rag
+    results = []
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            # Aquecimento: conexões, imports tardios e caches de código.
+            await bench_level(client, queries, 1, min(5, args.requests), trace=False)
+            for concurrency in args.concurrency:
+                results.append(await bench_level(client, queries, concurrency, args.requests, args.tracemalloc))
+    finally:
+        app.dependency_overrides.pop(get_rag_service, None)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark offline de ingestão e /response.")
+    parser.add_argument("--files", nargs="*", default=[
+        os.path.join(WEBSCRAPER, "deg.json"), os.path.join(WEBSCRAPER, "unb_data.json"),
+    ])
+    parser.add_argument("--synthetic", action="store_true", help="Usa documentos sintéticos em vez dos arquivos.")
+    parser.add_argument("--docs", type=int, default=0, help="Limita (ou, com --synthetic, define) o número de documentos.")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--concurrency", type=lambda v: [int(x) for x in v.split(",")], default=[1, 4, 16, 64])
+    parser.add_argument("--requests", type=int, default=200, help="Requisições por nível de concorrência.")
+    parser.add_argument("--queries", type=int, default=100, help="Perguntas distintas (repetidas em ciclo).")
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--embed-ms", type=float, default=20.0, help="Latência fixa por chamada ao embedder.")
+    parser.add_argument("--embed-item-ms", type=float, default=0.5, help="Latência extra por texto embedado.")
+    parser.add_argument("--llm-ms", type=float, default=50.0, help="Latência fixa por chamada ao LLM.")
+    parser.add_argument("--llm-token-ms", type=float, default=0.0, help="Latência extra por token gerado.")
+    parser.add_argument("--answer-cache", action="store_true", help="Liga o cache semântico de respostas.")
+    parser.add_argument("--tracemalloc", action="store_true", help="Mede o pico de alocações (deixa tudo mais lento).")
+    parser.add_argument("--json", help="Grava o resultado neste arquivo em vez do stdout.")
+    args = parser.parse_args()
+
+    docs = load_documents(args)
+    if not docs:
+        raise SystemExit("Nenhum documento encontrado.")
+    queries = make_queries(docs, args.queries)
+
+    embedder = FakeEmbedder(args.dimension, args.embed_ms, args.embed_item_ms)
+    llm = FakeLLM(args.llm_ms, args.llm_token_ms)
+    clients = QdrantClients(location=":memory:")
+
+    ingest_result = bench_ingest(docs, embedder, clients, args)
+
+    async def run():
+        store = QdrantVectorStore(
+            url=None, embedder=embedder, collection_name=COLLECTION_NAME, clients=clients,
+        )
+        rag = RAGService(
+            llm=llm, vector_store=store, answer_cache=SemanticAnswerCache() if args.answer_cache else None,
+        )
+        return await bench_response(rag, queries, args)
+
+    response_results = asyncio.run(run())
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("files", "json")},
+        "ingest": ingest_result,
+        "response": response_results,
+    }
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
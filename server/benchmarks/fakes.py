@@ -0,0 +1,96 @@
+"""
+Embedder e LLM determinísticos para os benchmarks offline.
+
+Os vetores são bag-of-words com feature hashing (textos parecidos geram
+vetores próximos, então a busca continua fazendo sentido) e a latência de
+cada chamada é simulada com sleep: `latency_ms` fixo por chamada mais
+`per_item_ms` por texto (embedder) ou por token gerado (LLM).
+"""
+import asyncio
+import time
+import zlib
+from typing import AsyncIterator, Iterator, List
+
+import numpy as np
+
+from app.services.embedder.base import Embedder
+from app.services.llm.base import LLM
+from app.services.retrieval.bm25 import tokenize
+
+
+class FakeEmbedder(Embedder):
+    model_name = "fake-hashing"
+
+    def __init__(self, dimension: int = 384, latency_ms: float = 0.0, per_item_ms: float = 0.0):
+        self._dimension = dimension
+        self.latency_ms = latency_ms
+        self.per_item_ms = per_item_ms
+
+    @property
+    def dimension(self) -> int:
+        return self._dimension
+
+    def vector(self, text: str) -> List[float]:
+        vec = np.zeros(self._dimension, dtype=np.float32)
+        for token in tokenize(text):
+            h = zlib.crc32(token.encode("utf-8"))
+            vec[h % self._dimension] += 1.0 if h & 1 else -1.0
+        norm = float(np.linalg.norm(vec))
+        if norm == 0.0:
+            vec[0] = norm = 1.0
+        return (vec / norm).tolist()
+
+    def _delay(self, items: int) -> float:
+        return (self.latency_ms + self.per_item_ms * items) / 1000
+
+    def embed_text(self, text: str) -> List[float]:
+        time.sleep(self._delay(1))
+        return self.vector(text)
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(self._delay(len(texts)))
+        return [self.vector(t) for t in texts]
+
+    async def aembed_text(self, text: str) -> List[float]:
+        await asyncio.sleep(self._delay(1))
+        return self.vector(text)
+
+    async def aembed_texts(self, texts: List[str]) -> List[List[float]]:
+        await asyncio.sleep(self._delay(len(texts)))
+        return [self.vector(t) for t in texts]
+
+
+class FakeLLM(LLM):
+    error_response = "Erro ao gerar resposta."
+
+    def __init__(self, latency_ms: float = 0.0, per_item_ms: float = 0.0, answer_tokens: int = 64):
+        self.latency_ms = latency_ms
+        self.per_item_ms = per_item_ms
+        self.answer_tokens = answer_tokens
+
+    def _answer(self, prompt: str) -> List[str]:
+        words = prompt.split()
+        start = zlib.crc32(prompt.encode("utf-8")) % max(1, len(words))
+        return [words[(start + i) % len(words)] for i in range(self.answer_tokens)] if words else []
+
+    def generate_response(self, prompt: str) -> str:
+        words = self._answer(prompt)
+        time.sleep((self.latency_ms + self.per_item_ms * len(words)) / 1000)
+        return " ".join(words)
+
+    async def agenerate_response(self, prompt: str) -> str:
+        words = self._answer(prompt)
+        await asyncio.sleep((self.latency_ms + self.per_item_ms * len(words)) / 1000)
+        return " ".join(words)
+
+    def stream_response(self, prompt: str) -> Iterator[str]:
+        time.sleep(self.latency_ms / 1000)
+        for word in self._answer(prompt):
+            time.sleep(self.per_item_ms / 1000)
+            yield word + " "
+
+    async def astream_response(self, prompt: str) -> AsyncIterator[str]:
+        await asyncio.sleep(self.latency_ms / 1000)
+        for word in self._answer(prompt):
+            await asyncio.sleep(self.per_item_ms / 1000)
+            yield word + " "
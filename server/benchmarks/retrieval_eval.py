@@ -0,0 +1,239 @@
+"""
+Avaliação de qualidade x latência da recuperação, guiada por um golden set de
+perguntas com as URLs relevantes (benchmarks/golden.jsonl, sobre o corpus
+coletado pelo webscraper).
+
+Para cada combinação de chunking, recuperador (dense, bm25, hybrid),
+parâmetro de busca do HNSW (hnsw_ef / exact) e top_k mede:
+
+- recall@k: fração das URLs relevantes presentes nos k chunks recuperados;
+- MRR: inverso da posição do primeiro chunk relevante (0 se fora do top_k);
+- hit@k: fração das perguntas com ao menos um chunk relevante;
+- latência da busca (p50/p95, sem o embedding da pergunta).
+
+No fim imprime a tabela com a fronteira de Pareto (recall@k x p50) marcada.
+Por padrão roda offline (embedder de hashing e Qdrant em memória, que ignora
+os parâmetros do HNSW); com --embedder configured usa o embedder do .env e
+com --qdrant-url um Qdrant de verdade.
+
+    python -m benchmarks.retrieval_eval
+    python -m benchmarks.retrieval_eval --chunking tokens:200/30,tokens:350/40,chars:3500 --top-k 3,5,10
+    python -m benchmarks.retrieval_eval --embedder configured --qdrant-url http://localhost:6333 \\
+        --hnsw-ef 16,64,256,exact --json eval.json
+"""
+import argparse
+import json
+import os
+import time
+import uuid
+import warnings
+from dataclasses import dataclass
+from typing import Callable, Dict, List
+
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+os.environ.setdefault("QDRANT_URL", "http://localhost:6333")
+warnings.filterwarnings("ignore", message="Payload indexes have no effect")
+
+import numpy as np  # noqa: E402
+from qdrant_client import QdrantClient, models  # noqa: E402
+
+from app.ingest import iter_records_from_docs, split_text  # noqa: E402
+from app.services.corpus_loader import iter_documents  # noqa: E402
+from app.services.embedder.base import Embedder  # noqa: E402
+from app.services.retrieval.bm25 import BM25Index  # noqa: E402
+from app.services.retrieval.hybrid import reciprocal_rank_fusion  # noqa: E402
+from benchmarks.fakes import FakeEmbedder  # noqa: E402
+
+HERE = os.path.dirname(__file__)
+WEBSCRAPER = os.path.normpath(os.path.join(HERE, "..", "..", "webscraper"))
+UPSERT_BATCH = 256
+
+
+@dataclass
+class Corpus:
+    """Chunks de uma estratégia de chunking, indexados no Qdrant e no BM25."""
+    name: str
+    urls: List[str]
+    collection: str
+    lexical: BM25Index
+
+
+def load_golden(path: str) -> List[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def chunk_documents(docs: List[dict], spec: str) -> List[dict]:
+    """`tokens:MAX/OVERLAP` usa o chunker por frases; `chars:N`, o split_text antigo."""
+    kind, _, value = spec.partition(":")
+    if kind == "tokens":
+        max_tokens, _, overlap = value.partition("/")
+        return list(iter_records_from_docs(docs, int(max_tokens), int(overlap or 0)))
+    if kind == "chars":
+        records = []
+        for d in docs:
+            text = f"{d.get('title') or ''}\n\n{d.get('content_text') or ''}".strip()
+            records.extend({"text": chunk, "payload": {"url": d.get("url")}} for chunk in split_text(text, int(value)))
+        return records
+    raise SystemExit(f"Chunking inválido: {spec} (use tokens:MAX/OVERLAP ou chars:N)")
+
+
+def build_corpus(spec: str, docs: List[dict], embedder: Embedder, client: QdrantClient) -> Corpus:
+    records = [r for r in chunk_documents(docs, spec) if r["text"].strip()]
+    texts = [r["text"] for r in records]
+    vectors = embedder.embed_texts(texts)
+    dimension = len(next(v for v in vectors if v))
+
+    collection = f"eval_{uuid.uuid4().hex[:8]}"
+    client.create_collection(
+        collection, vectors_config=models.VectorParams(size=dimension, distance=models.Distance.COSINE)
+    )
+    points = [models.PointStruct(id=i, vector=v, payload={}) for i, v in enumerate(vectors) if v]
+    for start in range(0, len(points), UPSERT_BATCH):
+        client.upsert(collection, points=points[start:start + UPSERT_BATCH], wait=True)
+
+    lexical = BM25Index()
+    lexical.add_many((str(i), text) for i, text in enumerate(texts))
+    return Corpus(name=spec, urls=[r["payload"]["url"] for r in records], collection=collection, lexical=lexical)
+
+
+def search_params(hnsw: str) -> models.SearchParams | None:
+    if hnsw == "default":
+        return None
+    if hnsw == "exact":
+        return models.SearchParams(exact=True)
+    return models.SearchParams(hnsw_ef=int(hnsw))
+
+
+def make_retriever(kind: str, corpus: Corpus, client: QdrantClient, hnsw: str, candidates: int) -> Callable:
+    params = search_params(hnsw)
+
+    def dense(vector, query, k) -> List[int]:
+        points = client.query_points(corpus.collection, query=vector, limit=k, search_params=params).points
+        return [int(p.id) for p in points]
+
+    def lexical(vector, query, k) -> List[int]:
+        return [int(doc_id) for doc_id, _ in corpus.lexical.search(query, k)]
+
+    def hybrid(vector, query, k) -> List[int]:
+        n = max(k, candidates)
+        fused = reciprocal_rank_fusion([
+            [str(i) for i in dense(vector, query, n)], [str(i) for i in lexical(vector, query, n)],
+        ])
+        return [int(doc_id) for doc_id, _ in fused[:k]]
+
+    return {"dense": dense, "bm25": lexical, "hybrid": hybrid}[kind]
+
+
+def evaluate(retrieve: Callable, corpus: Corpus, golden: List[dict], vectors, k: int, repeat: int) -> Dict[str, float]:
+    recalls, reciprocal_ranks, hits, latencies = [], [], [], []
+    for item, vector in zip(golden, vectors):
+        relevant = set(item["urls"])
+        for _ in range(repeat):
+            started = time.perf_counter()
+            ids = retrieve(vector, item["pergunta"], k)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+        urls = [corpus.urls[i] for i in ids]
+        found = relevant.intersection(urls)
+        recalls.append(len(found) / len(relevant))
+        hits.append(bool(found))
+        first = next((rank for rank, url in enumerate(urls, start=1) if url in relevant), None)
+        reciprocal_ranks.append(1 / first if first else 0.0)
+
+    p50, p95 = np.percentile(latencies, [50, 95])
+    return {
+        "recall_at_k": round(float(np.mean(recalls)), 3),
+        "mrr": round(float(np.mean(reciprocal_ranks)), 3),
+        "hit_at_k": round(float(np.mean(hits)), 3),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+    }
+
+
+def mark_pareto(rows: List[dict]):
+    """Marca as configurações não dominadas em (maior recall@k, menor p50)."""
+    for row in rows:
+        row["pareto"] = not any(
+            other["recall_at_k"] >= row["recall_at_k"] and other["p50_ms"] <= row["p50_ms"]
+            and (other["recall_at_k"] > row["recall_at_k"] or other["p50_ms"] < row["p50_ms"])
+            for other in rows
+        )
+
+
+def print_table(rows: List[dict]):
+    columns = ["chunking", "retriever", "hnsw", "top_k", "chunks", "recall_at_k", "mrr", "hit_at_k", "p50_ms", "p95_ms"]
+    table = [columns + ["pareto"]] + [
+        [str(row[c]) for c in columns] + ["*" if row["pareto"] else ""]
+        for row in sorted(rows, key=lambda r: (r["p50_ms"], -r["recall_at_k"]))
+    ]
+    widths = [max(len(line[i]) for line in table) for i in range(len(table[0]))]
+    for line in table:
+        print(" | ".join(value.ljust(width) for value, width in zip(line, widths)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Avaliação de qualidade x latência da recuperação.")
+    parser.add_argument("--golden", default=os.path.join(HERE, "golden.jsonl"))
+    parser.add_argument("--files", nargs="*", default=[
+        os.path.join(WEBSCRAPER, "deg.json"), os.path.join(WEBSCRAPER, "unb_data.json"),
+    ])
+    parser.add_argument("--chunking", default="tokens:200/30,tokens:350/40,chars:3500",
+                        help="Estratégias separadas por vírgula: tokens:MAX/OVERLAP ou chars:N.")
+    parser.add_argument("--retrievers", default="dense,bm25,hybrid")
+    parser.add_argument("--top-k", default="3,5,10")
+    parser.add_argument("--hnsw-ef", default="default",
+                        help="Valores de hnsw_ef por vírgula; 'default' e 'exact' também são aceitos.")
+    parser.add_argument("--hybrid-candidates", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=3, help="Repetições de cada busca para a latência.")
+    parser.add_argument("--embedder", choices=["hashing", "configured"], default="hashing",
+                        help="hashing: embedder determinístico offline; configured: o do .env.")
+    parser.add_argument("--qdrant-url", help="Qdrant de verdade (os parâmetros do HNSW só valem nele).")
+    parser.add_argument("--json", help="Grava as linhas da tabela neste arquivo.")
+    args = parser.parse_args()
+
+    golden = load_golden(args.golden)
+    docs = list(iter_documents([p for p in args.files if os.path.exists(p)]))
+    if not docs or not golden:
+        raise SystemExit("Corpus ou golden set vazio.")
+
+    if args.embedder == "configured":
+        from app.dependencies import get_embedder
+
+        embedder = get_embedder()
+    else:
+        embedder = FakeEmbedder()
+    client = QdrantClient(url=args.qdrant_url) if args.qdrant_url else QdrantClient(":memory:")
+
+    questions = [item["pergunta"] for item in golden]
+    vectors = embedder.embed_texts(questions)
+    top_ks = [int(k) for k in args.top_k.split(",")]
+    hnsw_values = args.hnsw_ef.split(",")
+
+    rows = []
+    for spec in args.chunking.split(","):
+        corpus = build_corpus(spec, docs, embedder, client)
+        try:
+            for kind in args.retrievers.split(","):
+                # O BM25 não usa o HNSW: uma linha só.
+                for hnsw in (hnsw_values if kind != "bm25" else ["-"]):
+                    retrieve = make_retriever(kind, corpus, client, hnsw if hnsw != "-" else "default", args.hybrid_candidates)
+                    for k in top_ks:
+                        rows.append({
+                            "chunking": spec, "retriever": kind, "hnsw": hnsw, "top_k": k,
+                            "chunks": len(corpus.urls),
+                            **evaluate(retrieve, corpus, golden, vectors, k, args.repeat),
+                        })
+        finally:
+            client.delete_collection(corpus.collection)
+
+    mark_pareto(rows)
+    print_table(rows)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"questions": len(golden), "documents": len(docs), "results": rows}, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,11 @@ from app.services.llm.base import LLM
 def mock_vector_store() -> VectorStore:
     mock = MagicMock(spec=VectorStore)
     mock.search.return_value = ["doc1", "doc2", "doc3"]
+    mock.embed_query.return_value = [1.0, 0.0, 0.0]
+    mock.search_by_vector.return_value = ["doc1", "doc2", "doc3"]
+    mock.asearch.return_value = ["doc1", "doc2", "doc3"]
+    mock.aembed_query.return_value = [1.0, 0.0, 0.0]
+    mock.asearch_by_vector.return_value = ["doc1", "doc2", "doc3"]
     return mock
 
 
@@ -17,6 +22,7 @@ def mock_vector_store() -> VectorStore:
 def mock_llm() -> LLM:
     mock = MagicMock(spec=LLM)
     mock.generate_response.return_value = "resposta gerada pelo LLM"
+    mock.agenerate_response.return_value = "resposta gerada pelo LLM"
     return mock
 
 
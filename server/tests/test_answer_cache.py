@@ -0,0 +1,90 @@
+from app.config import SERVER_DIR, Settings
+from app.services.answer_cache import SemanticAnswerCache
+from app.services.collection_stamp import CollectionStamp
+from app.services.rag import RAGService
+
+
+def test_lookup_retorna_resposta_de_pergunta_similar():
+    cache = SemanticAnswerCache(threshold=0.95)
+    cache.store([1.0, 0.0, 0.0], "resposta")
+
+    assert cache.lookup([0.99, 0.05, 0.0]) == "resposta"
+    assert cache.lookup([0.0, 1.0, 0.0]) is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_remove_entrada_menos_usada_quando_cheio():
+    cache = SemanticAnswerCache(threshold=0.99, max_entries=2)
+    cache.store([1.0, 0.0, 0.0], "a")
+    cache.store([0.0, 1.0, 0.0], "b")
+    cache.lookup([1.0, 0.0, 0.0])
+    cache.store([0.0, 0.0, 1.0], "c")
+
+    assert cache.lookup([1.0, 0.0, 0.0]) == "a"
+    assert cache.lookup([0.0, 1.0, 0.0]) is None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entrada_expira_apos_ttl():
+    cache = SemanticAnswerCache(ttl_seconds=-1)
+    cache.store([1.0, 0.0], "velha")
+
+    assert cache.lookup([1.0, 0.0]) is None
+
+
+def test_entrada_expirada_nao_esconde_outra_valida():
+    cache = SemanticAnswerCache(threshold=0.9)
+    cache.store([0.95, 0.3, 0.0], "valida")
+    cache.store([1.0, 0.0, 0.0], "velha")
+    slot = next(slot for slot, entry in cache._entries.items() if entry.answer == "velha")
+    cache._entries[slot].expires_at = 0
+
+    assert cache.lookup([1.0, 0.0, 0.0]) == "valida"
+    assert cache.stats()["entries"] == 1
+
+
+def test_invalidate_descarta_respostas_em_andamento():
+    cache = SemanticAnswerCache()
+    generation = cache.generation
+    cache.invalidate()
+    cache.store([1.0, 0.0], "antiga", generation=generation)
+
+    assert cache.lookup([1.0, 0.0]) is None
+
+
+def test_mudanca_na_colecao_feita_por_outro_processo_invalida_o_cache(tmp_path):
+    path = str(tmp_path / "collection.stamp")
+    cache = SemanticAnswerCache(stamp=CollectionStamp(path, check_interval=0))
+    cache.store([1.0, 0.0], "antiga")
+    generation = cache.generation
+
+    # Outro processo (ex.: python -m app.ingest --recreate) altera a coleção.
+    CollectionStamp(path).bump()
+
+    assert cache.lookup([1.0, 0.0]) is None
+    cache.store([0.0, 1.0], "calculada antes da mudança", generation=generation)
+    assert cache.lookup([0.0, 1.0]) is None
+    assert cache.stats()["generation"] == generation + 1
+
+
+def test_rag_usa_cache_na_segunda_pergunta(mock_llm, mock_vector_store):
+    rag = RAGService(llm=mock_llm, vector_store=mock_vector_store, answer_cache=SemanticAnswerCache())
+
+    assert rag.generate_answer("O que é monitoria?") == "resposta gerada pelo LLM"
+    assert rag.generate_answer("o que é monitoria") == "resposta gerada pelo LLM"
+
+    mock_llm.generate_response.assert_called_once()
+    mock_vector_store.search_by_vector.assert_called_once()
+
+
+def test_caminho_da_versao_parte_da_pasta_do_server(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("COLLECTION_STAMP_PATH", raising=False)
+
+    settings = Settings(_env_file=None, google_api_key="x", qdrant_url="http://qdrant")
+
+    assert settings.collection_stamp_path == str(SERVER_DIR / "data" / "collection.stamp")
+    absolute = str(tmp_path / "versao.stamp")
+    assert Settings(_env_file=None, google_api_key="x", qdrant_url="http://qdrant",
+                    collection_stamp_path=absolute).collection_stamp_path == absolute
@@ -0,0 +1,109 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import Distance, PointStruct, VectorParams
+
+from app.services.answer_cache import SemanticAnswerCache
+from app.services.embedder.cache import EmbeddingCache
+from app.services.rag import RAGService
+from app.services.vector_store.base import SearchHit, VectorStore
+from app.services.vector_store.qdrant import QdrantVectorStore
+
+VECTORS = {"monitoria": [1.0, 0.0], "calendário": [0.0, 1.0], "edital": [0.7, 0.7]}
+
+
+def make_store():
+    store = MagicMock(spec=VectorStore)
+    store.aembed_queries.side_effect = lambda queries: [VECTORS[q] for q in queries]
+    store.asearch_hits_batch.side_effect = lambda vectors, top_k, queries, filters: [
+        [SearchHit(id=q, score=1.0, payload={"content_text": f"doc sobre {q}"})] for q in queries
+    ]
+    store.ahydrate.side_effect = lambda hits: hits
+    return store
+
+
+def test_lote_embeda_e_busca_uma_vez(mock_llm):
+    store = make_store()
+    rag = RAGService(llm=mock_llm, vector_store=store)
+
+    result = asyncio.run(rag.abatch_answers(["monitoria", "calendário", "edital"]))
+
+    assert [a.answer for a in result.answers] == ["resposta gerada pelo LLM"] * 3
+    store.aembed_queries.assert_awaited_once()
+    store.asearch_hits_batch.assert_awaited_once()
+    prompts = [c.args[0] for c in mock_llm.agenerate_response.call_args_list]
+    assert any("doc sobre edital" in p and "edital" in p for p in prompts)
+    assert set(result.timings_ms) == {"embedding", "busca", "llm", "total"}
+
+
+def test_lote_limita_chamadas_simultaneas_ao_llm(mock_llm):
+    running = peak = 0
+
+    async def slow_answer(prompt):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return "ok"
+
+    mock_llm.agenerate_response = AsyncMock(side_effect=slow_answer)
+    rag = RAGService(llm=mock_llm, vector_store=make_store())
+
+    result = asyncio.run(rag.abatch_answers(["monitoria", "calendário", "edital"] * 3, concurrency=2))
+
+    assert peak == 2
+    # Perguntas repetidas no lote são respondidas uma vez só.
+    assert mock_llm.agenerate_response.await_count == 3
+    assert [a.answer for a in result.answers] == ["ok"] * 9
+
+
+def test_lote_usa_cache_e_isola_falhas(mock_llm):
+    cache = SemanticAnswerCache()
+    cache.store(VECTORS["monitoria"], "resposta em cache")
+
+    async def answer(prompt):
+        if "calendário" in prompt:
+            raise RuntimeError("timeout")
+        return "nova resposta"
+
+    mock_llm.agenerate_response = AsyncMock(side_effect=answer)
+    store = make_store()
+    rag = RAGService(llm=mock_llm, vector_store=store, answer_cache=cache)
+
+    result = asyncio.run(rag.abatch_answers(["monitoria", "calendário", "edital"]))
+    monitoria, calendario, edital = result.answers
+
+    assert monitoria.cached and monitoria.answer == "resposta em cache"
+    assert calendario.answer is None and calendario.error
+    assert edital.answer == "nova resposta"
+    assert store.asearch_hits_batch.call_args.args[2] == ["calendário", "edital"]
+    assert cache.lookup(VECTORS["edital"]) == "nova resposta"
+
+
+def test_qdrant_busca_em_lote():
+    embedder = MagicMock()
+    embedder.aembed_texts = AsyncMock(return_value=[[0.0, 1.0]])
+
+    with patch("app.services.vector_store.qdrant.QdrantClient"):
+        store = QdrantVectorStore(url="http://qdrant", embedder=embedder, embedding_size=2,
+                                  query_cache=EmbeddingCache())
+    store.query_cache.put(store.model_name, "monitoria", [1.0, 0.0])
+
+    async def run():
+        store.aqdrant = AsyncQdrantClient(":memory:")
+        await store.aqdrant.create_collection(
+            store.collection_name, vectors_config=VectorParams(size=2, distance=Distance.COSINE)
+        )
+        await store.aqdrant.upsert(store.collection_name, points=[
+            PointStruct(id=1, vector=[1.0, 0.0], payload={"content_text": "monitoria"}),
+            PointStruct(id=2, vector=[0.0, 1.0], payload={"content_text": "calendário"}),
+        ])
+        vectors = await store.aembed_queries(["monitoria", "calendário"])
+        return await store.asearch_hits_batch(vectors, top_k=1)
+
+    batch = asyncio.run(run())
+
+    assert [hits[0].text for hits in batch] == ["monitoria", "calendário"]
+    embedder.aembed_texts.assert_awaited_once_with(["calendário"])
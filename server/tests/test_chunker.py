@@ -0,0 +1,60 @@
+from app.services.chunker import approx_tokens, iter_chunks, iter_sentences
+
+TEXT = (
+    "O Art. 5 define as regras. A Profa. Maria aprovou o edital nº 0005/2025. "
+    "As inscrições vão até 10/11.\n\nSegundo parágrafo aqui! E mais uma frase?\nItem de lista"
+)
+
+
+def test_frases_respeitam_abreviacoes_e_quebras():
+    sentences = [s for _, s in iter_sentences(TEXT)]
+
+    assert sentences[:3] == [
+        "O Art. 5 define as regras.",
+        "A Profa. Maria aprovou o edital nº 0005/2025.",
+        "As inscrições vão até 10/11.",
+    ]
+    assert sentences[-1] == "Item de lista"
+
+
+def test_aspas_e_parenteses_de_fechamento_ficam_na_frase():
+    text = 'Ele disse "Matrícula aberta." Depois saiu. (Ver o edital.) Outro ponto.'
+
+    assert [s for _, s in iter_sentences(text)] == [
+        'Ele disse "Matrícula aberta."',
+        "Depois saiu.",
+        "(Ver o edital.)",
+        "Outro ponto.",
+    ]
+    assert " ".join(s for _, s in iter_sentences(text)) == text
+
+
+def test_chunks_nao_cortam_frases_e_respeitam_limite():
+    chunks = list(iter_chunks(TEXT, max_tokens=15, overlap_tokens=0))
+
+    sentences = [s for _, s in iter_sentences(TEXT)]
+    for chunk in chunks:
+        assert approx_tokens(chunk) <= 15
+    for sentence in sentences:
+        assert any(sentence in chunk for chunk in chunks)
+
+
+def test_sobreposicao_repete_final_do_chunk_anterior():
+    chunks = list(iter_chunks(TEXT, max_tokens=15, overlap_tokens=6))
+
+    assert chunks[-2].endswith("Segundo parágrafo aqui!")
+    assert chunks[-1].startswith("Segundo parágrafo aqui!")
+
+
+def test_frase_longa_quebra_entre_palavras():
+    text = " ".join(f"palavra{i}" for i in range(100))
+    chunks = list(iter_chunks(text, max_tokens=30, overlap_tokens=0))
+
+    assert len(chunks) == 4
+    assert " ".join(chunks) == text
+
+
+def test_chunker_e_gerador_preguicoso():
+    chunks = iter_chunks("Uma frase. " * 100000, max_tokens=50)
+
+    assert next(chunks).startswith("Uma frase.")
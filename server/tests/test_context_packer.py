@@ -0,0 +1,99 @@
+from unittest.mock import MagicMock, patch
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, PointStruct, VectorParams
+
+from app.services.context_packer import ContextPacker
+from app.services.rag import RAGService
+from app.services.vector_store.base import SearchHit, VectorStore
+from app.services.vector_store.mmap_store import MmapVectorStore
+from app.services.vector_store.qdrant import QdrantVectorStore
+
+BOILERPLATE = "Decanato de Ensino de Graduação. Universidade de Brasília. Campus Darcy Ribeiro. "
+
+
+def hit(i, text, score, url=None, chunk=None, vector=None):
+    payload = {"content_text": text}
+    if url is not None:
+        payload.update(url=url, chunk=chunk)
+    return SearchHit(id=str(i), score=score, payload=payload, vector=vector)
+
+
+def test_remove_quase_duplicatas_e_registra_economia():
+    hits = [
+        hit(0, BOILERPLATE + "Matrícula em disciplinas.", 0.9),
+        hit(1, BOILERPLATE + "Matrícula em disciplinas!", 0.8),
+        hit(2, "Calendário de provas do semestre.", 0.7),
+    ]
+    packer = ContextPacker(token_budget=1000)
+
+    docs = packer.pack(hits)
+
+    assert docs == [hits[0].text, hits[2].text]
+    stats = packer.stats()
+    assert stats["duplicates_removed"] == 1
+    assert stats["saved_tokens"] == stats["input_tokens"] - stats["packed_tokens"] > 0
+
+
+def test_mmr_usa_embeddings_para_diversificar():
+    hits = [
+        hit(0, "a", 0.90, vector=[1.0, 0.0]),
+        hit(1, "b", 0.89, vector=[0.9, 0.1]),
+        hit(2, "c", 0.70, vector=[0.0, 1.0]),
+    ]
+    packer = ContextPacker(mmr_lambda=0.5, dedup_threshold=0.999)
+
+    assert packer.pack(hits) == ["a", "c", "b"]
+
+
+def test_stores_devolvem_embeddings_para_o_packer(tmp_path):
+    point_id = "00000000-0000-0000-0000-000000000001"
+    with patch("app.services.vector_store.qdrant.QdrantClient"):
+        qdrant = QdrantVectorStore(url="http://qdrant", embedder=MagicMock(), embedding_size=2, with_vectors=True)
+    qdrant.qdrant = QdrantClient(":memory:")
+    qdrant.qdrant.create_collection(qdrant.collection_name, vectors_config=VectorParams(size=2, distance=Distance.DOT))
+    qdrant.qdrant.upsert(qdrant.collection_name, points=[PointStruct(id=point_id, vector=[1.0, 0.0], payload={})])
+    mmap = MmapVectorStore(
+        MmapVectorStore.build(str(tmp_path), [(point_id, [1.0, 0.0], {})]), embedder=None, with_vectors=True
+    )
+
+    for store in (qdrant, mmap):
+        assert store.search_hits([1.0, 0.0], top_k=1)[0].vector == [1.0, 0.0]
+        assert store.retrieve([point_id])[0].vector == [1.0, 0.0]
+
+
+def test_junta_chunks_vizinhos_sem_repetir_sobreposicao():
+    hits = [
+        hit(0, "Segunda parte. Fim do edital.", 0.9, url="u", chunk=1),
+        hit(1, "Outro documento.", 0.8, url="v", chunk=0),
+        hit(2, "Início do edital. Segunda parte.", 0.7, url="u", chunk=0),
+    ]
+    packer = ContextPacker()
+
+    docs = packer.pack(hits)
+
+    assert docs == ["Início do edital. Segunda parte. Fim do edital.", "Outro documento."]
+    assert packer.stats()["chunks_merged"] == 1
+
+
+def test_respeita_orcamento_de_tokens():
+    hits = [hit(i, f"Documento número {i} " + "palavra " * 40, 1 - i / 10) for i in range(5)]
+    packer = ContextPacker(token_budget=100, dedup_threshold=1.1)
+
+    docs = packer.pack(hits)
+
+    assert len(docs) == 2
+    assert packer.stats()["chunks_over_budget"] == 3
+
+
+def test_rag_com_packer_busca_candidatos_e_empacota(mock_llm):
+    store = MagicMock(spec=VectorStore)
+    store.embed_query.return_value = [1.0, 0.0]
+    store.search_hits.return_value = [hit(0, "doc único", 0.9)]
+    store.hydrate.side_effect = lambda hits: hits
+    rag = RAGService(llm=mock_llm, vector_store=store, packer=ContextPacker(candidates=8))
+
+    rag.generate_answer("pergunta")
+
+    store.search_hits.assert_called_once_with([1.0, 0.0], 8, "pergunta", None)
+    assert "doc único" in mock_llm.generate_response.call_args[0][0]
@@ -0,0 +1,40 @@
+import gzip
+import io
+import json
+
+from app.services.corpus_loader import iter_documents, iter_json_array
+
+DOCS = [
+    {"url": f"https://x/{i}", "title": f"Título {i} [com] colchetes, vírgulas", "content_text": "ç" * i, "n": i * 1.5}
+    for i in range(50)
+]
+
+
+def test_array_lido_em_pedacos_pequenos():
+    stream = io.StringIO(json.dumps(DOCS, ensure_ascii=False, indent=2))
+
+    assert list(iter_json_array(stream, read_size=7)) == DOCS
+
+
+def test_array_vazio_e_objeto_unico():
+    assert list(iter_json_array(io.StringIO("  [ ]  "))) == []
+    assert list(iter_json_array(io.StringIO('{"a": 1}'))) == [{"a": 1}]
+
+
+def test_numero_no_fim_do_buffer_nao_e_truncado():
+    assert list(iter_json_array(io.StringIO("[12345, 678]"), read_size=3)) == [12345, 678]
+
+
+def test_formatos_e_compressao(tmp_path):
+    plain = tmp_path / "docs.json"
+    plain.write_text(json.dumps(DOCS[:10]), encoding="utf-8")
+
+    lines = tmp_path / "docs.jsonl.gz"
+    with gzip.open(lines, "wt", encoding="utf-8") as f:
+        for doc in DOCS[10:20]:
+            f.write(json.dumps(doc) + "\n")
+        f.write("não é json\n")
+
+    docs = list(iter_documents([str(plain), str(lines), str(tmp_path / "inexistente.json")]))
+
+    assert docs == DOCS[:20]
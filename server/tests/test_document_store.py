@@ -0,0 +1,63 @@
+from qdrant_client import QdrantClient
+
+from app.services.document_store import DocumentStore
+from app.services.ingest_pipeline import IngestPipeline
+from app.services.vector_store.base import SearchHit
+from tests.test_ingest_pipeline import FakeEmbedder
+
+
+def make_payload(i):
+    return {
+        "url": f"https://x/{i}",
+        "chunk": 0,
+        "total_chunks": 1,
+        "source": "deg.unb.br",
+        "title": f"Título {i}",
+        "content_text": f"texto {i} " * 50,
+        "content_hash": f"h{i}",
+    }
+
+
+def test_grava_le_e_remove_documentos(tmp_path):
+    store = DocumentStore(str(tmp_path / "docs.sqlite"))
+    store.put_many((str(i), make_payload(i)) for i in range(5))
+    store.delete(["3"])
+
+    docs = store.get_many(["0", "3", "4", "inexistente"])
+
+    assert set(docs) == {"0", "4"}
+    assert docs["4"] == make_payload(4)
+    assert len(store) == 4
+
+
+def test_hydrate_completa_so_payloads_sem_texto(tmp_path):
+    store = DocumentStore(str(tmp_path / "docs.sqlite"))
+    store.put_many([("1", make_payload(1))])
+    hits = [
+        SearchHit(id="1", score=0.9, payload={"source": "deg.unb.br"}),
+        SearchHit(id="2", score=0.8, payload={"content_text": "já tem texto"}),
+    ]
+
+    store.hydrate(hits)
+
+    assert hits[0].text == make_payload(1)["content_text"]
+    assert hits[1].text == "já tem texto"
+
+
+def test_pipeline_guarda_no_qdrant_so_campos_de_filtro(tmp_path):
+    client = QdrantClient(":memory:")
+    store = DocumentStore(str(tmp_path / "docs.sqlite"))
+    records = ({"text": f"texto {i}", "payload": make_payload(i)} for i in range(10))
+
+    IngestPipeline(
+        client=client,
+        embedder=FakeEmbedder(),
+        collection_name="teste",
+        point_id_fn=lambda rec: int(rec["payload"]["url"].rsplit("/", 1)[1]),
+        document_store=store,
+    ).run(records)
+
+    point = client.retrieve("teste", ids=[3])[0]
+    assert "content_text" not in point.payload
+    assert point.payload["content_hash"] == "h3"
+    assert store.get_many(["3"])["3"]["title"] == "Título 3"
@@ -0,0 +1,75 @@
+import asyncio
+import threading
+from unittest.mock import MagicMock, patch
+
+from app.services.embedder.cache import EmbeddingCache, normalize_query
+from app.services.vector_store.qdrant import QdrantVectorStore
+
+
+def test_normalize_query_ignora_caixa_e_espacos():
+    assert normalize_query("  O que é   PIBID?\n") == normalize_query("o que é pibid?")
+
+
+def test_chave_depende_do_modelo():
+    cache = EmbeddingCache()
+    cache.put("modelo-a", "pergunta", [1.0, 2.0])
+
+    assert cache.get("modelo-a", "PERGUNTA ") == [1.0, 2.0]
+    assert cache.get("modelo-b", "pergunta") is None
+
+
+def test_lru_respeita_limite_em_memoria():
+    cache = EmbeddingCache(max_entries=2)
+    cache.put("m", "a", [1.0])
+    cache.put("m", "b", [2.0])
+    cache.get("m", "a")
+    cache.put("m", "c", [3.0])
+
+    assert cache.get("m", "b") is None
+    assert cache.get("m", "a") == [1.0]
+
+
+def test_nivel_em_disco_sobrevive_a_nova_instancia(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite")
+    EmbeddingCache(path=path).put("m", "pergunta", [0.5, 0.25])
+
+    cache = EmbeddingCache(path=path)
+    assert cache.get("m", "pergunta") == [0.5, 0.25]
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_variante_assincrona_acessa_o_disco_fora_do_event_loop(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite")
+    EmbeddingCache(path=path).put("m", "no disco", [0.5])
+    cache = EmbeddingCache(path=path)
+    threads = []
+    get_many, put_many = cache._disk_get_many, cache._disk_put_many
+    cache._disk_get_many = lambda keys: threads.append(threading.current_thread()) or get_many(keys)
+    cache._disk_put_many = lambda entries: threads.append(threading.current_thread()) or put_many(entries)
+
+    async def run():
+        vectors = await cache.aget_many("m", ["no disco", "nova"])
+        await cache.aput("m", "nova", [1.0])
+        # Acerto em memória não vai ao disco.
+        return vectors, await cache.aget("m", "nova")
+
+    vectors, again = asyncio.run(run())
+
+    assert vectors == [[0.5], None]
+    assert again == [1.0]
+    assert len(threads) == 2
+    assert threading.main_thread() not in threads
+    assert EmbeddingCache(path=path).get("m", "nova") == [1.0]
+
+
+def test_vector_store_reaproveita_embedding_da_consulta():
+    embedder = MagicMock()
+    embedder.embed_text.return_value = [1.0, 0.0]
+
+    with patch("app.services.vector_store.qdrant.QdrantClient"):
+        store = QdrantVectorStore(url="http://qdrant", embedder=embedder, query_cache=EmbeddingCache())
+
+    store.embed_query("Pergunta")
+    store.embed_query("pergunta")
+
+    embedder.embed_text.assert_called_once()
@@ -0,0 +1,71 @@
+import asyncio
+from datetime import date
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, PointStruct, VectorParams
+
+from app.ingest import parse_publication_date
+from app.services.rag import RAGService
+from app.services.vector_store.base import SearchFilter
+from app.services.vector_store.mmap_store import MmapVectorStore
+from app.services.vector_store.qdrant import to_qdrant_filter
+
+PAYLOADS = [
+    {"content_text": "edital antigo", "source": "deg.unb.br", "published_at": "2023-03-01T00:00:00Z"},
+    {"content_text": "edital recente", "source": "deg.unb.br", "published_at": "2025-08-29T00:00:00Z"},
+    {"content_text": "resolução sei", "source": "sei.unb.br", "published_at": "2025-09-10T00:00:00Z"},
+    {"content_text": "sem data", "source": "deg.unb.br"},
+]
+RECENT = SearchFilter(date_from=date(2025, 1, 1))
+
+
+def test_converte_datas_de_publicacao():
+    assert parse_publication_date("29 de agosto de 2025") == "2025-08-29T00:00:00Z"
+    assert parse_publication_date("1º de Março de 2024") == "2024-03-01T00:00:00Z"
+    assert parse_publication_date("03/09/2024") == "2024-09-03T00:00:00Z"
+    assert parse_publication_date("31 de fevereiro de 2024") is None
+    assert parse_publication_date(None) is None
+
+
+def test_filtro_vazio_e_falso_e_casa_payloads():
+    assert not SearchFilter()
+    assert RECENT.matches(PAYLOADS[1])
+    assert not RECENT.matches(PAYLOADS[0])
+    assert not RECENT.matches(PAYLOADS[3])
+    assert SearchFilter(sources=("sei.unb.br",)).matches(PAYLOADS[2])
+    assert SearchFilter(date_to=date(2025, 8, 29)).matches(PAYLOADS[1])
+
+
+def test_filtro_no_qdrant():
+    client = QdrantClient(":memory:")
+    client.create_collection("c", vectors_config=VectorParams(size=2, distance=Distance.COSINE))
+    client.upsert("c", points=[
+        PointStruct(id=i, vector=[1.0, i / 10], payload=p) for i, p in enumerate(PAYLOADS)
+    ])
+
+    def texts(filters):
+        points = client.query_points("c", query=[1.0, 0.0], query_filter=to_qdrant_filter(filters)).points
+        return [p.payload["content_text"] for p in points]
+
+    assert texts(RECENT) == ["edital recente", "resolução sei"]
+    assert texts(SearchFilter(sources=("sei.unb.br",), date_to=date(2025, 12, 31))) == ["resolução sei"]
+    assert to_qdrant_filter(SearchFilter()) is None
+
+
+def test_filtro_no_indice_mmap(tmp_path):
+    points = [(i, [1.0, i / 10], p) for i, p in enumerate(PAYLOADS)]
+    store = MmapVectorStore(MmapVectorStore.build(str(tmp_path), points), embedder=None)
+
+    assert store.search_by_vector([1.0, 0.0], top_k=4, filters=RECENT) == ["edital recente", "resolução sei"]
+
+
+def test_rag_repassa_filtros_e_ignora_cache(mock_llm, mock_vector_store):
+    cache = object()  # não deve ser usado
+    rag = RAGService(llm=mock_llm, vector_store=mock_vector_store, answer_cache=cache)
+
+    rag.generate_answer("editais recentes", RECENT)
+    asyncio.run(rag.agenerate_answer("editais recentes", RECENT))
+
+    mock_vector_store.search.assert_called_once_with("editais recentes", filters=RECENT)
+    mock_vector_store.asearch.assert_awaited_once_with("editais recentes", filters=RECENT)
+    mock_vector_store.embed_query.assert_not_called()
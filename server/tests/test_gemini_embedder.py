@@ -0,0 +1,32 @@
+from unittest.mock import patch
+from app.services.embedder.gemini_embedder import GeminiEmbedder
+
+
+def test_embed_texts_respeita_tamanho_maximo_do_lote():
+    with patch("app.services.embedder.gemini_embedder.genai") as mock_genai:
+        mock_genai.embed_content.side_effect = lambda model, content: {
+            "embedding": [[float(len(t))] for t in content]
+        }
+
+        embedder = GeminiEmbedder(api_key="fake_key", max_batch_size=2)
+        vetores = embedder.embed_texts(["a", "bb", "ccc"])
+
+        assert vetores == [[1.0], [2.0], [3.0]]
+        assert mock_genai.embed_content.call_count == 2
+
+
+def test_embed_texts_reporta_falha_por_item():
+    def fake_embed(model, content):
+        if isinstance(content, list):
+            raise Exception("lote rejeitado")
+        if content == "ruim":
+            raise Exception("item inválido")
+        return {"embedding": [1.0, 2.0]}
+
+    with patch("app.services.embedder.gemini_embedder.genai") as mock_genai:
+        mock_genai.embed_content.side_effect = fake_embed
+
+        embedder = GeminiEmbedder(api_key="fake_key")
+        vetores = embedder.embed_texts(["bom", "ruim", "bom"])
+
+        assert vetores == [[1.0, 2.0], [], [1.0, 2.0]]
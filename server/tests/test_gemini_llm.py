@@ -1,5 +1,7 @@
-from unittest.mock import patch
+import asyncio
+from unittest.mock import AsyncMock, patch
 from app.services.llm.gemini_llm import GeminiLLM
+from app.services.resilience import CircuitBreaker, ResiliencePolicy
 
 
 def test_gemini_llm_generate_response_success():
@@ -23,3 +25,38 @@ def test_gemini_llm_generate_response_error():
         resposta = llm.generate_response("Pergunta de teste")
 
         assert resposta == "Desculpe, ocorreu um erro ao processar sua solicitação."
+
+
+def test_gemini_llm_agenerate_response_success():
+    with patch("app.services.llm.gemini_llm.genai.GenerativeModel") as MockModel:
+        mock_instance = MockModel.return_value
+        mock_instance.generate_content_async = AsyncMock()
+        mock_instance.generate_content_async.return_value.text = "resposta assíncrona"
+
+        llm = GeminiLLM(api_key="fake_key")
+        resposta = asyncio.run(llm.agenerate_response("Pergunta de teste"))
+
+        assert resposta == "resposta assíncrona"
+        mock_instance.generate_content.assert_not_called()
+
+
+def test_gemini_llm_stream_response_erro_antes_do_primeiro_pedaco():
+    with patch("app.services.llm.gemini_llm.genai.GenerativeModel") as MockModel:
+        mock_instance = MockModel.return_value
+        mock_instance.generate_content.side_effect = Exception("API falhou")
+
+        llm = GeminiLLM(api_key="fake_key")
+
+        assert list(llm.stream_response("Pergunta de teste")) == [llm.error_response]
+
+
+def test_gemini_llm_circuito_aberto_responde_erro_sem_chamar_a_api():
+    with patch("app.services.llm.gemini_llm.genai.GenerativeModel") as MockModel:
+        mock_instance = MockModel.return_value
+        breaker = CircuitBreaker("gemini_teste", failure_threshold=1)
+        breaker.record_failure()
+
+        llm = GeminiLLM(api_key="fake_key", policy=ResiliencePolicy("gemini_teste", breaker=breaker))
+
+        assert llm.generate_response("Pergunta de teste") == llm.error_response
+        mock_instance.generate_content.assert_not_called()
@@ -0,0 +1,116 @@
+import asyncio
+from unittest.mock import MagicMock
+
+from app.config import SERVER_DIR, Settings
+from app.services.retrieval.bm25 import BM25Index, tokenize
+from app.services.retrieval.hybrid import HybridVectorStore, reciprocal_rank_fusion
+from app.services.vector_store.base import SearchHit, VectorStore
+
+DOCS = {
+    "a": "Edital DEG nº 0005/2025 de matrícula em disciplinas",
+    "b": "Calendário acadêmico do segundo semestre de 2025",
+    "c": "Resultado da seleção para monitoria na FCTE",
+}
+
+
+def make_index(docs=DOCS):
+    index = BM25Index()
+    index.add_many(docs.items())
+    return index
+
+
+def test_tokenize_mantem_identificadores_e_partes():
+    tokens = tokenize("Edital nº 0005/2025 das Matrículas")
+
+    assert "0005/2025" in tokens
+    assert "0005" in tokens and "2025" in tokens
+    assert "matricula" in tokens
+    assert "das" not in tokens
+
+
+def test_bm25_ranqueia_por_termo_exato():
+    index = make_index()
+
+    assert index.search("edital 0005/2025")[0][0] == "a"
+    assert index.search("monitoria fcte")[0][0] == "c"
+    assert index.search("inexistente") == []
+
+
+def test_bm25_reindexar_substitui_versao_anterior():
+    index = make_index()
+    index.add("a", "Restaurante universitário")
+    index.remove(["c"])
+
+    assert index.search("edital") == []
+    assert index.search("restaurante")[0][0] == "a"
+    assert index.search("monitoria") == []
+    assert len(index) == 2
+
+
+def test_bm25_salva_e_carrega(tmp_path):
+    path = str(tmp_path / "bm25.npz")
+    make_index().save(path)
+
+    loaded = BM25Index.load(path)
+    loaded.add("d", "Edital de monitoria 2026")
+
+    assert loaded.search("0005/2025")[0][0] == "a"
+    assert {doc for doc, _ in loaded.search("monitoria")} == {"c", "d"}
+
+
+def test_caminho_do_indice_parte_da_pasta_do_server(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("LEXICAL_INDEX_PATH", raising=False)
+
+    settings = Settings(_env_file=None, google_api_key="x", qdrant_url="http://qdrant")
+
+    assert settings.lexical_index_path == str(SERVER_DIR / "data" / "bm25.npz")
+
+
+def test_rrf_favorece_documentos_nos_dois_rankings():
+    fused = reciprocal_rank_fusion([["x", "y", "z"], ["z", "w"]], k=60)
+
+    assert fused[0][0] == "z"
+    assert {doc for doc, _ in fused} == {"x", "y", "z", "w"}
+
+
+def make_dense():
+    dense = MagicMock(spec=VectorStore)
+    hits = [
+        SearchHit(id="b", score=0.9, payload={"content_text": DOCS["b"]}),
+        SearchHit(id="c", score=0.8, payload={"content_text": DOCS["c"]}),
+    ]
+    dense.search_hits.return_value = hits
+    dense.asearch_hits.return_value = hits
+    dense.hydrate.side_effect = lambda hits: hits
+    dense.ahydrate.side_effect = lambda hits: hits
+    retrieved = [SearchHit(id="a", score=0.0, payload={"content_text": DOCS["a"]})]
+    dense.retrieve.return_value = retrieved
+    dense.aretrieve.return_value = retrieved
+    return dense
+
+
+def test_hibrido_traz_resultado_so_lexical_do_banco_denso():
+    dense = make_dense()
+    store = HybridVectorStore(dense, make_index(), candidates=5)
+
+    docs = store.search_by_vector([0.1], top_k=3, query="edital 0005/2025")
+
+    assert DOCS["a"] in docs
+    dense.retrieve.assert_called_once_with(["a"])
+
+
+def test_hibrido_sem_query_usa_so_busca_vetorial():
+    dense = make_dense()
+    store = HybridVectorStore(dense, make_index())
+
+    assert store.search_by_vector([0.1], top_k=2) == [DOCS["b"], DOCS["c"]]
+    dense.retrieve.assert_not_called()
+
+
+def test_hibrido_async():
+    store = HybridVectorStore(make_dense(), make_index(), candidates=5)
+
+    hits = asyncio.run(store.asearch_hits([0.1], top_k=3, query="monitoria fcte"))
+
+    assert hits[0].id == "c"
@@ -0,0 +1,116 @@
+import threading
+import time
+
+from app.services.ingest_jobs import IngestJobManager, JobStatus
+
+
+def wait_for(manager, job_id):
+    manager.shutdown(wait=True)
+    return manager.get(job_id)
+
+
+def test_job_concluido_reporta_progresso():
+    def runner(docs, stats):
+        stats.total_chunks = len(docs)
+        stats.upserted = len(docs)
+        return stats
+
+    manager = IngestJobManager(runner)
+    job = manager.submit([{"url": "a"}, {"url": "b"}])
+    job = wait_for(manager, job.id)
+
+    assert job.status == JobStatus.COMPLETED
+    assert job.to_dict()["progress"]["upserted"] == 2
+
+
+def test_job_com_erro_fica_como_failed():
+    def runner(docs, stats):
+        raise RuntimeError("qdrant fora do ar")
+
+    manager = IngestJobManager(runner)
+    job = wait_for(manager, manager.submit([{}]).id)
+
+    assert job.status == JobStatus.FAILED
+    assert job.error == "qdrant fora do ar"
+
+
+def test_limite_de_jobs_concorrentes():
+    ativos = 0
+    maximo = 0
+    lock = threading.Lock()
+    liberar = threading.Event()
+
+    def runner(docs, stats):
+        nonlocal ativos, maximo
+        with lock:
+            ativos += 1
+            maximo = max(maximo, ativos)
+        liberar.wait(1)
+        with lock:
+            ativos -= 1
+        return stats
+
+    manager = IngestJobManager(runner, max_concurrent_jobs=2)
+    jobs = [manager.submit([{}]) for _ in range(5)]
+    liberar.set()
+    manager.shutdown(wait=True)
+
+    assert maximo <= 2
+    assert all(manager.get(j.id).status == JobStatus.COMPLETED for j in jobs)
+
+
+def test_on_complete_e_chamado_ao_final():
+    concluidos = []
+    manager = IngestJobManager(lambda docs, stats: stats, on_complete=concluidos.append)
+    job = manager.submit([{}])
+    manager.shutdown(wait=True)
+
+    assert [j.id for j in concluidos] == [job.id]
+
+
+def wait_status(manager, job_id, status, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while manager.get(job_id).status != status and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return manager.get(job_id).status
+
+
+def test_segundo_job_espera_o_primeiro_terminar():
+    liberar = threading.Event()
+    chamadas = []
+
+    def runner(docs, stats):
+        chamadas.append(docs)
+        liberar.wait(2)
+        return stats
+
+    manager = IngestJobManager(runner, max_concurrent_jobs=1)
+    primeiro = manager.submit([{"url": "a"}])
+    assert wait_status(manager, primeiro.id, JobStatus.RUNNING) == JobStatus.RUNNING
+
+    segundo = manager.submit([{"url": "b"}])
+    time.sleep(0.05)
+
+    # Com o primeiro preso no Event, o segundo continua na fila.
+    assert manager.get(segundo.id).status == JobStatus.QUEUED
+    assert chamadas == [[{"url": "a"}]]
+
+    liberar.set()
+    manager.shutdown(wait=True)
+    assert manager.get(segundo.id).status == JobStatus.COMPLETED
+    assert len(chamadas) == 2
+
+
+def test_desligamento_cancela_jobs_na_fila_e_espera_o_que_roda():
+    liberar = threading.Event()
+    manager = IngestJobManager(lambda docs, stats: liberar.wait(2) and stats, max_concurrent_jobs=1)
+    rodando = manager.submit([{}])
+    assert wait_status(manager, rodando.id, JobStatus.RUNNING) == JobStatus.RUNNING
+    na_fila = manager.submit([{}])
+
+    threading.Timer(0.05, liberar.set).start()
+    manager.shutdown(wait=True, cancel_queued=True)
+
+    assert manager.get(rodando.id).status == JobStatus.COMPLETED
+    assert manager.get(na_fila.id).status == JobStatus.FAILED
+    assert "desligado" in manager.get(na_fila.id).error
@@ -0,0 +1,167 @@
+import asyncio
+import threading
+import time
+from typing import List
+from unittest.mock import patch
+
+from qdrant_client import QdrantClient
+
+from app.services.embedder.base import Embedder
+from app.services.ingest_pipeline import IngestPipeline
+from app.services.vector_store.qdrant import PAYLOAD_INDEXES, QdrantClients
+
+
+class FakeEmbedder(Embedder):
+    def __init__(self, fail_on: str | None = None, delay: float = 0.0):
+        self.fail_on = fail_on
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def embed_text(self, text: str) -> List[float]:
+        return [] if text == self.fail_on else [float(len(text)), 1.0, 0.5]
+
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.delay)
+        with self._lock:
+            self.in_flight -= 1
+        return [self.embed_text(t) for t in texts]
+
+
+def make_records(n: int):
+    for i in range(n):
+        yield {"text": f"texto {i}", "payload": {"url": f"https://x/{i}", "chunk": 0}}
+
+
+def make_pipeline(client, embedder, **kwargs):
+    return IngestPipeline(
+        client=client,
+        embedder=embedder,
+        collection_name="teste",
+        point_id_fn=lambda rec: int(rec["payload"]["url"].rsplit("/", 1)[1]),
+        **kwargs,
+    )
+
+
+def test_pipeline_insere_todos_os_registros():
+    client = QdrantClient(":memory:")
+    stats = make_pipeline(client, FakeEmbedder(), batch_size=7).run(make_records(50))
+
+    assert stats.total_chunks == 50
+    assert stats.upserted == 50
+    assert client.count("teste").count == 50
+
+
+def test_pipeline_reporta_falhas_de_embedding_sem_abortar():
+    client = QdrantClient(":memory:")
+    stats = make_pipeline(client, FakeEmbedder(fail_on="texto 3")).run(make_records(10))
+
+    assert stats.failed_embeddings == 1
+    assert stats.upserted == 9
+    assert "https://x/3" in stats.errors[0]
+
+
+def test_pipeline_conta_erro_no_estagio_de_embedding_como_falha_de_embedding():
+    client = QdrantClient(":memory:")
+
+    def bad_id(rec):
+        raise ValueError("id inválido")
+
+    stats = IngestPipeline(client, FakeEmbedder(), "teste", point_id_fn=bad_id).run(make_records(4))
+
+    assert stats.failed_embeddings == 4
+    assert stats.failed_upserts == 0
+    assert "estágio de embedding" in stats.errors[0]
+
+
+def test_pipeline_limita_lotes_em_voo():
+    client = QdrantClient(":memory:")
+    embedder = FakeEmbedder(delay=0.01)
+    make_pipeline(
+        client, embedder, batch_size=2, embed_workers=8, queue_depth=3
+    ).run(make_records(40))
+
+    assert embedder.max_in_flight <= 3
+
+
+def make_doc_records(textos):
+    for idx, texto in enumerate(textos):
+        yield {
+            "text": texto,
+            "payload": {
+                "url": "https://x/0",
+                "chunk": idx,
+                "total_chunks": len(textos),
+                "content_hash": texto,
+            },
+        }
+
+
+def chunk_id(rec):
+    return rec["payload"]["chunk"]
+
+
+def test_pipeline_incremental_pula_chunks_inalterados():
+    client = QdrantClient(":memory:")
+    embedder = FakeEmbedder()
+    pipeline = IngestPipeline(client, embedder, "teste", point_id_fn=chunk_id)
+    pipeline.run(make_doc_records(["a", "b", "c"]))
+
+    stats = IngestPipeline(client, embedder, "teste", point_id_fn=chunk_id).run(
+        make_doc_records(["a", "B", "c"])
+    )
+
+    assert stats.skipped_unchanged == 2
+    assert stats.embedded == 1
+
+
+def test_pipeline_incremental_remove_chunks_obsoletos():
+    client = QdrantClient(":memory:")
+    embedder = FakeEmbedder()
+    IngestPipeline(client, embedder, "teste", point_id_fn=chunk_id).run(make_doc_records(["a", "b", "c"]))
+
+    stats = IngestPipeline(client, embedder, "teste", point_id_fn=chunk_id).run(make_doc_records(["a"]))
+
+    assert stats.deleted_stale == 2
+    assert client.count("teste").count == 1
+
+
+def test_pipeline_notifica_upserts():
+    client = QdrantClient(":memory:")
+    seen = []
+    make_pipeline(client, FakeEmbedder(), batch_size=4, on_upsert=lambda points: seen.extend(p.id for p in points)).run(make_records(10))
+
+    assert sorted(seen) == list(range(10))
+
+
+def test_pipeline_com_clientes_compartilhados_verifica_colecao_uma_vez():
+    client = QdrantClient(":memory:")
+    with patch("app.services.vector_store.qdrant.QdrantClient", return_value=client), \
+            patch("app.services.vector_store.qdrant.AsyncQdrantClient"):
+        clients = QdrantClients(url="http://qdrant")
+
+    make_pipeline(client, FakeEmbedder(), collections=clients, payload_indexes=PAYLOAD_INDEXES).run(make_records(5))
+    with patch.object(client, "collection_exists", wraps=client.collection_exists) as exists:
+        make_pipeline(client, FakeEmbedder(), collections=clients).run(make_records(8))
+        make_pipeline(client, FakeEmbedder(), collections=clients, recreate=True).run(make_records(3))
+
+    assert client.count("teste").count == 3
+    # Só a recriação precisa consultar o Qdrant de novo.
+    assert exists.call_count == 1
+
+
+def test_qdrant_em_memoria_compartilha_a_colecao_entre_clientes():
+    clients = QdrantClients(location=":memory:")
+
+    make_pipeline(clients.sync, FakeEmbedder(), collections=clients).run(make_records(4))
+
+    async def run():
+        count = await clients.aio.count("teste")
+        await clients.aclose()
+        return count.count
+
+    assert asyncio.run(run()) == 4
@@ -0,0 +1,67 @@
+import asyncio
+from unittest.mock import MagicMock
+
+from app.services.answer_cache import SemanticAnswerCache
+from app.services.embedder.base import Embedder
+from app.services.embedder.instrumented import InstrumentedEmbedder
+from app.services.metrics import (
+    EMBEDDED_TEXTS,
+    PROMPT_TOKENS,
+    STAGE_SECONDS,
+    MetricsRegistry,
+)
+from app.services.rag import RAGService
+
+
+def test_histograma_no_formato_prometheus():
+    registry = MetricsRegistry()
+    latency = registry.histogram("lat_seconds", "Latência.", labels=("stage",), buckets=(0.1, 1.0))
+    calls = registry.counter("calls_total", "Chamadas.")
+    latency.observe(0.05, stage="search")
+    latency.observe(0.5, stage="search")
+    latency.observe(3.0, stage="search")
+    calls.inc(2)
+
+    text = registry.render()
+
+    assert "# TYPE lat_seconds histogram" in text
+    assert 'lat_seconds_bucket{stage="search",le="0.1"} 1' in text
+    assert 'lat_seconds_bucket{stage="search",le="1.0"} 2' in text
+    assert 'lat_seconds_bucket{stage="search",le="+Inf"} 3' in text
+    assert 'lat_seconds_count{stage="search"} 3' in text
+    assert "calls_total 2" in text
+
+
+def test_coletor_e_lido_na_hora_da_coleta():
+    registry = MetricsRegistry()
+    state = {"hits": 1}
+    registry.add_collector(lambda: [("cache_hits_total", "counter", "Acertos.", {"tier": "memory"}, state["hits"])])
+    state["hits"] = 5
+
+    assert 'cache_hits_total{tier="memory"} 5' in registry.render()
+
+
+def test_rag_registra_etapas(mock_llm, mock_vector_store):
+    rag = RAGService(llm=mock_llm, vector_store=mock_vector_store, answer_cache=SemanticAnswerCache())
+    before = {stage: STAGE_SECONDS.count(stage=stage) for stage in ("embed", "prompt", "llm")}
+    prompts = PROMPT_TOKENS.count()
+
+    asyncio.run(rag.agenerate_answer("O que é monitoria?"))
+
+    for stage, count in before.items():
+        assert STAGE_SECONDS.count(stage=stage) == count + 1
+    assert PROMPT_TOKENS.count() == prompts + 1
+
+
+def test_embedder_instrumentado_preserva_nome_e_dimensao():
+    inner = MagicMock(spec=Embedder)
+    inner.model_name = "modelo"
+    inner.dimension = 3
+    inner.max_batch_size = 10
+    inner.embed_texts.return_value = [[1.0], [2.0]]
+    embedder = InstrumentedEmbedder(inner)
+    before = EMBEDDED_TEXTS.value(operation="batch")
+
+    assert embedder.embed_texts(["a", "b"]) == [[1.0], [2.0]]
+    assert (embedder.model_name, embedder.dimension, embedder.max_batch_size) == ("modelo", 3, 10)
+    assert EMBEDDED_TEXTS.value(operation="batch") == before + 2
@@ -0,0 +1,79 @@
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import Distance, PointStruct, VectorParams
+
+from app.services.vector_store.base import SearchFilter
+from app.services.vector_store.mmap_store import MmapVectorStore, export_from_qdrant
+
+
+def make_points(n=300, dim=16, seed=1):
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(n, dim)).astype(np.float32)
+    return [(i, vectors[i].tolist(), {"content_text": f"doc {i}"}) for i in range(n)], vectors
+
+
+def brute_force(vectors, q, k):
+    normed = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    return list(np.argsort(-(normed @ (q / np.linalg.norm(q))))[:k])
+
+
+def test_busca_exata_igual_a_forca_bruta(tmp_path):
+    points, vectors = make_points()
+    store = MmapVectorStore(MmapVectorStore.build(str(tmp_path), points), embedder=None)
+
+    q = vectors[42] + 0.01
+    rows = [row for row, _ in store.search_rows(q.tolist(), top_k=5)]
+
+    assert rows == brute_force(vectors, q, 5)
+    assert store.search_by_vector(q.tolist(), top_k=1) == ["doc 42"]
+
+
+def test_int8_preserva_o_vizinho_mais_proximo(tmp_path):
+    points, vectors = make_points()
+    store = MmapVectorStore(
+        MmapVectorStore.build(str(tmp_path), points, quantization="int8"), embedder=None
+    )
+
+    for i in (0, 7, 99):
+        assert store.search_rows(vectors[i].tolist(), top_k=1)[0][0] == i
+
+
+def test_modo_aproximado_ivf_encontra_o_proprio_ponto(tmp_path):
+    points, vectors = make_points(n=1000)
+    path = MmapVectorStore.build(str(tmp_path), points, ivf_lists=16)
+    store = MmapVectorStore(path, embedder=None, approximate=True, nprobe=4)
+
+    assert store.approximate
+    hits = sum(store.search_rows(vectors[i].tolist(), top_k=1)[0][0] == i for i in range(0, 1000, 50))
+    assert hits >= 18
+
+
+def test_filtro_seletivo_no_modo_ivf_sonda_mais_particoes(tmp_path):
+    points, vectors = make_points(n=1000)
+    rare = set(range(0, 1000, 100))
+    points = [
+        (i, vector, {**payload, "source": "raro" if i in rare else "comum"})
+        for i, vector, payload in points
+    ]
+    store = MmapVectorStore(
+        MmapVectorStore.build(str(tmp_path), points, ivf_lists=16), embedder=None, approximate=True, nprobe=1
+    )
+
+    hits = store.search_hits(vectors[1].tolist(), top_k=5, filters=SearchFilter(sources=("raro",)))
+
+    assert len(hits) == 5
+    assert {int(h.id) for h in hits} <= rare
+
+
+def test_exporta_colecao_do_qdrant(tmp_path):
+    client = QdrantClient(":memory:")
+    client.create_collection("c", vectors_config=VectorParams(size=4, distance=Distance.COSINE))
+    client.upsert("c", points=[
+        PointStruct(id=i, vector=[float(i == j) for j in range(4)], payload={"content_text": f"t{i}"})
+        for i in range(4)
+    ])
+
+    store = MmapVectorStore(export_from_qdrant(client, "c", str(tmp_path)), embedder=None)
+
+    assert store.count == 4
+    assert store.search_by_vector([0.0, 0.0, 1.0, 0.0], top_k=1) == ["t2"]
@@ -0,0 +1,70 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from app.services.embedder.onnx_embedder import OnnxEmbedder
+
+
+class FakeTokenizer:
+    @classmethod
+    def from_file(cls, path):
+        return cls()
+
+    def enable_truncation(self, max_length):
+        pass
+
+    def enable_padding(self):
+        pass
+
+    def encode_batch(self, texts):
+        # Um token por caractere, com padding até o maior texto do lote.
+        size = max(len(t) for t in texts)
+        return [
+            SimpleNamespace(
+                ids=[1] * len(t) + [0] * (size - len(t)),
+                attention_mask=[1] * len(t) + [0] * (size - len(t)),
+            )
+            for t in texts
+        ]
+
+
+class FakeSession:
+    def __init__(self, *args, **kwargs):
+        self.calls = 0
+
+    def get_inputs(self):
+        return [SimpleNamespace(name="input_ids"), SimpleNamespace(name="attention_mask")]
+
+    def run(self, outputs, feeds):
+        self.calls += 1
+        mask = feeds["attention_mask"]
+        # Tokens válidos valem [3, 4]; padding vale [100, 100] e deve ser ignorado.
+        hidden = np.where(mask[..., None] == 1, np.array([3.0, 4.0]), 100.0)
+        return [hidden.astype(np.float32)]
+
+
+def make_embedder(**kwargs):
+    fake_ort = MagicMock()
+    fake_ort.InferenceSession = FakeSession
+    with patch(
+        "app.services.embedder.onnx_embedder._import_runtime",
+        return_value=(fake_ort, FakeTokenizer),
+    ):
+        return OnnxEmbedder(model_path="/modelos/minilm/model.onnx", **kwargs)
+
+
+def test_mean_pooling_ignora_padding_e_normaliza():
+    embedder = make_embedder()
+    vetores = embedder.embed_texts(["a", "abcd"])
+
+    np.testing.assert_allclose(vetores, [[0.6, 0.8], [0.6, 0.8]], rtol=1e-6)
+    assert embedder.dimension == 2
+
+
+def test_inferencia_em_lotes():
+    embedder = make_embedder(max_batch_size=2)
+    embedder.embed_texts(["a", "b", "c", "d", "e"])
+
+    assert embedder.session.calls == 3
+    assert embedder.model_name == "onnx:minilm/model.onnx"
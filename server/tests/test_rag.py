@@ -1,3 +1,4 @@
+import asyncio
 from app.services.llm.base import LLM
 from app.services.vector_store.base import VectorStore
 from app.services.rag import RAGService
@@ -31,3 +32,31 @@ def test_generate_answer_returns_llm_response(rag_service: RAGService):
     resposta = rag_service.generate_answer(pergunta)
 
     assert resposta == "resposta gerada pelo LLM"
+
+
+def test_agenerate_answer_usa_caminho_assincrono(
+    rag_service: RAGService, mock_vector_store: VectorStore, mock_llm: LLM
+):
+    pergunta = "O que é o PIBID?"
+    resposta = asyncio.run(rag_service.agenerate_answer(pergunta))
+
+    assert resposta == "resposta gerada pelo LLM"
+    mock_vector_store.asearch.assert_awaited_once_with(pergunta)
+    assert "doc1" in mock_llm.agenerate_response.call_args[0][0]
+    mock_vector_store.search.assert_not_called()
+    mock_llm.generate_response.assert_not_called()
+
+
+def test_astream_answer_repassa_pedacos_do_llm(
+    rag_service: RAGService, mock_llm: LLM
+):
+    async def fake_stream(prompt):
+        for pedaco in ["Olá", ", ", "mundo"]:
+            yield pedaco
+
+    mock_llm.astream_response = fake_stream
+
+    async def collect():
+        return [pedaco async for pedaco in rag_service.astream_answer("pergunta")]
+
+    assert asyncio.run(collect()) == ["Olá", ", ", "mundo"]
@@ -0,0 +1,65 @@
+import asyncio
+import threading
+import time
+
+from app.services.rate_limit import Priority, TokenBucketScheduler, priority
+
+
+def test_pergunta_ao_vivo_passa_na_frente_da_ingestao():
+    scheduler = TokenBucketScheduler("teste_ordem", rate=10, burst=1)
+    assert scheduler.try_acquire()
+    order = []
+
+    def call(level):
+        scheduler.acquire(level=level)
+        order.append(level)
+
+    bulk = threading.Thread(target=call, args=(Priority.BULK,))
+    interactive = threading.Thread(target=call, args=(Priority.INTERACTIVE,))
+    bulk.start()
+    time.sleep(0.02)
+    interactive.start()
+    bulk.join(2)
+    interactive.join(2)
+
+    assert order == [Priority.INTERACTIVE, Priority.BULK]
+    stats = scheduler.stats()
+    assert stats["throttled"] == {"interactive": 1, "batch": 0, "bulk": 1}
+    assert stats["queued"] == {"interactive": 0, "batch": 0, "bulk": 0}
+
+
+def test_ingestao_deixa_reserva_para_perguntas():
+    scheduler = TokenBucketScheduler("teste_reserva", rate=1, burst=3, bulk_reserve=2, clock=lambda: 0.0)
+
+    with priority(Priority.BULK):
+        assert scheduler.try_acquire()
+        assert not scheduler.try_acquire()
+    assert scheduler.try_acquire()
+    assert scheduler.try_acquire()
+    assert scheduler.stats()["granted"] == {"interactive": 2, "batch": 0, "bulk": 1}
+
+
+def test_espera_assincrona_e_fila_visivel():
+    scheduler = TokenBucketScheduler("teste_async", rate=20, burst=1)
+
+    async def run():
+        assert scheduler.try_acquire()
+        waiter = asyncio.create_task(scheduler.aacquire())
+        await asyncio.sleep(0)
+        queued = scheduler.stats()["queued"]["interactive"]
+        # Com alguém na fila, try_acquire não fura a vez.
+        blocked = not scheduler.try_acquire()
+        waited = await waiter
+        return queued, blocked, waited
+
+    queued, blocked, waited = asyncio.run(run())
+
+    assert (queued, blocked) == (1, True)
+    assert waited > 0.01
+
+
+def test_sem_taxa_nao_limita():
+    scheduler = TokenBucketScheduler("teste_livre", rate=0)
+
+    assert all(scheduler.try_acquire() for _ in range(100))
+    assert scheduler.acquire() == 0.0
@@ -0,0 +1,99 @@
+import asyncio
+import time
+from typing import List
+from unittest.mock import MagicMock
+
+from app.services.metrics import REGISTRY
+from app.services.retrieval.reranker import Reranker, RerankingVectorStore
+from app.services.vector_store.base import SearchHit, VectorStore
+
+
+class LengthReranker(Reranker):
+    """Prefere textos mais longos; `delay` simula inferência lenta por lote."""
+
+    max_batch_size = 2
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.batches = 0
+
+    def score_batch(self, query: str, texts: List[str]) -> List[float]:
+        self.batches += 1
+        time.sleep(self.delay)
+        return [float(len(t)) for t in texts]
+
+
+def make_inner():
+    inner = MagicMock(spec=VectorStore)
+    hits = [SearchHit(id=str(i), score=1 - i / 10, payload={"content_text": "x" * (i + 1)}) for i in range(6)]
+    inner.search_hits.return_value = hits
+    inner.asearch_hits.return_value = hits
+    inner.hydrate.side_effect = lambda hits: hits
+    inner.ahydrate.side_effect = lambda hits: hits
+    return inner
+
+
+def test_reranker_reordena_candidatos_em_lotes():
+    inner = make_inner()
+    reranker = LengthReranker()
+    store = RerankingVectorStore(inner, reranker, candidates=6, budget_ms=1000)
+
+    hits = store.search_hits([0.1], top_k=2, query="pergunta")
+
+    assert [h.id for h in hits] == ["5", "4"]
+    assert reranker.batches == 3
+    inner.search_hits.assert_called_once_with([0.1], 6, "pergunta", None)
+
+
+def test_reranker_lento_cai_na_ordem_vetorial():
+    store = RerankingVectorStore(make_inner(), LengthReranker(delay=0.05), candidates=6, budget_ms=20)
+
+    hits = store.search_hits([0.1], top_k=2, query="pergunta")
+
+    assert [h.id for h in hits] == ["0", "1"]
+    assert store.stats() == {"reranked": 0, "fallbacks": 1}
+
+
+def test_reranker_async_respeita_orcamento():
+    fast = RerankingVectorStore(make_inner(), LengthReranker(), candidates=6, budget_ms=1000)
+    slow = RerankingVectorStore(make_inner(), LengthReranker(delay=0.05), candidates=6, budget_ms=20)
+
+    assert [h.id for h in asyncio.run(fast.asearch_hits([0.1], 1, "p"))] == ["5"]
+    assert [h.id for h in asyncio.run(slow.asearch_hits([0.1], 1, "p"))] == ["0"]
+
+
+def test_orcamento_nao_conta_o_tempo_da_busca():
+    inner = make_inner()
+    hits = inner.search_hits.return_value
+    inner.search_hits.side_effect = lambda *args: time.sleep(0.05) or hits
+    store = RerankingVectorStore(inner, LengthReranker(), candidates=6, budget_ms=30)
+
+    assert [h.id for h in store.search_hits([0.1], top_k=2, query="pergunta")] == ["5", "4"]
+    assert store.stats() == {"reranked": 1, "fallbacks": 0}
+
+
+def test_lote_divide_um_unico_prazo():
+    inner = make_inner()
+    inner.asearch_hits_batch.return_value = [inner.search_hits.return_value] * 4
+    # Cada consulta leva ~90 ms (3 lotes de 30 ms); em sequência, com prazo
+    # por consulta, o lote inteiro levaria ~360 ms.
+    store = RerankingVectorStore(inner, LengthReranker(delay=0.03), candidates=6, budget_ms=100)
+
+    started = time.monotonic()
+    results = asyncio.run(store.asearch_hits_batch([[0.1]] * 4, 1, ["a", "b", "c", "d"]))
+    elapsed = time.monotonic() - started
+
+    assert len(results) == 4 and all(len(hits) == 1 for hits in results)
+    assert elapsed < 0.25
+    stats = store.stats()
+    assert stats["reranked"] + stats["fallbacks"] == 4 and stats["fallbacks"] >= 2
+
+
+def test_contadores_aparecem_no_metrics():
+    store = RerankingVectorStore(make_inner(), LengthReranker(delay=0.05), candidates=6, budget_ms=20)
+    store.search_hits([0.1], top_k=2, query="pergunta")
+
+    text = REGISTRY.render()
+
+    assert 'chiquinho_rerank_queries_total{outcome="fallback"}' in text
+    assert "chiquinho_rerank_budget_seconds" in text
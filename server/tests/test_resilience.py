@@ -0,0 +1,135 @@
+import asyncio
+
+import pytest
+
+from app.services.metrics import UPSTREAM_HEDGES
+from app.services.resilience import CircuitBreaker, CircuitOpenError, ResiliencePolicy
+
+
+class Transient(Exception):
+    code = 503
+
+
+def test_repete_erros_transitorios_e_nao_os_demais():
+    policy = ResiliencePolicy("teste", max_retries=2, backoff_base=0)
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise Transient("indisponível")
+        return "ok"
+
+    assert policy.call(flaky) == "ok"
+    assert len(calls) == 3
+
+    calls.clear()
+
+    def invalid():
+        calls.append(1)
+        raise ValueError("prompt inválido")
+
+    with pytest.raises(ValueError):
+        policy.call(invalid)
+    assert len(calls) == 1
+
+
+def test_circuito_abre_recusa_e_fecha_apos_chamada_de_teste():
+    now = [0.0]
+    breaker = CircuitBreaker("teste", failure_threshold=2, reset_seconds=10, clock=lambda: now[0])
+    policy = ResiliencePolicy("teste", max_retries=0, breaker=breaker)
+
+    def down():
+        raise Transient("indisponível")
+
+    for _ in range(2):
+        with pytest.raises(Transient):
+            policy.call(down)
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        policy.call(lambda: "ok")
+
+    now[0] = 11
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert policy.call(lambda: "ok") == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+
+class BadRequest(Exception):
+    code = 400
+
+
+def test_chamada_de_teste_com_erro_do_cliente_fecha_o_circuito():
+    now = [0.0]
+    breaker = CircuitBreaker("teste", failure_threshold=1, reset_seconds=10, clock=lambda: now[0])
+    policy = ResiliencePolicy("teste", max_retries=0, breaker=breaker)
+
+    def down():
+        raise Transient("indisponível")
+
+    def invalid():
+        raise BadRequest("prompt inválido")
+
+    with pytest.raises(Transient):
+        policy.call(down)
+    now[0] = 11
+    with pytest.raises(BadRequest):
+        policy.call(invalid)
+
+    assert policy.call(lambda: "ok") == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_chamada_de_teste_cancelada_libera_o_circuito():
+    now = [0.0]
+    breaker = CircuitBreaker("teste", failure_threshold=1, reset_seconds=10, clock=lambda: now[0])
+    policy = ResiliencePolicy("teste", max_retries=0, breaker=breaker)
+
+    async def down():
+        raise Transient("indisponível")
+
+    async def run():
+        with pytest.raises(Transient):
+            await policy.acall(down)
+        now[0] = 11
+        probe = asyncio.create_task(policy.acall(lambda: asyncio.sleep(1)))
+        await asyncio.sleep(0.01)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        return await policy.acall(lambda: asyncio.sleep(0, result="ok"))
+
+    assert asyncio.run(run()) == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_prazo_assincrono_conta_como_falha_transitoria():
+    policy = ResiliencePolicy("teste", timeout=0.01, max_retries=1, backoff_base=0)
+    calls = []
+
+    async def slow_then_fast():
+        calls.append(1)
+        if len(calls) == 1:
+            await asyncio.sleep(1)
+        return "ok"
+
+    assert asyncio.run(policy.acall(slow_then_fast)) == "ok"
+    assert len(calls) == 2
+
+
+def test_hedge_dispara_duplicata_depois_do_p95():
+    policy = ResiliencePolicy("teste_hedge", hedge=True, hedge_min_delay=0.01, hedge_min_samples=3)
+    for _ in range(3):
+        policy._record_success(0.001)
+    calls = []
+
+    async def first_slow():
+        calls.append(1)
+        await asyncio.sleep(1 if len(calls) == 1 else 0)
+        return len(calls)
+
+    won = UPSTREAM_HEDGES.value(upstream="teste_hedge", outcome="won")
+
+    assert asyncio.run(asyncio.wait_for(policy.acall(first_slow), 0.5)) == 2
+    assert UPSTREAM_HEDGES.value(upstream="teste_hedge", outcome="won") == won + 1
@@ -0,0 +1,133 @@
+import asyncio
+
+import pytest
+
+from app.services.rag import RAGService
+from app.services.single_flight import SingleFlight, normalize_question
+
+
+def test_normaliza_caixa_espacos_e_pontuacao():
+    assert normalize_question("  Quando abre a   MATRÍCULA? ") == normalize_question("quando abre a matrícula")
+    assert normalize_question("Quando abre a matrícula?") != normalize_question("Quando fecha a matrícula?")
+
+
+def test_perguntas_iguais_em_voo_compartilham_uma_execucao(mock_llm, mock_vector_store):
+    coalescer = SingleFlight()
+    calls = []
+
+    async def slow_answer(prompt):
+        calls.append(prompt)
+        await asyncio.sleep(0.05)
+        return "resposta única"
+
+    mock_llm.agenerate_response.side_effect = slow_answer
+    # Uma instância por requisição, como no get_rag_service.
+    services = [RAGService(llm=mock_llm, vector_store=mock_vector_store, coalescer=coalescer) for _ in range(5)]
+    questions = ["Quando abre a matrícula?", "quando abre a matrícula", "QUANDO ABRE A MATRÍCULA?!"]
+
+    async def run():
+        return await asyncio.gather(*(
+            rag.agenerate_answer(questions[i % len(questions)]) for i, rag in enumerate(services)
+        ))
+
+    answers = asyncio.run(run())
+
+    assert answers == ["resposta única"] * 5
+    assert len(calls) == 1
+    assert coalescer.stats() == {"in_flight": 0, "leaders": 1, "coalesced": 4, "coalesced_rate": 0.8}
+
+
+def test_erro_chega_a_todos_e_nao_fica_preso():
+    coalescer = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("falhou")
+
+    async def run():
+        return await asyncio.gather(*(coalescer.do("k", fail) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(run())
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert asyncio.run(coalescer.do("k", lambda: asyncio.sleep(0, result="ok"))) == "ok"
+
+
+def test_desistencia_de_quem_iniciou_nao_cancela_os_demais():
+    coalescer = SingleFlight()
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    async def run():
+        leader = asyncio.create_task(coalescer.do("k", slow))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(coalescer.do("k", slow))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(run()) == "ok"
+
+
+def test_streams_iguais_em_voo_compartilham_uma_geracao(mock_llm, mock_vector_store):
+    coalescer = SingleFlight()
+    calls = []
+
+    async def slow_stream(prompt):
+        calls.append(prompt)
+        for chunk in ["Abre ", "em ", "março."]:
+            await asyncio.sleep(0.01)
+            yield chunk
+
+    mock_llm.astream_response = slow_stream
+    services = [RAGService(llm=mock_llm, vector_store=mock_vector_store, coalescer=coalescer) for _ in range(4)]
+
+    async def collect(rag, question, delay=0.0):
+        await asyncio.sleep(delay)
+        return [chunk async for chunk in rag.astream_answer(question)]
+
+    async def run():
+        streams = asyncio.gather(
+            collect(services[0], "Quando abre a matrícula?"),
+            collect(services[1], "quando abre a matrícula"),
+            # Chega depois do primeiro pedaço e ainda recebe a resposta inteira.
+            collect(services[2], "QUANDO ABRE A MATRÍCULA", delay=0.015),
+        )
+        await asyncio.sleep(0.005)
+        # /response com a mesma pergunta espera a mesma geração.
+        answer = await services[3].agenerate_answer("Quando abre a matrícula?")
+        return await streams, answer
+
+    streams, answer = asyncio.run(run())
+
+    assert streams == [["Abre ", "em ", "março."]] * 3
+    assert answer == "Abre em março."
+    assert len(calls) == 1
+    mock_llm.agenerate_response.assert_not_called()
+    assert coalescer.stats()["coalesced"] == 3
+
+
+def test_erro_no_stream_chega_a_todos_os_inscritos():
+    coalescer = SingleFlight()
+
+    async def failing():
+        yield "parte"
+        await asyncio.sleep(0.01)
+        raise RuntimeError("falhou")
+
+    async def consume():
+        chunks = []
+        with pytest.raises(RuntimeError):
+            async for chunk in coalescer.stream("k", failing):
+                chunks.append(chunk)
+        return chunks
+
+    async def run():
+        return await asyncio.gather(consume(), consume())
+
+    assert asyncio.run(run()) == [["parte"], ["parte"]]
+    assert coalescer.stats()["in_flight"] == 0
@@ -1,6 +1,8 @@
 import os
+import json
+import time
 import logging
-import requests
+import httpx
 from pathlib import Path
 from telegram import Update
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
@@ -17,6 +19,12 @@ logger = logging.getLogger(__name__)
 
 TELEGRAM_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 API_URL = os.getenv("API_URL", "http://localhost:55555/response")
+STREAM_API_URL = os.getenv("STREAM_API_URL", f"{API_URL.rstrip('/')}/stream")
+
+# O Telegram limita edições de mensagem; atualiza a resposta no máximo a
+# cada EDIT_INTERVAL segundos enquanto os pedaços chegam.
+EDIT_INTERVAL = float(os.getenv("EDIT_INTERVAL", 1.5))
+TELEGRAM_MAX_CHARS = 4096
 
 PORT = int(os.environ.get('PORT', 8443))
 WEBHOOK_URL = os.getenv("WEBHOOK_URL") 
@@ -48,6 +56,55 @@ Pode perguntar!
     await update.message.reply_text(welcome_message, parse_mode='Markdown')
 
 
+async def iter_sse(response: httpx.Response):
+    """Lê um stream Server-Sent Events e devolve pares (evento, dados)."""
+    event, data = "message", []
+    async for line in response.aiter_lines():
+        if not line:
+            if data:
+                yield event, json.loads("\n".join(data))
+            event, data = "message", []
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data.append(line[len("data:"):].strip())
+
+
+class StreamingReply:
+    """Mantém a resposta no Telegram atualizada conforme o texto cresce."""
+
+    def __init__(self, message):
+        self.message = message
+        self.sent = None
+        self.text = ""
+        self.shown = ""
+        self.last_edit = 0.0
+
+    async def append(self, delta: str):
+        self.text += delta
+        if time.monotonic() - self.last_edit >= EDIT_INTERVAL:
+            await self.flush()
+
+    async def flush(self):
+        text = self.text[:TELEGRAM_MAX_CHARS]
+        if not text.strip() or text == self.shown:
+            return
+        if self.sent is None:
+            self.sent = await self.message.reply_text(text)
+        else:
+            await self.sent.edit_text(text)
+        self.shown = text
+        self.last_edit = time.monotonic()
+
+    async def finish(self, full_text: str | None = None):
+        if full_text is not None:
+            self.text = full_text
+        await self.flush()
+        # O que passar do limite de uma mensagem vai em mensagens seguintes.
+        for start in range(TELEGRAM_MAX_CHARS, len(self.text), TELEGRAM_MAX_CHARS):
+            await self.message.reply_text(self.text[start:start + TELEGRAM_MAX_CHARS])
+
+
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Processa as mensagens dos usuários"""
     user_message = update.message.text
@@ -56,27 +113,34 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     logger.info(f"Pergunta de {user_name}: {user_message}")
     
     await update.message.chat.send_action(action="typing")
+
+    reply = StreamingReply(update.message)
     
     try:
-        response = requests.get(
-            API_URL,
-            params={"pergunta": user_message},
-            timeout=30
-        )
-        
-        if response.status_code == 200:
-            data = response.json()
-            resposta = data.get("resposta", "Desculpe, não consegui processar sua pergunta.")
-            
-            await update.message.reply_text(resposta)
-            logger.info(f"Resposta enviada para {user_name}")
-        else:
-            await update.message.reply_text(
-                "Desculpe, tive um problema ao processar sua pergunta. Tente novamente!"
-            )
-            logger.error(f"Erro na API: Status {response.status_code}")
+        async with httpx.AsyncClient(timeout=httpx.Timeout(10, read=60)) as client:
+            async with client.stream("GET", STREAM_API_URL, params={"pergunta": user_message}) as response:
+                if response.status_code != 200:
+                    await update.message.reply_text(
+                        "Desculpe, tive um problema ao processar sua pergunta. Tente novamente!"
+                    )
+                    logger.error(f"Erro na API: Status {response.status_code}")
+                    return
+
+                async for event, data in iter_sse(response):
+                    if event == "done":
+                        await reply.finish(data.get("resposta"))
+                        logger.info(f"Resposta enviada para {user_name}")
+                        return
+                    if event == "error":
+                        raise RuntimeError(data.get("erro"))
+                    await reply.append(data.get("delta", ""))
+
+        # Stream encerrado sem evento "done": entrega o que chegou.
+        await reply.finish()
+        if not reply.text:
+            await update.message.reply_text("Desculpe, não consegui processar sua pergunta.")
             
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         await update.message.reply_text(
             "consulta está demorando muito. Tente uma pergunta mais específica!"
         )
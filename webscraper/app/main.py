@@ -43,8 +43,9 @@ def send_batch_to_api(batch: List[Document], source_name: str):
         logger.info(f"[API] Enviando lote de {len(batch)} docs de {source_name} para {INGEST_URL}...")
         resp = requests.post(INGEST_URL, json=payload, timeout=120)
         
-        if resp.status_code in [200, 201]:
-            logger.info(f"[API] Lote enviado com sucesso!")
+        if resp.status_code in [200, 201, 202]:
+            job_id = resp.json().get("job_id") if resp.status_code == 202 else None
+            logger.info(f"[API] Lote enviado com sucesso!" + (f" Job de ingestão: {job_id}" if job_id else ""))
         else:
             logger.error(f"[API] Falha no envio: {resp.status_code} - {resp.text}")
             